@@ -3,6 +3,7 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from sqlalchemy import create_engine
+from sqlalchemy import text
 
 from alembic import context
 import os
@@ -21,18 +22,24 @@ from models import User, KnowledgeBase, Document, Chunk, Conversation, Message
 # access to the values within the .ini file in use.
 config = context.config
 
-# Override sqlalchemy.url from environment
-config.set_main_option("sqlalchemy.url", settings.database_url)
+# Override sqlalchemy.url from environment, pinned to the sync psycopg2 driver
+# (SQLAlchemy 2.1 defaults postgresql:// to psycopg 3, which isn't installed)
+database_url = settings.database_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+config.set_main_option("sqlalchemy.url", database_url)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+# Migrations run from init_db() keep the application's logging setup.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Serializes concurrent upgrades (e.g. several uvicorn workers starting up)
+MIGRATION_LOCK_ID = 7241901
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -50,16 +57,23 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
-    connectable = create_engine(settings.database_url)
+    connectable = create_engine(database_url)
 
     with connectable.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+        
         context.configure(
             connection=connection, 
             target_metadata=target_metadata
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,147 @@
+"""initial schema
+
+Revision ID: 4b2e9c1a7f30
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+from config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b2e9c1a7f30"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    
+    # Databases created by the old create_all() startup path already have
+    # these tables; adopt them as-is so later revisions apply on top.
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("users"):
+        return
+    
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    
+    op.create_table(
+        "knowledge_bases",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column(
+            "owner_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    
+    op.create_table(
+        "documents",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "kb_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("knowledge_bases.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("path", sa.String(512), nullable=False),
+        sa.Column("file_type", sa.String(10), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("PROCESSING", "READY", "FAILED", name="documentstatus"),
+            nullable=False,
+        ),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    
+    op.create_table(
+        "chunks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "doc_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("documents.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(settings.embedding_dimension), nullable=True),
+        sa.Column("page_number", sa.Integer(), nullable=True),
+        sa.Column("line_start", sa.Integer(), nullable=True),
+        sa.Column("line_end", sa.Integer(), nullable=True),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    
+    op.create_table(
+        "conversations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "kb_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("knowledge_bases.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    
+    op.create_table(
+        "messages",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "conversation_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("conversations.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "role",
+            sa.Enum("USER", "ASSISTANT", name="messagerole"),
+            nullable=False,
+        ),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("citations", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("messages")
+    op.drop_table("conversations")
+    op.drop_table("chunks")
+    op.drop_table("documents")
+    op.drop_table("knowledge_bases")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_table("users")
+    op.execute("DROP TYPE IF EXISTS messagerole")
+    op.execute("DROP TYPE IF EXISTS documentstatus")
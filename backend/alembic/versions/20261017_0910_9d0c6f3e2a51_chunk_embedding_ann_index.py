@@ -0,0 +1,50 @@
+"""chunk embedding ann index
+
+Creates the cosine ANN index used by retrieval. The index method (hnsw or
+ivfflat) and its build parameters come from settings at upgrade time, via
+the helper that also defines the index on the Chunk model, so changing
+them requires a downgrade/upgrade of this revision to rebuild.
+
+Revision ID: 9d0c6f3e2a51
+Revises: 4b2e9c1a7f30
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from models.document import embedding_index_params
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d0c6f3e2a51"
+down_revision: Union[str, Sequence[str], None] = "4b2e9c1a7f30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking ingestion writes on large existing tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chunks_embedding_ann",
+            "chunks",
+            ["embedding"],
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **embedding_index_params(),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_chunks_embedding_ann",
+            table_name="chunks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
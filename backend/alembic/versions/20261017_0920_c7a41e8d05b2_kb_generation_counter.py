@@ -0,0 +1,31 @@
+"""kb generation counter
+
+Revision ID: c7a41e8d05b2
+Revises: 9d0c6f3e2a51
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a41e8d05b2"
+down_revision: Union[str, Sequence[str], None] = "9d0c6f3e2a51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "knowledge_bases",
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("knowledge_bases", "generation")
@@ -0,0 +1,48 @@
+"""chunk content trigram index
+
+Trigram GIN index for lexical retrieval. pg_trgm works on character
+trigrams, so it also matches CJK text that tsvector parsers can't split
+(requires a UTF-8 database locale).
+
+Revision ID: e18f5b6c9a24
+Revises: c7a41e8d05b2
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e18f5b6c9a24"
+down_revision: Union[str, Sequence[str], None] = "c7a41e8d05b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chunks_content_trgm",
+            "chunks",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_chunks_content_trgm",
+            table_name="chunks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,78 @@
+"""denormalize chunk kb and visibility
+
+Copies kb_id and readiness from documents onto chunks so retrieval can
+filter a single table, and indexes the common access paths.
+
+Revision ID: 5a6d2f8e1c73
+Revises: e18f5b6c9a24
+Create Date: 2026-10-17 09:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a6d2f8e1c73"
+down_revision: Union[str, Sequence[str], None] = "e18f5b6c9a24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("kb_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column(
+        "chunks",
+        sa.Column("is_visible", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    
+    op.execute("""
+        UPDATE chunks c
+        SET kb_id = d.kb_id,
+            is_visible = (d.status = 'READY')
+        FROM documents d
+        WHERE c.doc_id = d.id
+    """)
+    
+    op.alter_column("chunks", "kb_id", nullable=False)
+    op.create_foreign_key(
+        "chunks_kb_id_fkey",
+        "chunks",
+        "knowledge_bases",
+        ["kb_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    
+    with op.get_context().autocommit_block():
+        # Searchable chunks of a KB: exact scans on small KBs, lexical and
+        # mmap-store queries
+        op.create_index(
+            "ix_chunks_kb_id_visible",
+            "chunks",
+            ["kb_id", "doc_id"],
+            postgresql_where=sa.text("is_visible"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Visibility flips and cascading deletes by document
+        op.create_index(
+            "ix_chunks_doc_id",
+            "chunks",
+            ["doc_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_chunks_doc_id", table_name="chunks")
+    op.drop_index("ix_chunks_kb_id_visible", table_name="chunks")
+    op.drop_constraint("chunks_kb_id_fkey", "chunks", type_="foreignkey")
+    op.drop_column("chunks", "is_visible")
+    op.drop_column("chunks", "kb_id")
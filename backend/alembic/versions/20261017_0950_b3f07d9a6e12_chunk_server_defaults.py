@@ -0,0 +1,36 @@
+"""chunk server defaults
+
+Generates chunk ids and timestamps in the database so bulk COPY inserts
+can omit them.
+
+Revision ID: b3f07d9a6e12
+Revises: 5a6d2f8e1c73
+Create Date: 2026-10-17 09:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f07d9a6e12"
+down_revision: Union[str, Sequence[str], None] = "5a6d2f8e1c73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # gen_random_uuid() is built in since PostgreSQL 13
+    op.alter_column("chunks", "id", server_default=sa.text("gen_random_uuid()"))
+    op.alter_column(
+        "chunks", "created_at", server_default=sa.text("timezone('utc', now())")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column("chunks", "created_at", server_default=None)
+    op.alter_column("chunks", "id", server_default=None)
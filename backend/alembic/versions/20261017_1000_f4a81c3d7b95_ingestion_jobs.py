@@ -0,0 +1,70 @@
+"""ingestion jobs
+
+Durable queue of document ingestion jobs processed by worker.py.
+
+Revision ID: f4a81c3d7b95
+Revises: b3f07d9a6e12
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a81c3d7b95"
+down_revision: Union[str, Sequence[str], None] = "b3f07d9a6e12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ingestion_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "doc_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("documents.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "status",
+            sa.Enum("QUEUED", "RUNNING", "SUCCEEDED", "FAILED", name="jobstatus"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(255), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_ingestion_jobs_due",
+        "ingestion_jobs",
+        ["run_at"],
+        postgresql_where=sa.text("status = 'QUEUED'"),
+    )
+    op.create_index(
+        "ix_ingestion_jobs_heartbeat",
+        "ingestion_jobs",
+        ["heartbeat_at"],
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+    op.create_index("ix_ingestion_jobs_doc_id", "ingestion_jobs", ["doc_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_ingestion_jobs_doc_id", table_name="ingestion_jobs")
+    op.drop_index("ix_ingestion_jobs_heartbeat", table_name="ingestion_jobs")
+    op.drop_index("ix_ingestion_jobs_due", table_name="ingestion_jobs")
+    op.drop_table("ingestion_jobs")
+    sa.Enum(name="jobstatus").drop(op.get_bind(), checkfirst=True)
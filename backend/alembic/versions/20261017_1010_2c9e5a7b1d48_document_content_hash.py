@@ -0,0 +1,30 @@
+"""document content hash
+
+SHA-256 of each uploaded file, computed while it is streamed to disk.
+
+Revision ID: 2c9e5a7b1d48
+Revises: f4a81c3d7b95
+Create Date: 2026-10-17 10:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c9e5a7b1d48"
+down_revision: Union[str, Sequence[str], None] = "f4a81c3d7b95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("documents", sa.Column("content_hash", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("documents", "content_hash")
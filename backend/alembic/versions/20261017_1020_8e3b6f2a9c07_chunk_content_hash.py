@@ -0,0 +1,56 @@
+"""chunk content hash
+
+SHA-256 of each chunk's text, used to reuse embeddings of identical chunks,
+plus lookup indexes for chunk and document deduplication.
+
+Revision ID: 8e3b6f2a9c07
+Revises: 2c9e5a7b1d48
+Create Date: 2026-10-17 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e3b6f2a9c07"
+down_revision: Union[str, Sequence[str], None] = "2c9e5a7b1d48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.execute("""
+        UPDATE chunks
+        SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+    """)
+    
+    with op.get_context().autocommit_block():
+        # Embedding reuse for identical chunk texts within a KB
+        op.create_index(
+            "ix_chunks_kb_id_content_hash",
+            "chunks",
+            ["kb_id", "content_hash"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Ready documents with identical file contents
+        op.create_index(
+            "ix_documents_content_hash_ready",
+            "documents",
+            ["content_hash"],
+            postgresql_where=sa.text("status = 'READY'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_documents_content_hash_ready", table_name="documents")
+    op.drop_index("ix_chunks_kb_id_content_hash", table_name="chunks")
+    op.drop_column("chunks", "content_hash")
@@ -0,0 +1,53 @@
+"""embedding cache
+
+Persistent cache of text embeddings keyed by (model, dimension, text hash).
+
+Revision ID: d61a4e9f3b28
+Revises: 8e3b6f2a9c07
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d61a4e9f3b28"
+down_revision: Union[str, Sequence[str], None] = "8e3b6f2a9c07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "embedding_cache",
+        sa.Column("model", sa.String(100), primary_key=True),
+        sa.Column("dimension", sa.Integer(), primary_key=True),
+        sa.Column("text_hash", sa.String(64), primary_key=True),
+        sa.Column("embedding", Vector(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_embedding_cache_last_used_at", "embedding_cache", ["last_used_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_embedding_cache_last_used_at", table_name="embedding_cache")
+    op.drop_table("embedding_cache")
@@ -0,0 +1,41 @@
+"""ingestion job kind
+
+Job kind (initial ingestion or replacement of a ready document) and a
+kind-specific JSON payload.
+
+Revision ID: 7f2c9d4e8a16
+Revises: d61a4e9f3b28
+Create Date: 2026-10-17 10:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7f2c9d4e8a16"
+down_revision: Union[str, Sequence[str], None] = "d61a4e9f3b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    job_kind = sa.Enum("INGEST", "REPLACE", name="jobkind")
+    job_kind.create(op.get_bind(), checkfirst=True)
+    
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("kind", job_kind, nullable=False, server_default="INGEST"),
+    )
+    op.add_column("ingestion_jobs", sa.Column("payload", postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("ingestion_jobs", "payload")
+    op.drop_column("ingestion_jobs", "kind")
+    sa.Enum(name="jobkind").drop(op.get_bind(), checkfirst=True)
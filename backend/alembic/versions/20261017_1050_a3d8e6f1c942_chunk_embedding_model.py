@@ -0,0 +1,32 @@
+"""chunk embedding model
+
+Model that produced each chunk's embedding, so stored embeddings are only
+reused by ingestion with the same model. Existing chunks stay NULL (model
+unknown) and are never reused.
+
+Revision ID: a3d8e6f1c942
+Revises: 7f2c9d4e8a16
+Create Date: 2026-10-17 10:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d8e6f1c942"
+down_revision: Union[str, Sequence[str], None] = "7f2c9d4e8a16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("embedding_model", sa.String(100), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chunks", "embedding_model")
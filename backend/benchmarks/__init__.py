@@ -0,0 +1 @@
+"""Offline performance benchmarks (run from backend/, e.g. python -m benchmarks.bench_chunker)."""
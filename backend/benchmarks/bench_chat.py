@@ -0,0 +1,96 @@
+"""Per-request chat overhead: context packing, citations and SSE formatting."""
+import uuid
+from typing import List
+
+from benchmarks.bench_chunker import make_text
+from benchmarks.harness import BenchResult, measure, measure_async
+from models.document import Chunk, Document
+from providers.local import LocalChatProvider
+from routers.chat import format_sse_event
+from services.rag_service import RAGService
+from utils.chunker import TextChunker
+
+
+def retrieval_results(count: int, documents: int = 3) -> list:
+    """
+    Synthetic (chunk, document, score) results like a retrieval returns.
+    
+    Every other result is the neighbour of the previous one, so packing
+    has overlapping chunks to merge.
+    """
+    text = make_text("mixed", 64 * 1024, seed=1)
+    chunks = TextChunker().chunk_content([{"content": text, "line_start": 1, "line_end": 1}], "md")
+    docs = [Document(id=uuid.uuid4(), filename=f"doc-{i}.md") for i in range(documents)]
+    
+    results = []
+    for i in range(count):
+        doc = docs[i % documents]
+        index = (i // 2) * 7 + i % 2
+        chunk_data = chunks[index % len(chunks)]
+        chunk = Chunk(
+            id=uuid.uuid4(),
+            doc_id=doc.id,
+            content=chunk_data["content"],
+            line_start=chunk_data["line_start"],
+            line_end=chunk_data["line_end"],
+            chunk_index=index,
+        )
+        results.append((chunk, doc, 1.0 / (i + 1)))
+    return results
+
+
+async def suite(quick: bool = False) -> List[BenchResult]:
+    """Chat hot paths outside the LLM, for benchmarks.run."""
+    repeat = 5 if quick else 9
+    rag_service = RAGService(db=None)
+    results = []
+    
+    for top_k in (5, 20):
+        chunks_with_scores = retrieval_results(top_k)
+        packed = rag_service.pack_context(chunks_with_scores)
+        
+        results.append(measure(
+            "chat",
+            f"build_context/top{top_k}",
+            lambda: rag_service.build_context(chunks_with_scores),
+            number=200,
+            repeat=repeat,
+            extra=packed.as_dict(),
+        ))
+        results.append(measure(
+            "chat",
+            f"create_citations/top{top_k}",
+            lambda: rag_service.create_citations(packed.results),
+            number=200,
+            repeat=repeat,
+        ))
+    
+    citations = [c.model_dump(mode="json") for c in rag_service.create_citations(packed.results)]
+    results.append(measure(
+        "chat",
+        "sse_format/token",
+        lambda: format_sse_event("token", {"token": "retrieval "}),
+        number=10000,
+        repeat=repeat,
+    ))
+    results.append(measure(
+        "chat",
+        f"sse_format/citations{len(citations)}",
+        lambda: format_sse_event("citations", {"citations": citations}),
+        number=500,
+        repeat=repeat,
+    ))
+    
+    # Streaming loop of the chat endpoint with an instant provider: the
+    # per-token cost the server adds on top of the LLM
+    provider = LocalChatProvider(response="token " * 500, tokens_per_second=0, first_token_ms=0)
+    
+    async def stream() -> None:
+        async for token in provider.stream_chat([]):
+            format_sse_event("token", {"token": token})
+    
+    result = await measure_async("chat", "stream_sse/500-tokens", stream, number=5, repeat=repeat)
+    result.extra["tokens_per_second"] = round(500 / result.median)
+    results.append(result)
+    
+    return results
@@ -0,0 +1,145 @@
+"""
+TextChunker throughput on multi-MB synthetic inputs.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunker --sizes-mb 1 4 16
+
+Also part of the full suite (python -m benchmarks.run).
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.harness import BenchResult, measure
+from utils.chunker import TextChunker
+
+
+_EN_WORDS = (
+    "retrieval augmented generation grounds answers in cited passages from "
+    "the knowledge base while the model writes fluent text about them"
+).split()
+
+_ZH_SENTENCES = [
+    "检索增强生成把搜索和生成结合在一起。",
+    "模型回答时会引用知识库中的原文段落！",
+    "为什么要把文档切分成较小的片段？",
+    "向量数据库保存每个片段的嵌入；",
+    "“引用”能让用户核对答案的来源。",
+]
+
+
+def _english_paragraph(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(1, 12)):
+        words = rng.choices(_EN_WORDS, k=rng.randint(6, 30))
+        sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+    return " ".join(sentences)
+
+
+def _chinese_paragraph(rng: random.Random) -> str:
+    return "".join(rng.choices(_ZH_SENTENCES, k=rng.randint(2, 40)))
+
+
+def make_text(kind: str, size_bytes: int, seed: int = 0) -> str:
+    """
+    Build a synthetic document of roughly size_bytes UTF-8 bytes.
+    
+    Args:
+        kind: 'en', 'zh' or 'mixed'
+        size_bytes: Target encoded size
+        seed: Random seed
+    
+    Returns:
+        Paragraphs separated by blank lines
+    """
+    rng = random.Random(seed)
+    paragraphs: List[str] = []
+    total = 0
+    
+    while total < size_bytes:
+        if kind == "en" or (kind == "mixed" and rng.random() < 0.5):
+            paragraph = _english_paragraph(rng)
+        else:
+            paragraph = _chinese_paragraph(rng)
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8")) + 2
+    
+    return "\n\n".join(paragraphs)
+
+
+def bench(text: str, chunker: TextChunker, repeat: int) -> Dict:
+    """Chunk text `repeat` times and return timing and chunk size statistics."""
+    item = [{"content": text, "line_start": 1, "line_end": text.count("\n") + 1}]
+    timings = []
+    
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunker.chunk_content(item, "txt")
+        timings.append(time.perf_counter() - started)
+    
+    best = min(timings)
+    lengths = [len(chunk["content"]) for chunk in chunks]
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+    return {
+        "mb": round(megabytes, 2),
+        "seconds": round(best, 4),
+        "mb_per_second": round(megabytes / best, 2),
+        "chunks": len(chunks),
+        "chunks_per_second": round(len(chunks) / best),
+        "mean_chars": round(statistics.mean(lengths)),
+        "max_chars": max(lengths),
+    }
+
+
+def suite(quick: bool = False) -> List[BenchResult]:
+    """Chunking throughput per language mix, for benchmarks.run."""
+    size_mb = 1 if quick else 4
+    chunker = TextChunker()
+    results = []
+    
+    for kind in ("en", "zh", "mixed"):
+        text = make_text(kind, size_mb * 1024 * 1024)
+        item = [{"content": text, "line_start": 1, "line_end": text.count("\n") + 1}]
+        chunks = chunker.chunk_content(item, "txt")
+        
+        result = measure(
+            "chunker",
+            f"chunk_content/{kind}-{size_mb}mb",
+            lambda: chunker.chunk_content(item, "txt"),
+            repeat=3 if quick else 5,
+            extra={"chunks": len(chunks)},
+        )
+        result.extra["mb_per_second"] = round(size_mb / result.median, 2)
+        results.append(result)
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TextChunker throughput benchmark")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--kinds", nargs="+", default=["en", "zh", "mixed"])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per input (best is reported)")
+    args = parser.parse_args()
+    
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    header = f"{'kind':<6} {'MB':>7} {'sec':>8} {'MB/s':>8} {'chunks':>8} {'chunks/s':>10} {'mean':>6} {'max':>6}"
+    print(header)
+    print("-" * len(header))
+    
+    for kind in args.kinds:
+        for size_mb in args.sizes_mb:
+            text = make_text(kind, int(size_mb * 1024 * 1024))
+            r = bench(text, chunker, args.repeat)
+            print(
+                f"{kind:<6} {r['mb']:>7} {r['seconds']:>8} {r['mb_per_second']:>8} "
+                f"{r['chunks']:>8} {r['chunks_per_second']:>10} {r['mean_chars']:>6} {r['max_chars']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""TextParser and PDFParser throughput on generated files."""
+import os
+import tempfile
+from typing import List
+
+from benchmarks.bench_chunker import make_text
+from benchmarks.harness import BenchResult, failed, measure
+from config import settings
+from utils.pdf_parser import PDFParser, shutdown_pdf_pool
+from utils.text_parser import TextParser
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 40) -> None:
+    """
+    Write a minimal text-only PDF (Helvetica, one content stream per page).
+    
+    Args:
+        path: Output file
+        pages: Number of pages
+        lines_per_page: Lines of text on each page
+    """
+    font_id = 3 + 2 * pages
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode(),
+    ]
+    
+    for i in range(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        lines = " ".join(
+            f"(Page {i + 1} line {j}: retrieval augmented generation cites its sources.) '"
+            for j in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 20 770 Td 12 TL {lines} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def suite(quick: bool = False) -> List[BenchResult]:
+    """Parser throughput, for benchmarks.run."""
+    text_mb = 2 if quick else 8
+    pdf_pages = 60 if quick else 300
+    repeat = 3 if quick else 5
+    results = []
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "bench.md")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(make_text("mixed", text_mb * 1024 * 1024))
+        
+        parser = TextParser()
+        result = measure(
+            "parsers",
+            f"text_parser/{text_mb}mb",
+            lambda: parser.parse(text_path),
+            repeat=repeat,
+        )
+        result.extra["mb_per_second"] = round(text_mb / result.median, 2)
+        results.append(result)
+        
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        write_pdf(pdf_path, pdf_pages)
+        
+        variants = [("sequential", 0), ("parallel", max(2, settings.pdf_parse_workers))]
+        for label, workers in variants:
+            name = f"pdf_parser/{label}-{pdf_pages}p"
+            parser = PDFParser(workers=workers, parallel_min_pages=1, pages_per_task=settings.pdf_pages_per_task)
+            try:
+                result = measure(
+                    "parsers",
+                    name,
+                    lambda: list(parser.iter_pages(pdf_path)),
+                    repeat=repeat,
+                    extra={"workers": workers},
+                )
+                result.extra["pages_per_second"] = round(pdf_pages / result.median, 1)
+                results.append(result)
+            except Exception as e:
+                results.append(failed("parsers", name, e))
+    
+    shutdown_pdf_pool()
+    return results
@@ -0,0 +1,127 @@
+"""Timing helpers and result format shared by the benchmark suites."""
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchResult:
+    """Timing of one benchmark; times are seconds per operation."""
+    suite: str
+    name: str
+    iterations: int = 0
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    p95: Optional[float] = None
+    min: Optional[float] = None
+    ops_per_second: Optional[float] = None
+    extra: Dict[str, Any] = field(default_factory=dict)  # Throughput, sizes, counts
+    error: Optional[str] = None
+    
+    @property
+    def key(self) -> str:
+        return f"{self.suite}/{self.name}"
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _summarize(suite: str, name: str, samples: List[float], number: int, extra: Optional[Dict]) -> BenchResult:
+    """Build a result from per-operation samples."""
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return BenchResult(
+        suite=suite,
+        name=name,
+        iterations=len(samples) * number,
+        mean=statistics.fmean(ordered),
+        median=median,
+        p95=ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        min=ordered[0],
+        ops_per_second=1.0 / median if median > 0 else None,
+        extra=extra or {},
+    )
+
+
+def measure(
+    suite: str,
+    name: str,
+    fn: Callable[[], Any],
+    number: int = 1,
+    repeat: int = 5,
+    extra: Optional[Dict] = None,
+) -> BenchResult:
+    """
+    Time a synchronous callable.
+    
+    Args:
+        suite: Suite name
+        name: Benchmark name, unique within the suite
+        fn: Operation to time
+        number: Calls per sample (raise for sub-millisecond operations)
+        repeat: Samples taken, after one warm-up call
+        extra: Additional fields recorded with the result
+    
+    Returns:
+        BenchResult with per-call statistics
+    """
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return _summarize(suite, name, samples, number, extra)
+
+
+async def measure_async(
+    suite: str,
+    name: str,
+    fn: Callable[[], Awaitable[Any]],
+    number: int = 1,
+    repeat: int = 5,
+    extra: Optional[Dict] = None,
+) -> BenchResult:
+    """Time a coroutine function; arguments as for measure()."""
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        samples.append((time.perf_counter() - started) / number)
+    return _summarize(suite, name, samples, number, extra)
+
+
+def failed(suite: str, name: str, error: BaseException) -> BenchResult:
+    """Record a benchmark that could not run."""
+    return BenchResult(suite=suite, name=name, error=f"{type(error).__name__}: {error}")
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and code version the results were produced on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
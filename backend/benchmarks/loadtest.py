@@ -0,0 +1,411 @@
+"""
+Concurrent load test of the SSE chat endpoint, end to end over HTTP.
+
+Registers (or logs in) a load-test user through /api/auth, uploads a
+fixture corpus to a fresh knowledge base, waits for ingestion, then runs
+closed-loop sessions against /api/kb/{kb_id}/chat/stream at each
+concurrency level and reports time to first token (TTFT), inter-token
+latency, total time percentiles, throughput and error rate. The sweep
+stops at the saturation point: the first level whose throughput no
+longer grows, or whose errors or p95 TTFT exceed the limits.
+
+Run the API against the stub provider (see benchmarks.stub_llm) with the
+answer cache disabled so every question reaches the LLM, and uploads
+ingested in the API process (or start `python worker.py` with the same
+environment):
+
+    python -m benchmarks.stub_llm --port 9100 &
+    ZHIPU_API_KEY=stub ZHIPU_BASE_URL=http://127.0.0.1:9100/v1 \\
+    DEFAULT_CHAT_PROVIDER=zhipu EMBEDDING_PROVIDER=zhipu ANSWER_CACHE_ENABLED=false \\
+    INGESTION_MODE=background uvicorn main:app --port 8000 &
+    python -m benchmarks.loadtest --concurrency 1 2 4 8 16 32 64 --duration 30 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_chunker import make_text
+from benchmarks.harness import environment
+
+
+# Question templates; the topic words come from the corpus so retrieval hits
+_QUESTIONS = [
+    "What does the knowledge base say about {0} and {1}?",
+    "How is {0} related to {1} {2}?",
+    "Summarize what the sources say on {0} {1}.",
+    "Why does {0} matter for {1}?",
+]
+
+
+@dataclass
+class Sample:
+    """Timing of one chat session; times are seconds."""
+    ok: bool
+    total: float
+    ttft: Optional[float] = None
+    token_gaps: List[float] = field(default_factory=list)
+    tokens: int = 0
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated q-th percentile (0-100), None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max in milliseconds."""
+    summary = {f"p{q}": percentile(values, q) for q in (50, 95, 99)}
+    summary["max"] = max(values) if values else None
+    return {k: round(v * 1000, 2) if v is not None else None for k, v in summary.items()}
+
+
+class LoadTester:
+    """Drives chat sessions against one knowledge base of a running API."""
+    
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.headers: Dict[str, str] = {}
+        self.kb_id: Optional[str] = None
+        self.vocabulary: List[str] = []
+    
+    def _client(self, connections: int = 10) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        )
+    
+    async def login(self, username: str, password: str) -> None:
+        """Register the load-test user if needed and log in."""
+        async with self._client() as client:
+            response = await client.post("/api/auth/register", json={"username": username, "password": password})
+            if response.status_code not in (201, 400):  # 400: already registered
+                response.raise_for_status()
+            
+            response = await client.post("/api/auth/login", json={"username": username, "password": password})
+            response.raise_for_status()
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    async def prepare_kb(
+        self,
+        kb_id: Optional[str],
+        corpus_dir: Optional[str],
+        documents: int,
+        document_kb: int,
+        ingest_timeout: float,
+    ) -> None:
+        """
+        Use an existing knowledge base, or create one and upload the corpus.
+        
+        Args:
+            kb_id: Existing knowledge base to load (skips the upload)
+            corpus_dir: Directory of .md/.txt/.pdf files to upload
+            documents: Number of generated documents (without corpus_dir)
+            document_kb: Size of each generated document in KB
+            ingest_timeout: Seconds to wait for ingestion to finish
+        """
+        async with self._client() as client:
+            if kb_id:
+                self.kb_id = kb_id
+                self.vocabulary = make_text("mixed", 16 * 1024).split()
+                return
+            
+            response = await client.post("/api/kb", json={"name": f"loadtest-{int(time.time())}"})
+            response.raise_for_status()
+            self.kb_id = response.json()["id"]
+            
+            if corpus_dir:
+                names = sorted(
+                    n for n in os.listdir(corpus_dir)
+                    if os.path.splitext(n)[1].lower() in (".md", ".txt", ".pdf")
+                )
+                files = []
+                for name in names:
+                    with open(os.path.join(corpus_dir, name), "rb") as f:
+                        files.append((name, f.read()))
+            else:
+                files = [
+                    (f"fixture-{i}.md", make_text("mixed", document_kb * 1024, seed=i).encode("utf-8"))
+                    for i in range(documents)
+                ]
+            
+            if not files:
+                raise ValueError(f"No .md, .txt or .pdf files in {corpus_dir}")
+            
+            for name, content in files:
+                if name.endswith((".md", ".txt")):
+                    self.vocabulary += content.decode("utf-8", errors="ignore").split()[:5000]
+            if not self.vocabulary:
+                self.vocabulary = make_text("mixed", 16 * 1024).split()
+            
+            started = time.perf_counter()
+            for name, content in files:
+                response = await client.post(f"/api/kb/{self.kb_id}/documents", files=[("files", (name, content))])
+                response.raise_for_status()
+            
+            print(f"Uploaded {len(files)} documents, waiting for ingestion...", file=sys.stderr)
+            deadline = time.monotonic() + ingest_timeout
+            while True:
+                response = await client.get(f"/api/kb/{self.kb_id}/documents")
+                response.raise_for_status()
+                statuses = [d["status"] for d in response.json()]
+                if "processing" not in statuses:
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Ingestion not finished after {ingest_timeout:.0f}s")
+                await asyncio.sleep(1)
+            
+            failed = statuses.count("failed")
+            print(
+                f"Ingested {len(statuses) - failed}/{len(statuses)} documents "
+                f"in {time.perf_counter() - started:.1f}s",
+                file=sys.stderr,
+            )
+            if failed == len(statuses):
+                raise RuntimeError("Every fixture document failed to ingest")
+    
+    def question(self, rng: random.Random) -> str:
+        """A random question about words of the corpus."""
+        words = [w.strip(".,!?;:()[]\"'").lower() for w in rng.sample(self.vocabulary, 3)]
+        return rng.choice(_QUESTIONS).format(*words)
+    
+    async def chat_once(self, client: httpx.AsyncClient, message: str) -> Sample:
+        """Run one chat session and time its token events."""
+        started = time.perf_counter()
+        ttft = None
+        last_token = None
+        gaps: List[float] = []
+        tokens = 0
+        
+        try:
+            async with client.stream(
+                "POST", f"/api/kb/{self.kb_id}/chat/stream", json={"message": message}
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    return Sample(ok=False, total=time.perf_counter() - started, error=f"HTTP {response.status_code}")
+                
+                buffer = b""
+                async for block in response.aiter_bytes():
+                    buffer += block
+                    *events, buffer = buffer.split(b"\n\n")
+                    for event in events:
+                        name = event.split(b"\n", 1)[0][len(b"event: "):]
+                        now = time.perf_counter()
+                        if name == b"token":
+                            tokens += 1
+                            if ttft is None:
+                                ttft = now - started
+                            else:
+                                gaps.append(now - last_token)
+                            last_token = now
+                        elif name == b"done":
+                            return Sample(True, now - started, ttft, gaps, tokens)
+                        elif name == b"error":
+                            data = json.loads(event.split(b"data: ", 1)[1])
+                            return Sample(False, now - started, ttft, gaps, tokens, data.get("code", "error"))
+            
+            return Sample(False, time.perf_counter() - started, ttft, gaps, tokens, "INCOMPLETE_STREAM")
+        except httpx.HTTPError as e:
+            return Sample(False, time.perf_counter() - started, ttft, gaps, tokens, type(e).__name__)
+    
+    async def run_level(self, concurrency: int, duration: float, seed: int = 0) -> Dict:
+        """
+        Keep `concurrency` sessions in flight for `duration` seconds.
+        
+        Each virtual user starts its next question as soon as the previous
+        answer finishes (closed loop); sessions running at the deadline are
+        completed and counted.
+        
+        Returns:
+            Level summary (throughput, latency percentiles, errors)
+        """
+        samples: List[Sample] = []
+        
+        async with self._client(connections=concurrency) as client:
+            deadline = time.perf_counter() + duration
+            
+            async def user(index: int) -> None:
+                rng = random.Random(seed * 100003 + index)
+                while time.perf_counter() < deadline:
+                    samples.append(await self.chat_once(client, self.question(rng)))
+            
+            started = time.perf_counter()
+            await asyncio.gather(*(user(i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        
+        succeeded = [s for s in samples if s.ok]
+        errors: Dict[str, int] = {}
+        for s in samples:
+            if not s.ok:
+                errors[s.error] = errors.get(s.error, 0) + 1
+        
+        return {
+            "concurrency": concurrency,
+            "requests": len(samples),
+            "succeeded": len(succeeded),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(succeeded) / elapsed, 3),
+            "tokens_per_second": round(sum(s.tokens for s in succeeded) / elapsed, 1),
+            "error_rate": round(1 - len(succeeded) / len(samples), 4) if samples else 0.0,
+            "errors": errors,
+            "ttft_ms": _latency_summary([s.ttft for s in succeeded if s.ttft is not None]),
+            "inter_token_ms": _latency_summary([gap for s in succeeded for gap in s.token_gaps]),
+            "total_ms": _latency_summary([s.total for s in succeeded]),
+        }
+
+
+def find_saturation(
+    levels: List[Dict],
+    min_gain: float,
+    max_error_rate: float,
+    ttft_slo_ms: Optional[float],
+) -> Optional[Dict]:
+    """
+    First level past the saturation point, with the reason.
+    
+    A level saturates when its throughput grows less than min_gain over
+    the previous level, its error rate exceeds max_error_rate, or its p95
+    TTFT exceeds ttft_slo_ms.
+    
+    Returns:
+        {"concurrency", "reason", "sustainable_concurrency"}, or None if
+        no level saturated
+    """
+    previous = None
+    for level in levels:
+        reason = None
+        p95_ttft = level["ttft_ms"]["p95"]
+        if level["error_rate"] > max_error_rate:
+            reason = f"error rate {level['error_rate']:.1%} > {max_error_rate:.1%}"
+        elif ttft_slo_ms is not None and (p95_ttft is None or p95_ttft > ttft_slo_ms):
+            reason = f"p95 TTFT {p95_ttft} ms > {ttft_slo_ms:.0f} ms"
+        elif previous and level["throughput_rps"] < previous["throughput_rps"] * (1 + min_gain):
+            reason = (
+                f"throughput {level['throughput_rps']:.2f} req/s vs "
+                f"{previous['throughput_rps']:.2f} at concurrency {previous['concurrency']}"
+            )
+        
+        if reason:
+            return {
+                "concurrency": level["concurrency"],
+                "reason": reason,
+                "sustainable_concurrency": previous["concurrency"] if previous else None,
+            }
+        previous = level
+    return None
+
+
+def print_level(level: Dict) -> None:
+    """One table row per concurrency level."""
+    ttft, itl, total = level["ttft_ms"], level["inter_token_ms"], level["total_ms"]
+    print(
+        f"{level['concurrency']:>5} {level['requests']:>6} {level['throughput_rps']:>8.2f} "
+        f"{level['tokens_per_second']:>8.0f} {level['error_rate']:>7.1%} "
+        f"{_ms(ttft['p50']):>8} {_ms(ttft['p95']):>8} {_ms(ttft['p99']):>8} "
+        f"{_ms(itl['p50']):>7} {_ms(itl['p99']):>7} "
+        f"{_ms(total['p50']):>8} {_ms(total['p95']):>8} {_ms(total['p99']):>8}",
+        flush=True,
+    )
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    tester = LoadTester(args.base_url, args.timeout)
+    await tester.login(args.username, args.password)
+    await tester.prepare_kb(args.kb_id, args.corpus, args.documents, args.document_kb, args.ingest_timeout)
+    
+    if args.warmup > 0:
+        print(f"Warming up for {args.warmup:.0f}s...", file=sys.stderr)
+        await tester.run_level(min(args.concurrency), args.warmup, seed=-1)
+    
+    print(
+        f"{'conc':>5} {'reqs':>6} {'req/s':>8} {'tok/s':>8} {'errors':>7} "
+        f"{'ttft50':>8} {'ttft95':>8} {'ttft99':>8} {'itl50':>7} {'itl99':>7} "
+        f"{'total50':>8} {'total95':>8} {'total99':>8}"
+    )
+    
+    levels = []
+    saturation = None
+    for seed, concurrency in enumerate(sorted(set(args.concurrency))):
+        level = await tester.run_level(concurrency, args.duration, seed)
+        levels.append(level)
+        print_level(level)
+        
+        saturation = find_saturation(levels, args.min_gain, args.max_error_rate, args.ttft_slo_ms)
+        if saturation and not args.full_sweep:
+            break
+    
+    if saturation:
+        print(
+            f"Saturated at concurrency {saturation['concurrency']} ({saturation['reason']}); "
+            f"sustainable concurrency: {saturation['sustainable_concurrency']}",
+            file=sys.stderr,
+        )
+    else:
+        print("No saturation within the tested concurrency levels", file=sys.stderr)
+    
+    return {
+        "environment": environment(),
+        "config": {
+            "base_url": args.base_url,
+            "kb_id": tester.kb_id,
+            "duration_s": args.duration,
+            "concurrency": sorted(set(args.concurrency)),
+        },
+        "levels": levels,
+        "saturation": saturation,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the SSE chat endpoint")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API server")
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--kb-id", help="Load an existing knowledge base instead of uploading a corpus")
+    parser.add_argument("--corpus", help="Directory of .md/.txt/.pdf files to upload (default: generated)")
+    parser.add_argument("--documents", type=int, default=5, help="Generated fixture documents")
+    parser.add_argument("--document-kb", type=int, default=64, help="Size of each generated document in KB")
+    parser.add_argument("--ingest-timeout", type=float, default=600.0, help="Seconds to wait for ingestion")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Warm-up seconds before the sweep")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="Throughput growth below which a level saturates")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate above which a level saturates")
+    parser.add_argument("--ttft-slo-ms", type=float, help="p95 TTFT above which a level saturates")
+    parser.add_argument("--full-sweep", action="store_true", help="Keep going past the saturation point")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    
+    report = asyncio.run(run(args))
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
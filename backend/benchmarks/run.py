@@ -0,0 +1,149 @@
+"""
+Run the benchmark suite and write machine-readable results.
+
+Runs fully offline: the local hashing embedding provider and canned chat
+provider stand in for the remote APIs. The retrieval suite needs a
+migrated database (DATABASE_URL) and only runs with --database.
+
+Usage (from backend/):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --database --output bench.json --compare baseline.json
+
+Results are JSON: {"environment": {...}, "results": [...]}, one entry per
+benchmark with per-operation seconds (mean, median, p95, min) and
+ops_per_second. --compare matches results by suite/name against an
+earlier file and reports the median ratio; --max-regression makes the
+exit status non-zero when any benchmark slowed down by more than the
+given fraction.
+"""
+import os
+
+# Offline stand-ins unless explicitly configured otherwise; must be set
+# before settings are loaded
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("DEFAULT_CHAT_PROVIDER", "local")
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.harness import BenchResult, environment
+
+
+SUITES = ("chunker", "parsers", "chat", "retrieval")
+
+
+async def run_suites(names: List[str], quick: bool, chunk_count: Optional[int], reseed: bool) -> List[BenchResult]:
+    """Run the selected suites in order, printing progress."""
+    results: List[BenchResult] = []
+    
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        if name == "chunker":
+            from benchmarks import bench_chunker
+            results += bench_chunker.suite(quick)
+        elif name == "parsers":
+            from benchmarks import bench_parsers
+            results += bench_parsers.suite(quick)
+        elif name == "chat":
+            from benchmarks import bench_chat
+            results += await bench_chat.suite(quick)
+        elif name == "retrieval":
+            from benchmarks import bench_retrieval
+            from database import engine
+            try:
+                results += await bench_retrieval.suite(quick, chunk_count, reseed)
+            finally:
+                await engine.dispose()
+    
+    return results
+
+
+def print_table(results: List[BenchResult], baseline: Dict[str, Dict]) -> List[Tuple[str, float]]:
+    """
+    Print results (with the change against a baseline, if given).
+    
+    Returns:
+        (key, median ratio) for every benchmark found in the baseline
+    """
+    header = f"{'benchmark':<40} {'median':>12} {'p95':>12} {'ops/s':>12}"
+    if baseline:
+        header += f" {'baseline':>12} {'ratio':>7}"
+    print(header)
+    print("-" * len(header))
+    
+    ratios = []
+    for r in results:
+        if r.error:
+            print(f"{r.key:<40} ERROR {r.error.splitlines()[0][:120]}")
+            continue
+        
+        line = f"{r.key:<40} {_fmt(r.median):>12} {_fmt(r.p95):>12} {r.ops_per_second or 0:>12.1f}"
+        previous = baseline.get(r.key)
+        if previous and previous.get("median"):
+            ratio = r.median / previous["median"]
+            ratios.append((r.key, ratio))
+            line += f" {_fmt(previous['median']):>12} {ratio:>7.2f}"
+        print(line)
+    
+    return ratios
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    """Format seconds with a readable unit."""
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, help="Suites to run (default: all offline suites)")
+    parser.add_argument("--database", action="store_true", help="Include the retrieval suite (needs DATABASE_URL)")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    parser.add_argument("--chunks", type=int, help="Chunks in the retrieval benchmark KB")
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the retrieval benchmark KB")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="Exit with status 1 if a median is slower than baseline by more than this fraction (e.g. 0.2)",
+    )
+    args = parser.parse_args()
+    
+    names = args.suites or [s for s in SUITES if s != "retrieval" or args.database]
+    results = asyncio.run(run_suites(names, args.quick, args.chunks, args.reseed))
+    
+    baseline: Dict[str, Dict] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {f"{r['suite']}/{r['name']}": r for r in json.load(f)["results"]}
+    
+    ratios = print_table(results, baseline)
+    
+    if args.output:
+        report = {
+            "environment": {**environment(), "quick": args.quick},
+            "results": [r.as_dict() for r in results],
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    
+    if args.max_regression is not None:
+        regressed = [(key, ratio) for key, ratio in ratios if ratio > 1 + args.max_regression]
+        for key, ratio in regressed:
+            print(f"REGRESSION {key}: {ratio:.2f}x baseline median", file=sys.stderr)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
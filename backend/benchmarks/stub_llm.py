@@ -0,0 +1,166 @@
+"""
+OpenAI-compatible stub LLM and embedding server for load tests.
+
+Serves /v1/chat/completions (streaming and not) and /v1/embeddings with
+configurable latency, token rate and error rate, so the API can be
+loaded end to end without remote providers. Point a provider at it, e.g.:
+
+    python -m benchmarks.stub_llm --port 9100 --first-token-ms 300 --tokens-per-second 40
+
+    ZHIPU_API_KEY=stub ZHIPU_BASE_URL=http://127.0.0.1:9100/v1 \\
+    DEFAULT_CHAT_PROVIDER=zhipu EMBEDDING_PROVIDER=zhipu \\
+    INGESTION_MODE=background uvicorn main:app --port 8000
+
+With the default INGESTION_MODE=queue, run `python worker.py` with the
+same environment so uploads get ingested.
+
+Embeddings are the local hashing embeddings, so retrieval over an
+uploaded corpus returns relevant chunks.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from providers.local import HashingEmbeddingProvider
+
+
+_ANSWER_WORDS = (
+    "Based on the retrieved sources the knowledge base states that retrieval "
+    "augmented generation grounds each answer in cited passages [Source 1] "
+    "and the model writes fluent text about them [Source 2]"
+).split()
+
+
+def create_app(
+    first_token_ms: float = 300.0,
+    tokens_per_second: float = 40.0,
+    answer_tokens: int = 120,
+    embedding_latency_ms: float = 20.0,
+    error_rate: float = 0.0,
+    dimension: Optional[int] = None,
+) -> FastAPI:
+    """
+    Build the stub application.
+    
+    Args:
+        first_token_ms: Delay before the first streamed token (prefill)
+        tokens_per_second: Decode rate of streamed tokens (0 = no delay)
+        answer_tokens: Tokens per answer
+        embedding_latency_ms: Latency of each /embeddings request
+        error_rate: Fraction of requests answered with HTTP 500
+        dimension: Embedding dimension (default EMBEDDING_DIMENSION)
+    
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Stub LLM")
+    embedder = HashingEmbeddingProvider(dimension)
+    interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+    stats = {"chat": 0, "embeddings": 0, "errors": 0, "started_at": time.time()}
+    
+    def answer() -> List[str]:
+        return [f"{_ANSWER_WORDS[i % len(_ANSWER_WORDS)]} " for i in range(answer_tokens)]
+    
+    def injected_error() -> Optional[JSONResponse]:
+        if error_rate > 0 and random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Injected stub error", "type": "server_error"}},
+            )
+        return None
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["chat"] += 1
+        
+        error = injected_error()
+        if error is not None:
+            return error
+        
+        model = body.get("model", "stub")
+        tokens = answer()
+        
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_ms / 1000 + interval * (len(tokens) - 1))
+            return {
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}}],
+            }
+        
+        async def stream():
+            yield b'data: {"choices":[{"index":0,"delta":{"role":"assistant"}}]}\n\n'
+            await asyncio.sleep(first_token_ms / 1000)
+            for i, token in enumerate(tokens):
+                if i and interval:
+                    await asyncio.sleep(interval)
+                chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+                yield f"data: {json.dumps(chunk)}\n\n".encode()
+            yield b'data: {"choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n'
+            yield b"data: [DONE]\n\n"
+        
+        return StreamingResponse(stream(), media_type="text/event-stream")
+    
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats["embeddings"] += 1
+        
+        error = injected_error()
+        if error is not None:
+            return error
+        
+        texts = body.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        await asyncio.sleep(embedding_latency_ms / 1000)
+        return {
+            "model": body.get("model", "stub"),
+            "data": [
+                {"index": i, "object": "embedding", "embedding": embedder.embed_one(text).tolist()}
+                for i, text in enumerate(texts)
+            ],
+        }
+    
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+    
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM/embedding server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Decode rate (0 = unthrottled)")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Tokens per answer")
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0, help="Latency per embeddings call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--dimension", type=int, help="Embedding dimension (default EMBEDDING_DIMENSION)")
+    args = parser.parse_args()
+    
+    import uvicorn
+    
+    app = create_app(
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+        embedding_latency_ms=args.embedding_latency_ms,
+        error_rate=args.error_rate,
+        dimension=args.dimension,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,15 @@
 Database connection and session management.
 Uses SQLAlchemy async with PostgreSQL + pgvector.
 """
-from sqlalchemy import text
+import asyncio
+import os
+
+import numpy as np
+from alembic import command
+from alembic.config import Config
+from pgvector.asyncpg import register_vector
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from config import settings
@@ -16,8 +24,45 @@ engine = create_async_engine(
     database_url,
     echo=False,
     pool_pre_ping=True,
+    connect_args={
+        # Per-connection LRU of prepared statements (hot retrieval SQL is reused)
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    },
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _register_vector_codec(dbapi_connection, connection_record):
+    """Register pgvector's binary asyncpg codec on every new connection."""
+    dbapi_connection.run_async(register_vector)
+
+
+class EmbeddingVector(Vector):
+    """
+    pgvector column type that binds through the binary asyncpg codec.
+    
+    The stock type serializes vectors to text; with the codec registered,
+    values are passed as float32 arrays and sent in binary form.
+    """
+    
+    cache_ok = True
+    
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return np.asarray(value, dtype=np.float32)
+        return process
+    
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None:
+                return None
+            if hasattr(value, "to_numpy"):
+                return value.to_numpy()
+            return np.asarray(value, dtype=np.float32)
+        return process
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -40,10 +85,18 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def run_migrations() -> None:
+    """Upgrade the database schema to the latest Alembic revision."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    alembic_cfg = Config(
+        os.path.join(base_dir, "alembic.ini"),
+        attributes={"configure_logger": False},
+    )
+    alembic_cfg.set_main_option("script_location", os.path.join(base_dir, "alembic"))
+    command.upgrade(alembic_cfg, "head")
+
+
 async def init_db():
-    """Initialize database tables."""
-    async with engine.begin() as conn:
-        # Enable pgvector extension
-        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    """Initialize database schema (extensions, tables and indexes) via migrations."""
+    # Alembic runs on a sync driver, keep it off the event loop
+    await asyncio.to_thread(run_migrations)
@@ -5,21 +5,29 @@ Registers all routers and configures middleware.
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import os
 import traceback
 import logging
 
 from config import settings
 from database import init_db
+from providers.factory import init_providers, close_providers
+from utils.metrics import render_metrics
+from utils.pdf_parser import shutdown_pdf_pool
+from utils.request_context import RequestContextMiddleware, RequestIdFilter
 from routers import auth, kb, documents, chat
 
 # Import models to register them with SQLAlchemy Base.metadata
 # This is required for init_db to create tables
 from models import User, KnowledgeBase, Document, Chunk, Conversation, Message
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; records carry the ID of the request being handled
+logging.basicConfig(level=logging.DEBUG, format="%(levelname)s:%(name)s:[%(request_id)s] %(message)s")
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
+# Per-connection-event debug output of the provider HTTP client
+logging.getLogger("httpcore").setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -29,9 +37,13 @@ async def lifespan(app: FastAPI):
     # Startup: Initialize database and create upload directory
     await init_db()
     os.makedirs(settings.upload_dir, exist_ok=True)
+    # Create providers (and their pooled HTTP clients) once for all requests
+    init_providers()
     logger.info("Application started successfully")
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: close pooled provider HTTP connections and parser processes
+    await close_providers()
+    shutdown_pdf_pool()
 
 
 app = FastAPI(
@@ -63,8 +75,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Request IDs (X-Request-ID) and per-request timing marks
+app.add_middleware(RequestContextMiddleware)
+
 # Register routers with /api prefix
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(kb.router, prefix="/api/kb", tags=["Knowledge Base"])
@@ -78,6 +94,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (text exposition format)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api")
 async def api_root():
     """API root endpoint."""
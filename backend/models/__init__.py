@@ -3,6 +3,8 @@ from models.user import User
 from models.kb import KnowledgeBase
 from models.document import Document, Chunk
 from models.conversation import Conversation, Message
+from models.job import IngestionJob, JobStatus, JobKind
+from models.embedding_cache import EmbeddingCacheEntry
 
 __all__ = [
     "User",
@@ -11,4 +13,8 @@ __all__ = [
     "Chunk",
     "Conversation",
     "Message",
+    "IngestionJob",
+    "JobStatus",
+    "JobKind",
+    "EmbeddingCacheEntry",
 ]
@@ -1,13 +1,12 @@
 """Document and Chunk models."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Text, Integer, Boolean, ForeignKey, Enum, Index, false, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
 import enum
 
-from database import Base
+from database import Base, EmbeddingVector
 from config import settings
 
 
@@ -22,6 +21,14 @@ class Document(Base):
     """Document table for uploaded files."""
     
     __tablename__ = "documents"
+    __table_args__ = (
+        # Ready documents with identical file contents (ingestion reuse)
+        Index(
+            "ix_documents_content_hash_ready",
+            "content_hash",
+            postgresql_where=text("status = 'READY'"),
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False)
@@ -29,6 +36,7 @@ class Document(Base):
     path = Column(String(512), nullable=False)  # Local storage path
     file_type = Column(String(10), nullable=False)  # pdf, md, txt
     size = Column(Integer, nullable=True)  # File size in bytes
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the uploaded file (hex)
     status = Column(
         Enum(DocumentStatus),
         default=DocumentStatus.PROCESSING,
@@ -45,15 +53,65 @@ class Document(Base):
         return f"<Document(id={self.id}, filename={self.filename}, status={self.status})>"
 
 
+def embedding_index_params() -> dict:
+    """Return the ANN index method and build parameters from settings."""
+    if settings.vector_index_type == "hnsw":
+        return {
+            "postgresql_using": "hnsw",
+            "postgresql_with": {
+                "m": settings.hnsw_m,
+                "ef_construction": settings.hnsw_ef_construction,
+            },
+        }
+    if settings.vector_index_type == "ivfflat":
+        return {
+            "postgresql_using": "ivfflat",
+            "postgresql_with": {"lists": settings.ivfflat_lists},
+        }
+    raise ValueError(f"Unknown vector index type: {settings.vector_index_type}")
+
+
 class Chunk(Base):
     """Document chunk with embedding vector."""
     
     __tablename__ = "chunks"
+    __table_args__ = (
+        # Cosine ANN index used by retrieval (see alembic migrations)
+        Index(
+            "ix_chunks_embedding_ann",
+            "embedding",
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+            **embedding_index_params(),
+        ),
+        # Trigram index for lexical retrieval (works for CJK text)
+        Index(
+            "ix_chunks_content_trgm",
+            "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ),
+        # Searchable chunks of a KB
+        Index(
+            "ix_chunks_kb_id_visible",
+            "kb_id",
+            "doc_id",
+            postgresql_where=text("is_visible"),
+        ),
+        Index("ix_chunks_doc_id", "doc_id"),
+        # Embedding reuse for identical chunk texts
+        Index("ix_chunks_kb_id_content_hash", "kb_id", "content_hash"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Server defaults let bulk COPY inserts omit id and created_at
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     doc_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from the document so retrieval filters a single table
+    kb_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_bases.id", ondelete="CASCADE"), nullable=False)
+    is_visible = Column(Boolean, nullable=False, default=False, server_default=false())  # True once the document is ready
     content = Column(Text, nullable=False)
-    embedding = Column(Vector(settings.embedding_dimension), nullable=True)  # pgvector
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of content (hex)
+    embedding = Column(EmbeddingVector(settings.embedding_dimension), nullable=True)  # pgvector
+    embedding_model = Column(String(100), nullable=True)  # Model that produced the embedding
     
     # Metadata for citation tracing
     page_number = Column(Integer, nullable=True)  # For PDF
@@ -61,7 +119,7 @@ class Chunk(Base):
     line_end = Column(Integer, nullable=True)     # For MD/TXT
     chunk_index = Column(Integer, nullable=False, default=0)  # Order within document
     
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=text("timezone('utc', now())"), nullable=False)
     
     # Relationships
     document = relationship("Document", back_populates="chunks")
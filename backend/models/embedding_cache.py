@@ -0,0 +1,26 @@
+"""Persistent embedding cache model."""
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, Index, text
+
+from database import Base, EmbeddingVector
+
+
+class EmbeddingCacheEntry(Base):
+    """Embedding of a text, keyed by model, dimension and text hash."""
+    
+    __tablename__ = "embedding_cache"
+    __table_args__ = (
+        # Eviction scans least recently used entries
+        Index("ix_embedding_cache_last_used_at", "last_used_at"),
+    )
+    
+    model = Column(String(100), primary_key=True)
+    dimension = Column(Integer, primary_key=True)
+    text_hash = Column(String(64), primary_key=True)  # SHA-256 of the text (hex)
+    # Untyped dimension so entries of different models can coexist
+    embedding = Column(EmbeddingVector(), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=text("timezone('utc', now())"), nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, server_default=text("timezone('utc', now())"), nullable=False)
+    
+    def __repr__(self):
+        return f"<EmbeddingCacheEntry(model={self.model}, text_hash={self.text_hash})>"
@@ -0,0 +1,73 @@
+"""Ingestion job model (durable work queue)."""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, Enum, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+import enum
+
+from database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Ingestion job status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobKind(str, enum.Enum):
+    """What an ingestion job does with its document."""
+    INGEST = "ingest"  # Parse and index a newly uploaded file
+    REPLACE = "replace"  # Re-index a ready document from a new version of its file
+
+
+class IngestionJob(Base):
+    """Queued document ingestion, claimed by workers with SKIP LOCKED."""
+    
+    __tablename__ = "ingestion_jobs"
+    __table_args__ = (
+        # Claim path: next due queued job
+        Index(
+            "ix_ingestion_jobs_due",
+            "run_at",
+            postgresql_where=text("status = 'QUEUED'"),
+        ),
+        # Stale recovery: running jobs by last heartbeat
+        Index(
+            "ix_ingestion_jobs_heartbeat",
+            "heartbeat_at",
+            postgresql_where=text("status = 'RUNNING'"),
+        ),
+        Index("ix_ingestion_jobs_doc_id", "doc_id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    doc_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    status = Column(
+        Enum(JobStatus),
+        default=JobStatus.QUEUED,
+        nullable=False
+    )
+    kind = Column(
+        Enum(JobKind),
+        default=JobKind.INGEST,
+        server_default=JobKind.INGEST.name,
+        nullable=False
+    )
+    payload = Column(JSONB, nullable=True)  # Kind-specific arguments (new file for REPLACE)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Not claimable before this
+    locked_by = Column(String(255), nullable=True)  # Worker id holding the job
+    heartbeat_at = Column(DateTime, nullable=True)  # Last liveness update while running
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    document = relationship("Document")
+    
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, doc_id={self.doc_id}, kind={self.kind}, status={self.status})>"
@@ -1,7 +1,7 @@
 """Knowledge Base model."""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -19,6 +19,8 @@ class KnowledgeBase(Base):
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Bumped whenever a document becomes ready or is deleted (answer cache invalidation)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     owner = relationship("User", back_populates="knowledge_bases")
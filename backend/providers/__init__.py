@@ -1,10 +1,30 @@
 """LLM Providers package."""
 from providers.base import ChatProvider, EmbeddingProvider
-from providers.factory import get_chat_provider, get_embedding_provider
+from providers.cache import CachedEmbeddingProvider
+from providers.openai_compat import OpenAICompatibleChatProvider
+from providers.local import HashingEmbeddingProvider, LocalChatProvider
+from providers.hedged import HedgedChatProvider
+from providers.factory import (
+    init_providers,
+    close_providers,
+    get_chat_provider,
+    get_hedged_chat_provider,
+    get_embedding_provider,
+    get_query_embedding_provider,
+)
 
 __all__ = [
     "ChatProvider",
     "EmbeddingProvider",
+    "CachedEmbeddingProvider",
+    "OpenAICompatibleChatProvider",
+    "HashingEmbeddingProvider",
+    "LocalChatProvider",
+    "HedgedChatProvider",
     "get_chat_provider",
+    "get_hedged_chat_provider",
     "get_embedding_provider",
+    "get_query_embedding_provider",
+    "init_providers",
+    "close_providers",
 ]
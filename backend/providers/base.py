@@ -6,6 +6,8 @@ from typing import List, AsyncGenerator
 class ChatProvider(ABC):
     """Abstract base class for chat/completion providers."""
     
+    name: str = ""  # Short identifier, e.g. 'deepseek'
+    
     @abstractmethod
     async def stream_chat(
         self, 
@@ -35,6 +37,10 @@ class ChatProvider(ABC):
             Complete response text
         """
         pass
+    
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        pass
 
 
 class EmbeddingProvider(ABC):
@@ -58,3 +64,12 @@ class EmbeddingProvider(ABC):
     def dimension(self) -> int:
         """Return the embedding dimension."""
         pass
+    
+    @property
+    def model_name(self) -> str:
+        """Identifier of the embedding model, keying stored and cached vectors."""
+        return getattr(self, "model", type(self).__name__)
+    
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        pass
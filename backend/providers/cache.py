@@ -0,0 +1,117 @@
+"""Caching wrapper for embedding providers."""
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from providers.base import EmbeddingProvider
+from utils import metrics
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    LRU + TTL cache in front of another embedding provider.
+    
+    Entries are keyed by (model, dimension, normalized text). Cache misses
+    from a single embed() call are sent upstream in one request.
+    """
+    
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600,
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            provider: Embedding provider to wrap
+            max_size: Maximum number of cached embeddings (LRU eviction)
+            ttl_seconds: Time after which an entry is re-fetched
+        """
+        self.provider = provider
+        self.model = provider.model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, List[float]]]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different queries share an entry."""
+        return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    
+    def _key(self, text: str) -> Tuple[str, int, str]:
+        return (self.model, self.provider.dimension, self.normalize(text))
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Return cached embeddings, fetching only the misses."""
+        now = time.monotonic()
+        results: List[List[float]] = [None] * len(texts)
+        missing: Dict[Tuple[str, int, str], List[int]] = {}
+        hits = 0
+        
+        for i, text in enumerate(texts):
+            key = self._key(text)
+            entry = self._entries.get(key)
+            
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                results[i] = entry[1]
+                hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+        
+        self.hits += hits
+        self.misses += len(texts) - hits
+        provider = metrics.embedding_provider_label()
+        metrics.QUERY_EMBEDDING_CACHE_HITS.labels(provider).inc(hits)
+        metrics.QUERY_EMBEDDING_CACHE_MISSES.labels(provider).inc(len(texts) - hits)
+        
+        if missing:
+            keys = list(missing)
+            embeddings = await self.provider.embed([texts[missing[key][0]] for key in keys])
+            expires_at = time.monotonic() + self.ttl_seconds
+            
+            for key, embedding in zip(keys, embeddings):
+                for i in missing[key]:
+                    results[i] = embedding
+                self._entries[key] = (expires_at, embedding)
+                self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            metrics.QUERY_EMBEDDING_CACHE_SIZE.labels(provider).set(len(self._entries))
+        
+        return results
+    
+    @property
+    def dimension(self) -> int:
+        """Return the wrapped provider's dimension."""
+        return self.provider.dimension
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+    
+    def clear(self) -> None:
+        """Drop all cached entries (counters are kept)."""
+        self._entries.clear()
+        metrics.QUERY_EMBEDDING_CACHE_SIZE.labels(metrics.embedding_provider_label()).set(0)
+    
+    async def aclose(self) -> None:
+        """Close the wrapped provider."""
+        await self.provider.aclose()
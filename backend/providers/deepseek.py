@@ -1,79 +1,17 @@
 """DeepSeek provider implementation."""
-import json
-from typing import List, AsyncGenerator
-
-import httpx
-
 from config import settings
-from providers.base import ChatProvider
+from providers.openai_compat import OpenAICompatibleChatProvider
 
 
-class DeepSeekProvider(ChatProvider):
+class DeepSeekProvider(OpenAICompatibleChatProvider):
     """DeepSeek API provider for chat completions."""
     
-    def __init__(self):
-        self.api_key = settings.deepseek_api_key
-        self.base_url = settings.deepseek_base_url
-        self.model = settings.deepseek_model
-        
-        if not self.api_key:
-            raise ValueError("DEEPSEEK_API_KEY not configured")
+    name = "deepseek"
     
-    async def stream_chat(
-        self, 
-        messages: List[dict],
-        **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """Stream chat completion from DeepSeek API."""
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": True,
-            "temperature": kwargs.get("temperature", 0.7),
-            "max_tokens": kwargs.get("max_tokens", 2048),
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream("POST", url, headers=headers, json=payload) as response:
-                response.raise_for_status()
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-                        
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                yield content
-                        except json.JSONDecodeError:
-                            continue
-    
-    async def chat(self, messages: List[dict], **kwargs) -> str:
-        """Non-streaming chat completion."""
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-            "temperature": kwargs.get("temperature", 0.7),
-            "max_tokens": kwargs.get("max_tokens", 2048),
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+    def __init__(self):
+        super().__init__(
+            api_key=settings.deepseek_api_key,
+            base_url=settings.deepseek_base_url,
+            model=settings.deepseek_model,
+            api_key_env="DEEPSEEK_API_KEY",
+        )
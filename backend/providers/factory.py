@@ -1,15 +1,36 @@
 """Provider factory with fallback chain support."""
-from typing import Optional, List
+import logging
+from typing import Dict, Optional, List
 
 from config import settings
 from providers.base import ChatProvider, EmbeddingProvider
+from providers.cache import CachedEmbeddingProvider
 from providers.deepseek import DeepSeekProvider
+from providers.hedged import HedgedChatProvider
+from providers.local import HashingEmbeddingProvider, LocalChatProvider
 from providers.qwen import QwenProvider
 from providers.zhipu import ZhipuChatProvider, ZhipuEmbeddingProvider
+from utils import metrics
 
 
+logger = logging.getLogger(__name__)
+
 # Singleton instances cache
 _embedding_provider: Optional[EmbeddingProvider] = None
+_query_embedding_provider: Optional[EmbeddingProvider] = None
+_chat_providers: Dict[str, ChatProvider] = {}
+
+_CHAT_PROVIDER_CLASSES = {
+    "deepseek": DeepSeekProvider,
+    "qwen": QwenProvider,
+    "zhipu": ZhipuChatProvider,
+    "local": LocalChatProvider,
+}
+
+_EMBEDDING_PROVIDER_CLASSES = {
+    "zhipu": ZhipuEmbeddingProvider,
+    "local": HashingEmbeddingProvider,
+}
 
 
 def get_chat_provider(provider_name: Optional[str] = None) -> ChatProvider:
@@ -17,7 +38,7 @@ def get_chat_provider(provider_name: Optional[str] = None) -> ChatProvider:
     Get a chat provider by name with fallback support.
     
     Args:
-        provider_name: One of 'deepseek', 'qwen', 'zhipu', or None for default
+        provider_name: One of 'deepseek', 'qwen', 'zhipu', 'local', or None for default
         
     Returns:
         ChatProvider instance
@@ -28,20 +49,14 @@ def get_chat_provider(provider_name: Optional[str] = None) -> ChatProvider:
     if provider_name is None:
         provider_name = settings.default_chat_provider
     
-    # Build fallback chain
-    fallback_chain = settings.chat_fallback_chain.split(",")
-    
-    # Ensure requested provider is first
-    if provider_name in fallback_chain:
-        fallback_chain.remove(provider_name)
-    fallback_chain.insert(0, provider_name)
-    
     # Try each provider in the chain
     errors = []
-    for name in fallback_chain:
+    for name in _chat_fallback_chain(provider_name):
         try:
             provider = _create_chat_provider(name.strip())
             if provider:
+                if provider.name != provider_name:
+                    metrics.PROVIDER_FALLBACKS.labels(provider_name, provider.name).inc()
                 return provider
         except Exception as e:
             errors.append(f"{name}: {e}")
@@ -50,44 +65,179 @@ def get_chat_provider(provider_name: Optional[str] = None) -> ChatProvider:
     raise ValueError(f"No chat provider available. Errors: {'; '.join(errors)}")
 
 
+def get_hedged_chat_provider(provider_name: Optional[str] = None) -> ChatProvider:
+    """
+    Get a chat provider that hedges a slow first token across the fallback chain.
+    
+    Args:
+        provider_name: Primary provider, or None for default
+        
+    Returns:
+        HedgedChatProvider over the available providers of the chain, or the
+        plain provider if hedging is disabled (CHAT_HEDGE_DELAY_MS=0) or
+        only one provider is available
+        
+    Raises:
+        ValueError: If no provider could be initialized
+    """
+    if settings.chat_hedge_delay_ms <= 0 or settings.chat_hedge_max_providers < 2:
+        return get_chat_provider(provider_name)
+    
+    if provider_name is None:
+        provider_name = settings.default_chat_provider
+    
+    providers = []
+    errors = []
+    for name in _chat_fallback_chain(provider_name):
+        try:
+            providers.append(_create_chat_provider(name))
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    
+    if not providers:
+        raise ValueError(f"No chat provider available. Errors: {'; '.join(errors)}")
+    if len(providers) == 1:
+        return get_chat_provider(provider_name)
+    
+    if providers[0].name != provider_name:
+        metrics.PROVIDER_FALLBACKS.labels(provider_name, providers[0].name).inc()
+    
+    return HedgedChatProvider(
+        providers,
+        delay_ms=settings.chat_hedge_delay_ms,
+        max_providers=settings.chat_hedge_max_providers,
+    )
+
+
+def _chat_fallback_chain(provider_name: str) -> List[str]:
+    """Provider names of the fallback chain, requested provider first."""
+    fallback_chain = [name.strip() for name in settings.chat_fallback_chain.split(",") if name.strip()]
+    
+    # Ensure requested provider is first
+    if provider_name in fallback_chain:
+        fallback_chain.remove(provider_name)
+    fallback_chain.insert(0, provider_name)
+    
+    return fallback_chain
+
+
 def _create_chat_provider(name: str) -> Optional[ChatProvider]:
-    """Create a chat provider instance by name."""
+    """
+    Get a chat provider instance by name.
+    
+    Instances are cached so their pooled HTTP connections are reused
+    across requests.
+    """
     name = name.lower().strip()
     
-    if name == "deepseek":
-        return DeepSeekProvider()
-    elif name == "qwen":
-        return QwenProvider()
-    elif name == "zhipu":
-        return ZhipuChatProvider()
-    else:
+    provider = _chat_providers.get(name)
+    if provider is not None:
+        return provider
+    
+    provider_class = _CHAT_PROVIDER_CLASSES.get(name)
+    if provider_class is None:
         raise ValueError(f"Unknown chat provider: {name}")
+    
+    provider = provider_class()
+    _chat_providers[name] = provider
+    return provider
 
 
 def get_embedding_provider() -> EmbeddingProvider:
     """
-    Get the embedding provider (fixed to Zhipu as per contract).
+    Get the configured embedding provider (EMBEDDING_PROVIDER: zhipu, or
+    local for offline hashing embeddings).
     
     Returns:
         EmbeddingProvider instance (singleton)
         
     Raises:
-        ValueError: If Zhipu embedding is not configured
+        ValueError: If the provider is unknown or not configured
     """
     global _embedding_provider
     
     if _embedding_provider is None:
-        _embedding_provider = ZhipuEmbeddingProvider()
+        name = settings.embedding_provider.lower().strip()
+        provider_class = _EMBEDDING_PROVIDER_CLASSES.get(name)
+        if provider_class is None:
+            raise ValueError(f"Unknown embedding provider: {name}")
+        _embedding_provider = provider_class()
     
     return _embedding_provider
 
 
+def get_query_embedding_provider() -> EmbeddingProvider:
+    """
+    Get the embedding provider for user queries, wrapped in an LRU/TTL cache.
+    
+    Shared by every caller so repeated questions skip the remote round trip.
+    Document ingestion should use get_embedding_provider() instead, so bulk
+    chunk texts don't evict cached queries.
+    
+    Returns:
+        CachedEmbeddingProvider instance (singleton), or the plain provider
+        if the cache is disabled (QUERY_EMBEDDING_CACHE_SIZE=0)
+    """
+    global _query_embedding_provider
+    
+    if _query_embedding_provider is None:
+        provider = get_embedding_provider()
+        if settings.query_embedding_cache_size > 0:
+            provider = CachedEmbeddingProvider(
+                provider,
+                max_size=settings.query_embedding_cache_size,
+                ttl_seconds=settings.query_embedding_cache_ttl,
+            )
+        _query_embedding_provider = provider
+    
+    return _query_embedding_provider
+
+
+def init_providers() -> None:
+    """
+    Create the configured providers up front (called on application startup).
+    
+    Providers that are not configured are skipped here; requests for them
+    still fail over along the fallback chain.
+    """
+    names = [settings.default_chat_provider] + settings.chat_fallback_chain.split(",")
+    
+    for name in dict.fromkeys(n.strip().lower() for n in names if n.strip()):
+        try:
+            _create_chat_provider(name)
+        except ValueError as e:
+            logger.info(f"Chat provider '{name}' unavailable: {e}")
+    
+    try:
+        get_query_embedding_provider()
+    except ValueError as e:
+        logger.warning(f"Embedding provider unavailable: {e}")
+
+
+async def close_providers() -> None:
+    """Close cached provider singletons (called on application shutdown)."""
+    global _embedding_provider, _query_embedding_provider
+    
+    for provider in _chat_providers.values():
+        await provider.aclose()
+    _chat_providers.clear()
+    
+    if _embedding_provider is not None:
+        # The query provider wraps the same instance, so closing once suffices
+        await _embedding_provider.aclose()
+    
+    _embedding_provider = None
+    _query_embedding_provider = None
+
+
 class FallbackChatProvider(ChatProvider):
     """
     Chat provider with automatic fallback.
     Tries providers in order until one succeeds.
     """
     
+    name = "fallback"
+    
     def __init__(self, primary: str, fallback_chain: List[str]):
         self.providers = []
         
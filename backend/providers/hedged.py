@@ -0,0 +1,147 @@
+"""Hedged chat streaming: race the fallback chain on a slow first token."""
+import asyncio
+import logging
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple
+
+from providers.base import ChatProvider
+from utils import metrics
+from utils.request_context import RequestContext, context_with, current_request
+
+
+logger = logging.getLogger(__name__)
+
+# A started provider, its token stream and the request context it marks
+_Attempt = Tuple[ChatProvider, AsyncIterator[str], Optional[RequestContext]]
+
+
+class HedgedChatProvider(ChatProvider):
+    """
+    Streams from the first of several providers to produce a token.
+    
+    The primary is called first. If it has not produced a token within
+    `delay_ms`, the next provider is started as well, and so on up to
+    `max_providers` at once; a provider failing before its first token
+    starts the next one immediately. The first to produce a token wins and
+    is streamed; the others are cancelled, which closes their HTTP streams
+    and stops their generation upstream.
+    
+    Once a provider has streamed tokens it is not replaced, so a failure
+    mid-answer still propagates.
+    """
+    
+    def __init__(self, providers: List[ChatProvider], delay_ms: float, max_providers: int = 2):
+        """
+        Initialize provider.
+        
+        Args:
+            providers: Providers in preference order (primary first)
+            delay_ms: Time to wait for a first token before starting the next provider
+            max_providers: Providers racing at most (primary included)
+        """
+        if not providers:
+            raise ValueError("No chat providers available")
+        self.providers = providers
+        self.delay = delay_ms / 1000
+        self.max_providers = max(1, max_providers)
+        self.name = providers[0].name
+    
+    async def stream_chat(
+        self,
+        messages: List[dict],
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream chat completion tokens from the fastest provider."""
+        primary = self.providers[0].name
+        request_context = current_request()
+        pending: Dict[asyncio.Future, _Attempt] = {}
+        started = 0
+        last_error: Optional[Exception] = None
+        winner: Optional[_Attempt] = None
+        first_token: Optional[str] = None
+        
+        def start_next() -> None:
+            nonlocal started
+            provider = self.providers[started]
+            started += 1
+            stream = provider.stream_chat(messages, **kwargs)
+            # Each attempt marks its own stages (e.g. provider_connect) until
+            # it wins, so a losing provider can't overwrite the winner's
+            attempt = request_context.fork() if request_context is not None else None
+            task = asyncio.create_task(stream.__anext__(), context=context_with(attempt))
+            pending[task] = (provider, stream, attempt)
+        
+        try:
+            start_next()
+            while pending and winner is None:
+                can_hedge = started < min(len(self.providers), self.max_providers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                
+                if not done:
+                    # No first token within the delay: race the next provider
+                    logger.info(
+                        f"No first token from {', '.join(p.name for p, _, _ in pending.values())} "
+                        f"after {self.delay * 1000:.0f} ms; starting {self.providers[started].name}"
+                    )
+                    start_next()
+                    continue
+                
+                for task in done:
+                    provider, stream, attempt = pending.pop(task)
+                    try:
+                        first_token = task.result()
+                    except StopAsyncIteration:
+                        first_token = None  # Finished without any text
+                    except Exception as e:
+                        last_error = e
+                        metrics.PROVIDER_ERRORS.labels(provider.name, "chat").inc()
+                        logger.warning(f"Chat provider {provider.name} failed before its first token: {e}")
+                        continue
+                    winner = (provider, stream, attempt)
+                    break
+                
+                if winner is None and started < len(self.providers) and len(pending) < self.max_providers:
+                    # Fail over right away instead of waiting out the delay
+                    start_next()
+        finally:
+            # Cancelling a pending first-token fetch closes its HTTP stream
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, stream, _ in pending.values():
+                await stream.aclose()
+        
+        if winner is None:
+            raise last_error or ValueError("All chat providers failed")
+        
+        provider, stream, attempt = winner
+        if started > 1:
+            metrics.CHAT_HEDGES.labels(primary, provider.name).inc()
+        if request_context is not None:
+            request_context.provider = provider.name
+            for stage, at in attempt.marks.items():
+                request_context.mark(stage, at)
+        
+        if first_token is None:
+            return
+        
+        try:
+            yield first_token
+            async for token in stream:
+                yield token
+        except Exception:
+            metrics.PROVIDER_ERRORS.labels(provider.name, "chat").inc()
+            raise
+        finally:
+            await stream.aclose()
+    
+    async def chat(self, messages: List[dict], **kwargs) -> str:
+        """Non-streaming chat completion (hedged on the first token)."""
+        return "".join([token async for token in self.stream_chat(messages, **kwargs)])
+    
+    async def aclose(self) -> None:
+        """Providers are shared singletons, closed by the factory."""
+        pass
@@ -0,0 +1,44 @@
+"""Shared HTTP client construction for provider APIs."""
+import importlib.util
+import logging
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_http_client(
+    max_connections: int = 10,
+    timeout: float = 60.0,
+    http2: bool = False,
+    keepalive_expiry: float = 30.0,
+) -> httpx.AsyncClient:
+    """
+    Create a long-lived, connection-pooled client for a provider.
+    
+    Reusing one client keeps TCP/TLS connections alive between requests
+    instead of paying a handshake per call.
+    
+    Args:
+        max_connections: Pool size (requests beyond this wait for a connection)
+        timeout: Per-request timeout in seconds
+        http2: Negotiate HTTP/2 when the optional 'h2' package is installed
+        keepalive_expiry: Seconds an idle connection is kept open
+        
+    Returns:
+        httpx.AsyncClient (close it with aclose())
+    """
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        timeout=timeout,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+    )
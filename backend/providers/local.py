@@ -0,0 +1,110 @@
+"""Deterministic offline providers (no API keys or network), for benchmarks, CI and local development."""
+import asyncio
+import hashlib
+import re
+from functools import lru_cache
+from typing import AsyncGenerator, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from providers.base import ChatProvider, EmbeddingProvider
+
+
+# Words, and CJK characters one by one (CJK text has no spaces)
+_TOKEN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|\w+")
+
+# Canned answer tokens keep their trailing whitespace, like streamed LLM deltas
+_WORD = re.compile(r"\S+\s*")
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str, dimension: int) -> Tuple[int, float]:
+    """Stable (index, sign) of a token in the hashed feature space."""
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature-hashing embeddings: unigram and bigram counts of words (and CJK
+    characters) hashed into `dimension` signed buckets, L2-normalized.
+    
+    Deterministic across processes and machines, so identical texts always
+    get identical vectors, and texts sharing words get positive cosine
+    similarity -- enough for realistic retrieval in offline runs.
+    """
+    
+    model = "local-hashing"
+    
+    def __init__(self, dimension: Optional[int] = None):
+        self._dimension = dimension or settings.embedding_dimension
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text synchronously."""
+        vector = np.zeros(self._dimension, dtype=np.float32)
+        tokens = [token.lower() for token in _TOKEN.findall(text)]
+        
+        for token in tokens:
+            index, sign = _bucket(token, self._dimension)
+            vector[index] += sign
+        for first, second in zip(tokens, tokens[1:]):
+            index, sign = _bucket(f"{first} {second}", self._dimension)
+            vector[index] += 0.5 * sign
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Generate embeddings locally."""
+        return [self.embed_one(text) for text in texts]
+
+
+class LocalChatProvider(ChatProvider):
+    """
+    Chat provider that streams a canned answer at a fixed rate.
+    
+    Waits LOCAL_CHAT_FIRST_TOKEN_MS before the first token and then emits
+    LOCAL_CHAT_TOKENS_PER_SECOND tokens per second (0 = as fast as
+    possible), so latency-sensitive code paths can be measured without an
+    LLM.
+    """
+    
+    name = "local"
+    
+    def __init__(
+        self,
+        response: Optional[str] = None,
+        tokens_per_second: Optional[float] = None,
+        first_token_ms: Optional[float] = None,
+    ):
+        self.response = response if response is not None else settings.local_chat_response
+        self.tokens_per_second = (
+            settings.local_chat_tokens_per_second if tokens_per_second is None else tokens_per_second
+        )
+        self.first_token_ms = (
+            settings.local_chat_first_token_ms if first_token_ms is None else first_token_ms
+        )
+        self.tokens = _WORD.findall(self.response) or [self.response]
+    
+    async def stream_chat(
+        self,
+        messages: List[dict],
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream the canned answer token by token."""
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for i, token in enumerate(self.tokens):
+            if i and interval:
+                await asyncio.sleep(interval)
+            yield token
+    
+    async def chat(self, messages: List[dict], **kwargs) -> str:
+        """Return the canned answer after the simulated generation time."""
+        return "".join([token async for token in self.stream_chat(messages, **kwargs)])
@@ -0,0 +1,151 @@
+"""Shared base for OpenAI-compatible chat completion APIs."""
+import json
+from typing import AsyncGenerator, AsyncIterator, List, Optional
+
+import httpx
+
+from config import settings
+from providers.base import ChatProvider
+from providers.http import create_http_client
+from utils.request_context import mark
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    _json_loads = json.loads
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[bytes]:
+    """
+    Yield the payload of each 'data:' line of a server-sent event stream.
+    
+    Works on raw bytes split by newline, skipping text decoding and the
+    per-line overhead of aiter_lines().
+    
+    Args:
+        response: Streaming HTTP response
+        
+    Yields:
+        Raw payload bytes with surrounding whitespace removed
+    """
+    buffer = b""
+    
+    async for block in response.aiter_bytes():
+        buffer += block
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.startswith(b"data:"):
+                yield line[5:].strip()
+    
+    if buffer.startswith(b"data:"):
+        yield buffer[5:].strip()
+
+
+class OpenAICompatibleChatProvider(ChatProvider):
+    """
+    Chat provider for any /chat/completions endpoint that speaks the OpenAI
+    protocol (DeepSeek, Qwen compatible mode, Zhipu GLM).
+    
+    Each instance owns one pooled keep-alive client (HTTP/2 when available),
+    so instances are meant to be cached and reused; see providers.factory.
+    """
+    
+    def __init__(self, api_key: str, base_url: str, model: str, api_key_env: str):
+        """
+        Initialize provider.
+        
+        Args:
+            api_key: Bearer token for the API
+            base_url: API base URL (without /chat/completions)
+            model: Model name sent with each request
+            api_key_env: Setting name reported when the key is missing
+            
+        Raises:
+            ValueError: If the API key is not configured
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        
+        if not self.api_key:
+            raise ValueError(f"{api_key_env} not configured")
+        
+        self.url = f"{self.base_url}/chat/completions"
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        # Created with the provider (at startup, see init_providers) so the
+        # first request doesn't pay for building the pool
+        self._client: Optional[httpx.AsyncClient] = self._create_client()
+    
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        return create_http_client(
+            max_connections=settings.chat_max_connections,
+            http2=settings.chat_http2,
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client (re-created if it was closed)."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    def _payload(self, messages: List[dict], stream: bool, **kwargs) -> dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "temperature": kwargs.get("temperature", 0.7),
+            "max_tokens": kwargs.get("max_tokens", 2048),
+        }
+    
+    async def stream_chat(
+        self, 
+        messages: List[dict],
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream chat completion tokens."""
+        payload = self._payload(messages, stream=True, **kwargs)
+        
+        async with self.client.stream(
+            "POST", self.url, headers=self.headers, json=payload
+        ) as response:
+            response.raise_for_status()
+            mark("provider_connect")
+            
+            async for data in iter_sse_data(response):
+                if data == b"[DONE]":
+                    break
+                
+                # Role-only and finish frames carry no text; skip decoding them
+                if b'"content"' not in data:
+                    continue
+                
+                try:
+                    chunk = _json_loads(data)
+                except ValueError:
+                    continue
+                
+                choices = chunk.get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+    
+    async def chat(self, messages: List[dict], **kwargs) -> str:
+        """Non-streaming chat completion."""
+        payload = self._payload(messages, stream=False, **kwargs)
+        
+        response = await self.client.post(self.url, headers=self.headers, json=payload)
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        return data["choices"][0]["message"]["content"]
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
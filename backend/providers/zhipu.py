@@ -1,128 +1,119 @@
 """Zhipu AI provider implementation (Chat + Embedding)."""
-import json
-from typing import List, AsyncGenerator
+import asyncio
+from typing import List, Optional
 
 import httpx
 
 from config import settings
-from providers.base import ChatProvider, EmbeddingProvider
+from providers.base import EmbeddingProvider
+from providers.http import create_http_client
+from providers.openai_compat import OpenAICompatibleChatProvider
 
 
-class ZhipuChatProvider(ChatProvider):
+class ZhipuChatProvider(OpenAICompatibleChatProvider):
     """Zhipu AI chat provider (GLM models)."""
     
-    def __init__(self):
-        self.api_key = settings.zhipu_api_key
-        self.base_url = settings.zhipu_base_url
-        self.model = settings.zhipu_chat_model
-        
-        if not self.api_key:
-            raise ValueError("ZHIPU_API_KEY not configured")
-    
-    async def stream_chat(
-        self, 
-        messages: List[dict],
-        **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """Stream chat completion from Zhipu API."""
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": True,
-            "temperature": kwargs.get("temperature", 0.7),
-            "max_tokens": kwargs.get("max_tokens", 2048),
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream("POST", url, headers=headers, json=payload) as response:
-                response.raise_for_status()
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-                        
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                yield content
-                        except json.JSONDecodeError:
-                            continue
+    name = "zhipu"
     
-    async def chat(self, messages: List[dict], **kwargs) -> str:
-        """Non-streaming chat completion."""
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-            "temperature": kwargs.get("temperature", 0.7),
-            "max_tokens": kwargs.get("max_tokens", 2048),
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+    def __init__(self):
+        super().__init__(
+            api_key=settings.zhipu_api_key,
+            base_url=settings.zhipu_base_url,
+            model=settings.zhipu_chat_model,
+            api_key_env="ZHIPU_API_KEY",
+        )
 
 
 class ZhipuEmbeddingProvider(EmbeddingProvider):
-    """Zhipu AI embedding provider (embedding-3 model)."""
+    """
+    Zhipu AI embedding provider (embedding-3 model).
+    
+    Requests go through one long-lived pooled client, and the batches of a
+    large embed() call are sent concurrently (bounded by
+    EMBEDDING_CONCURRENCY) instead of one after another.
+    """
     
     def __init__(self):
         self.api_key = settings.zhipu_api_key
         self.base_url = settings.zhipu_base_url
         self.model = settings.zhipu_embedding_model
         self._dimension = settings.embedding_dimension
+        self.batch_size = max(1, settings.embedding_batch_size)
+        self.concurrency = max(1, settings.embedding_concurrency)
         
         if not self.api_key:
             raise ValueError("ZHIPU_API_KEY not configured")
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client(
+                max_connections=self.concurrency,
+                http2=settings.embedding_http2,
+            )
+        return self._client
     
     async def embed(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings using Zhipu embedding-3 model."""
+        if self._semaphore is None:
+            # Shared across calls so concurrent documents respect one limit
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        
+        # Process in batches to avoid API limits
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        tasks = [asyncio.create_task(self._embed_batch(b)) for b in batches]
+        
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave the other batch requests running after a failure
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        # gather() preserves batch order
+        return [embedding for batch in results for embedding in batch]
+    
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch, returning vectors in input order."""
         url = f"{self.base_url}/embeddings"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        payload = {
+            "model": self.model,
+            "input": batch,
+        }
         
-        embeddings = []
-        
-        # Process in batches to avoid API limits
-        batch_size = 25
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            payload = {
-                "model": self.model,
-                "input": batch,
-            }
-            
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extract embeddings from response
-                for item in data.get("data", []):
-                    embeddings.append(item["embedding"])
+        async with self._semaphore:
+            response = await self.client.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+            data = response.json()
         
-        return embeddings
+        # Extract embeddings from response, ordered by their input index
+        items = sorted(data.get("data", []), key=lambda item: item.get("index", 0))
+        if len(items) != len(batch):
+            raise ValueError(
+                f"Embedding API returned {len(items)} vectors for {len(batch)} inputs"
+            )
+        return [item["embedding"] for item in items]
     
     @property
     def dimension(self) -> int:
         """Return embedding dimension (1024 for embedding-3)."""
         return self._dimension
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,5 +1,8 @@
 """Chat router with SSE streaming."""
 import json
+import logging
+import time
+import uuid
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -10,11 +13,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.kb import KnowledgeBase
 from models.user import User
+from config import settings
+from providers.factory import get_chat_provider
 from schemas.chat import ChatRequest
+from services.answer_cache import answer_cache
 from services.auth_service import get_current_user
 from services.rag_service import RAGService
+from utils import metrics
+from utils.request_context import RequestContext, current_request
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 def format_sse_event(event_type: str, data: dict) -> str:
@@ -35,9 +44,17 @@ async def chat_stream(
     SSE Events:
     - **token**: `{"token": "xxx"}` - Individual token from LLM
     - **citations**: `{"citations": [...]}` - Retrieved source citations
+    - **timing**: stage timing breakdown, only with `include_timing`; sent
+      just before `done` or `error`
     - **done**: `{}` - Stream completed
-    - **error**: `{"message": "xxx", "code": "xxx"}` - Error occurred
+    - **error**: `{"message": "xxx", "code": "xxx", "request_id": "xxx"}` - Error occurred
+    
+    Answers to semantically equivalent questions are replayed from the
+    answer cache over the same events until the KB's documents change
+    (not for requests overriding the retrieval weights).
     """
+    request_context = current_request() or RequestContext(uuid.uuid4().hex)
+    
     # Verify KB ownership
     kb_result = await db.execute(
         select(KnowledgeBase)
@@ -53,51 +70,131 @@ async def chat_stream(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"error_code": "KB_NOT_FOUND", "message": "Knowledge base not found"}
         )
+    request_context.mark("auth")
+    
+    answer_parts = []
+    
+    def finish(outcome: str, final_event: str) -> str:
+        """Record the request and close the stream (timing event first, if requested)."""
+        metrics.CHAT_REQUESTS.labels(request_context.provider, outcome).inc()
+        timing = request_context.timing()
+        logger.info(
+            f"Chat request {request_context.request_id} {outcome} by {request_context.provider} "
+            f"in {timing['total_ms']} ms: {timing['durations_ms']}"
+        )
+        if not request.include_timing:
+            return final_event
+        timing.update(outcome=outcome, tokens=len(answer_parts))
+        return format_sse_event("timing", timing) + final_event
     
     async def generate_response():
         """Generate SSE stream."""
+        request_context.provider = request.chat_provider or settings.default_chat_provider
+        
         try:
+            # Resolve the provider up front so every metric is labelled by
+            # the one that serves the answer (after any fallback)
+            request_context.provider = provider_name = get_chat_provider(request.chat_provider).name
             rag_service = RAGService(db)
+            query_embedding = await rag_service.embed_query(request.message)
+            metrics.CHAT_EMBED_SECONDS.labels(provider_name).observe(
+                request_context.mark("embedding") - request_context.marks["auth"]
+            )
+            
+            # Replay a cached answer to an equivalent question; cached answers
+            # come from default-weight retrieval, so overrides bypass the cache
+            use_answer_cache = (
+                settings.answer_cache_enabled
+                and request.vector_weight is None
+                and request.lexical_weight is None
+            )
+            if use_answer_cache:
+                cached = answer_cache.lookup(kb_id, kb.generation, query_embedding, provider_name)
+                if cached:
+                    yield format_sse_event("citations", {"citations": cached.citations})
+                    yield format_sse_event("token", {"token": cached.answer})
+                    answer_parts.append(cached.answer)
+                    yield finish("cached", format_sse_event("done", {}))
+                    return
             
             # Retrieve relevant chunks
             chunks_with_scores = await rag_service.retrieve_relevant_chunks(
                 kb_id=kb_id,
                 query=request.message,
-                top_k=5
+                top_k=5,
+                query_embedding=query_embedding,
+                vector_weight=request.vector_weight,
+                lexical_weight=request.lexical_weight,
+            )
+            metrics.CHAT_RETRIEVAL_SECONDS.labels(provider_name).observe(
+                request_context.mark("retrieval") - request_context.marks["embedding"]
             )
             
             if not chunks_with_scores:
                 # No relevant content found
                 yield format_sse_event("token", {"token": "I couldn't find any relevant information in the knowledge base to answer your question."})
                 yield format_sse_event("citations", {"citations": []})
-                yield format_sse_event("done", {})
+                yield finish("no_context", format_sse_event("done", {}))
                 return
             
-            # Build context and citations
-            context = rag_service.build_context(chunks_with_scores)
-            citations = rag_service.create_citations(chunks_with_scores)
+            # Pack context within the provider's token budget; citations
+            # follow the packed sources so [Source N] numbering matches
+            packed = rag_service.pack_context(chunks_with_scores, provider_name)
+            context = packed.text
+            citations = rag_service.create_citations(packed.results)
+            request_context.mark("context")
             
             # Send citations early so frontend can display them
             citations_data = [c.model_dump(mode="json") for c in citations]
             yield format_sse_event("citations", {"citations": citations_data})
             
-            # Stream LLM response
+            # Stream LLM response; the loop only takes timestamps
+            provider_started = time.perf_counter()
+            first_token_at = last_token_at = None
             async for token in rag_service.generate_answer_stream(
                 query=request.message,
                 context=context,
-                chat_provider=request.chat_provider,
+                chat_provider=provider_name,
             ):
+                last_token_at = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = last_token_at
+                answer_parts.append(token)
                 yield format_sse_event("token", {"token": token})
             
+            if first_token_at is not None:
+                request_context.mark("first_token", first_token_at)
+                request_context.mark("last_token", last_token_at)
+            metrics.observe_chat_stream(
+                request_context.provider,
+                provider_started,
+                first_token_at,
+                last_token_at or time.perf_counter(),
+                len(answer_parts),
+                request_context.started,
+            )
+            
+            if use_answer_cache:
+                answer_cache.store(
+                    kb_id,
+                    kb.generation,
+                    query_embedding,
+                    "".join(answer_parts),
+                    citations_data,
+                    provider_name,
+                )
+            
             # Done
-            yield format_sse_event("done", {})
+            yield finish("answered", format_sse_event("done", {}))
             
         except Exception as e:
+            logger.warning(f"Chat request {request_context.request_id} failed: {e}")
             # Send error event
-            yield format_sse_event("error", {
+            yield finish("error", format_sse_event("error", {
                 "message": str(e),
-                "code": "GENERATION_ERROR"
-            })
+                "code": "GENERATION_ERROR",
+                "request_id": request_context.request_id,
+            }))
     
     return StreamingResponse(
         generate_response(),
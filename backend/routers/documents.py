@@ -1,6 +1,9 @@
 """Documents router."""
 import os
-from typing import List
+import uuid
+import asyncio
+import logging
+from typing import List, Tuple
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
@@ -11,26 +14,90 @@ from config import settings
 from database import get_db, async_session_maker
 from models.kb import KnowledgeBase
 from models.document import Document, DocumentStatus
+from models.job import IngestionJob, JobKind, JobStatus
 from models.user import User
 from schemas.document import DocumentResponse
 from services.auth_service import get_current_user
-from services.document_service import DocumentService
+from services.document_service import DocumentService, try_replacement_lock
+from services.job_queue import enqueue_ingestion
+from utils.upload import save_upload, UploadTooLargeError
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {".pdf", ".md", ".txt"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 
 async def process_document_background(document_id: UUID):
-    """Background task to process a document."""
+    """Background task to process a document (INGESTION_MODE=background)."""
     async with async_session_maker() as db:
         service = DocumentService(db)
         try:
             await service.process_document(document_id)
         except Exception as e:
-            print(f"Error processing document {document_id}: {e}")
+            logger.error(f"Error processing document {document_id}: {e}")
+
+
+async def replace_document_background(document_id: UUID, new_file: dict):
+    """Background task to re-index a document from a new file (INGESTION_MODE=background)."""
+    async with async_session_maker() as db:
+        service = DocumentService(db)
+        try:
+            await service.replace_document(document_id, new_file)
+        except Exception as e:
+            logger.error(f"Error replacing document {document_id}: {e}")
+            await _remove_files([new_file["path"]])
+
+
+async def _remove_files(paths: List[str]) -> None:
+    """Remove stored upload files, ignoring ones already gone."""
+    for path in paths:
+        try:
+            await asyncio.to_thread(os.remove, path)
+        except FileNotFoundError:
+            pass
+
+
+async def _store_upload(file: UploadFile, kb_upload_dir: str) -> Tuple[str, str, int, str]:
+    """
+    Validate an uploaded file's type and stream it to the KB's upload directory.
+    
+    Returns:
+        Tuple of (extension, stored path, size in bytes, SHA-256 hex)
+    """
+    _, ext = os.path.splitext(file.filename)
+    ext = ext.lower()
+    
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "INVALID_FILE_TYPE",
+                "message": f"File type {ext} not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}",
+            }
+        )
+    
+    # Generate unique filename and stream the upload to disk
+    file_path = os.path.join(kb_upload_dir, f"{uuid.uuid4()}{ext}")
+    
+    try:
+        file_size, content_hash = await save_upload(
+            file,
+            file_path,
+            max_size=settings.max_upload_size_mb * 1024 * 1024,
+            chunk_size=settings.upload_chunk_size,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "FILE_TOO_LARGE",
+                "message": str(e),
+            }
+        )
+    
+    return ext, file_path, file_size, content_hash
 
 
 @router.get("/{kb_id}/documents", response_model=List[DocumentResponse])
@@ -77,7 +144,7 @@ async def upload_documents(
     Upload documents to a knowledge base.
     
     Accepts multiple files: PDF, Markdown (.md), or Text (.txt).
-    Documents will be processed asynchronously.
+    Documents will be processed asynchronously (by worker.py in queue mode).
     """
     # Verify KB ownership
     kb_result = await db.execute(
@@ -98,60 +165,213 @@ async def upload_documents(
     os.makedirs(kb_upload_dir, exist_ok=True)
     
     uploaded_documents = []
+    saved_paths = []
     
-    for file in files:
-        # Validate file extension
-        _, ext = os.path.splitext(file.filename)
-        ext = ext.lower()
-        
-        if ext not in ALLOWED_EXTENSIONS:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error_code": "INVALID_FILE_TYPE",
-                    "message": f"File type {ext} not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}",
-                }
+    try:
+        for file in files:
+            ext, file_path, file_size, content_hash = await _store_upload(file, kb_upload_dir)
+            saved_paths.append(file_path)
+            
+            # Create document record
+            document = Document(
+                kb_id=kb_id,
+                filename=file.filename,
+                path=file_path,
+                file_type=ext[1:],  # Remove the dot
+                size=file_size,
+                content_hash=content_hash,
+                status=DocumentStatus.PROCESSING,
             )
-        
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error_code": "FILE_TOO_LARGE",
-                    "message": f"File {file.filename} exceeds maximum size of 10MB",
-                }
-            )
-        
-        # Generate unique filename and save
-        import uuid
-        unique_filename = f"{uuid.uuid4()}{ext}"
-        file_path = os.path.join(kb_upload_dir, unique_filename)
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Create document record
-        document = Document(
-            kb_id=kb_id,
-            filename=file.filename,
-            path=file_path,
-            file_type=ext[1:],  # Remove the dot
-            size=file_size,
-            status=DocumentStatus.PROCESSING,
-        )
-        db.add(document)
-        await db.flush()
-        await db.refresh(document)
-        
-        uploaded_documents.append(document)
-        
-        # Schedule background processing
-        background_tasks.add_task(process_document_background, document.id)
+            db.add(document)
+            await db.flush()
+            await db.refresh(document)
+            
+            uploaded_documents.append(document)
+            
+            # Schedule processing: durable job for the worker, or in-process task
+            if settings.ingestion_mode == "queue":
+                enqueue_ingestion(db, document.id)
+            else:
+                background_tasks.add_task(process_document_background, document.id)
+    except Exception:
+        # Nothing is committed; don't leave earlier files of the batch behind
+        await _remove_files(saved_paths)
+        raise
     
     await db.commit()
     
     return uploaded_documents
+
+
+@router.put(
+    "/{kb_id}/documents/{doc_id}",
+    response_model=DocumentResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def replace_document(
+    kb_id: UUID,
+    doc_id: UUID,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Replace a document with a new version of its file.
+    
+    A ready document keeps serving its current version while the new one is
+    indexed; only chunks whose text changed are embedded, and the versions
+    are swapped atomically. A failed document is simply re-ingested.
+    Uploading identical contents is a no-op.
+    """
+    # Verify KB ownership
+    kb_result = await db.execute(
+        select(KnowledgeBase)
+        .where(
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.owner_id == current_user.id
+        )
+    )
+    if not kb_result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error_code": "KB_NOT_FOUND", "message": "Knowledge base not found"}
+        )
+    
+    # Lock the document so concurrent replacements are checked one at a time
+    result = await db.execute(
+        select(Document)
+        .where(
+            Document.id == doc_id,
+            Document.kb_id == kb_id
+        )
+        .with_for_update()
+    )
+    document = result.scalar_one_or_none()
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error_code": "DOCUMENT_NOT_FOUND", "message": "Document not found"}
+        )
+    
+    pending = await db.execute(
+        select(IngestionJob.id)
+        .where(
+            IngestionJob.doc_id == doc_id,
+            IngestionJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        )
+        .limit(1)
+    )
+    # The lock check covers a replacement already running without a job row
+    # (INGESTION_MODE=background); it is held until this request commits
+    if (
+        document.status == DocumentStatus.PROCESSING
+        or pending.first() is not None
+        or not await try_replacement_lock(db, doc_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "error_code": "DOCUMENT_BUSY",
+                "message": "Document is still being processed; try again when it is ready",
+            }
+        )
+    
+    kb_upload_dir = os.path.join(settings.upload_dir, str(kb_id))
+    os.makedirs(kb_upload_dir, exist_ok=True)
+    ext, file_path, file_size, content_hash = await _store_upload(file, kb_upload_dir)
+    
+    if (
+        document.status == DocumentStatus.READY
+        and content_hash == document.content_hash
+        and ext[1:] == document.file_type
+    ):
+        await _remove_files([file_path])
+        return document
+    
+    new_file = {
+        "path": file_path,
+        "filename": file.filename,
+        "file_type": ext[1:],
+        "size": file_size,
+        "content_hash": content_hash,
+    }
+    
+    old_path = None
+    try:
+        if document.status == DocumentStatus.READY:
+            if settings.ingestion_mode == "queue":
+                enqueue_ingestion(db, doc_id, kind=JobKind.REPLACE, payload=new_file)
+            else:
+                background_tasks.add_task(replace_document_background, doc_id, new_file)
+            await db.commit()
+        else:
+            # Failed document: nothing to keep, ingest the new file from scratch
+            old_path = document.path
+            document.filename = new_file["filename"]
+            document.path = new_file["path"]
+            document.file_type = new_file["file_type"]
+            document.size = new_file["size"]
+            document.content_hash = new_file["content_hash"]
+            document.status = DocumentStatus.PROCESSING
+            document.error_message = None
+            
+            if settings.ingestion_mode == "queue":
+                enqueue_ingestion(db, doc_id)
+            else:
+                background_tasks.add_task(process_document_background, doc_id)
+            await db.commit()
+    except Exception:
+        await _remove_files([file_path])
+        raise
+    
+    if old_path:
+        await _remove_files([old_path])
+    
+    await db.refresh(document)
+    return document
+
+
+@router.delete("/{kb_id}/documents/{doc_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    kb_id: UUID,
+    doc_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Delete a document and its chunks from a knowledge base.
+    """
+    # Verify KB ownership
+    kb_result = await db.execute(
+        select(KnowledgeBase)
+        .where(
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.owner_id == current_user.id
+        )
+    )
+    if not kb_result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error_code": "KB_NOT_FOUND", "message": "Knowledge base not found"}
+        )
+    
+    result = await db.execute(
+        select(Document)
+        .where(
+            Document.id == doc_id,
+            Document.kb_id == kb_id
+        )
+    )
+    document = result.scalar_one_or_none()
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error_code": "DOCUMENT_NOT_FOUND", "message": "Document not found"}
+        )
+    
+    await DocumentService(db).delete_document(document)
+    
+    return None
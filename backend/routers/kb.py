@@ -9,8 +9,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.kb import KnowledgeBase
 from models.user import User
-from schemas.kb import KBCreate, KBResponse
+from schemas.kb import (
+    KBCreate,
+    KBResponse,
+    BatchRetrieveRequest,
+    QueryCitations,
+    BatchRetrieveResponse,
+)
 from services.auth_service import get_current_user
+from services.rag_service import RAGService
+from vector_stores.factory import get_vector_store
 
 router = APIRouter()
 
@@ -85,6 +93,47 @@ async def get_knowledge_base(
     return kb
 
 
+@router.post("/{kb_id}/retrieve", response_model=BatchRetrieveResponse)
+async def batch_retrieve(
+    kb_id: UUID,
+    request: BatchRetrieveRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Retrieve citations for many queries against a knowledge base.
+    
+    All queries are embedded in one provider call and searched by vector
+    similarity in a single SQL statement.
+    
+    - **queries**: Questions to retrieve for (up to 100)
+    - **top_k**: Citations per query
+    """
+    result = await db.execute(
+        select(KnowledgeBase)
+        .where(
+            KnowledgeBase.id == kb_id,
+            KnowledgeBase.owner_id == current_user.id
+        )
+    )
+    if not result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error_code": "KB_NOT_FOUND",
+                "message": "Knowledge base not found",
+            }
+        )
+    
+    rag_service = RAGService(db)
+    results = await rag_service.retrieve_many(kb_id, request.queries, top_k=request.top_k)
+    
+    return BatchRetrieveResponse(results=[
+        QueryCitations(query=query, citations=rag_service.create_citations(chunks_with_scores))
+        for query, chunks_with_scores in zip(request.queries, results)
+    ])
+
+
 @router.delete("/{kb_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_knowledge_base(
     kb_id: UUID,
@@ -116,5 +165,6 @@ async def delete_knowledge_base(
     # Delete (cascade will handle documents, chunks, conversations)
     await db.delete(kb)
     await db.commit()
+    await get_vector_store().drop(kb_id)
     
     return None
@@ -8,6 +8,9 @@ from schemas.auth import (
 from schemas.kb import (
     KBCreate,
     KBResponse,
+    BatchRetrieveRequest,
+    QueryCitations,
+    BatchRetrieveResponse,
 )
 from schemas.document import (
     DocumentResponse,
@@ -27,6 +30,9 @@ __all__ = [
     "UserResponse",
     "KBCreate",
     "KBResponse",
+    "BatchRetrieveRequest",
+    "QueryCitations",
+    "BatchRetrieveResponse",
     "DocumentResponse",
     "ChatRequest",
     "Citation",
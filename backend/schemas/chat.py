@@ -10,7 +10,10 @@ class Citation(BaseModel):
     filename: str = Field(..., description="Original filename")
     chunk_id: UUID = Field(..., description="Chunk ID")
     text: str = Field(..., description="Chunk text content")
-    score: Optional[float] = Field(None, description="Similarity score")
+    score: Optional[float] = Field(
+        None,
+        description="Relevance score (reciprocal rank fusion score for hybrid retrieval, else cosine similarity)"
+    )
     page_number: Optional[int] = Field(None, description="Page number (PDF)")
     line_range: Optional[str] = Field(None, description="Line range (MD/TXT)")
     
@@ -29,6 +32,20 @@ class ChatRequest(BaseModel):
         None, 
         description="Existing conversation ID to continue"
     )
+    vector_weight: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Rank fusion weight of vector retrieval (default from settings)"
+    )
+    lexical_weight: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Rank fusion weight of lexical retrieval, 0 for vector only (default from settings)"
+    )
+    include_timing: bool = Field(
+        False,
+        description="Send a 'timing' event with the stage timing breakdown before the stream ends"
+    )
 
 
 class MessageResponse(BaseModel):
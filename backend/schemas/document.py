@@ -21,6 +21,7 @@ class DocumentResponse(BaseModel):
     path: Optional[str] = None
     file_type: Optional[str] = None
     size: Optional[int] = None
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the uploaded file")
     status: DocumentStatus
     created_at: datetime
     
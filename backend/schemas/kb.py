@@ -1,9 +1,11 @@
 """Knowledge Base schemas."""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
 
+from schemas.chat import Citation
+
 
 class KBCreate(BaseModel):
     """Knowledge base creation request."""
@@ -22,3 +24,20 @@ class KBResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class BatchRetrieveRequest(BaseModel):
+    """Batch retrieval request."""
+    queries: List[str] = Field(..., min_length=1, max_length=100, description="Queries to retrieve for")
+    top_k: int = Field(5, ge=1, le=50, description="Citations per query")
+
+
+class QueryCitations(BaseModel):
+    """Citations retrieved for one query."""
+    query: str
+    citations: List[Citation]
+
+
+class BatchRetrieveResponse(BaseModel):
+    """Batch retrieval response, one entry per query in request order."""
+    results: List[QueryCitations]
@@ -2,10 +2,13 @@
 from services.auth_service import AuthService, get_current_user
 from services.document_service import DocumentService
 from services.rag_service import RAGService
+from services.ingestion_pipeline import IngestionPipeline, PipelineStats
 
 __all__ = [
     "AuthService",
     "get_current_user",
     "DocumentService",
     "RAGService",
+    "IngestionPipeline",
+    "PipelineStats",
 ]
@@ -0,0 +1,173 @@
+"""Semantic answer cache for RAG chat."""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+from config import settings
+
+
+@dataclass
+class CachedAnswer:
+    """A completed answer and the citations it was generated from."""
+    answer: str
+    citations: List[dict]
+    provider: str  # Chat provider the answer was generated for
+    embedding: np.ndarray  # L2-normalized query embedding
+    expires_at: float
+    last_used: float
+
+
+@dataclass
+class _KBAnswers:
+    """Cached answers for one knowledge base at one generation."""
+    generation: int
+    entries: List[CachedAnswer] = field(default_factory=list)
+    matrix: Optional[np.ndarray] = None  # Stacked embeddings, rebuilt lazily
+
+
+class AnswerCache:
+    """
+    In-process cache of final answers per knowledge base.
+    
+    A lookup hits when a cached query embedding has cosine similarity above
+    the threshold and the answer was generated for the same chat provider,
+    so a request for one provider never replays another's answer. Entries
+    are tied to the KB's generation counter, which is bumped whenever a
+    document becomes ready or is deleted, so any change to the KB's content
+    invalidates its cached answers in every worker.
+    """
+    
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries_per_kb: int = 256,
+        ttl_seconds: float = 3600,
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            max_entries_per_kb: Maximum answers kept per KB (LRU eviction)
+            ttl_seconds: Time after which an answer is regenerated
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_kb = max_entries_per_kb
+        self.ttl_seconds = ttl_seconds
+        self._kbs: Dict[UUID, _KBAnswers] = {}
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _bucket(self, kb_id: UUID, generation: int) -> _KBAnswers:
+        """Return the KB's bucket, emptying it if it belongs to an older generation."""
+        bucket = self._kbs.get(kb_id)
+        if bucket is None:
+            bucket = self._kbs[kb_id] = _KBAnswers(generation=generation)
+        elif bucket.generation < generation:
+            bucket.generation = generation
+            bucket.entries = []
+            bucket.matrix = None
+        return bucket
+    
+    def lookup(
+        self,
+        kb_id: UUID,
+        generation: int,
+        embedding,
+        provider: str,
+    ) -> Optional[CachedAnswer]:
+        """Find a cached answer for a semantically equivalent query to the same provider."""
+        bucket = self._bucket(kb_id, generation)
+        if bucket.generation != generation or not bucket.entries:
+            self.misses += 1
+            return None
+        
+        now = time.monotonic()
+        live = [entry for entry in bucket.entries if entry.expires_at > now]
+        if len(live) != len(bucket.entries):
+            bucket.entries = live
+            bucket.matrix = None
+            if not live:
+                self.misses += 1
+                return None
+        
+        if bucket.matrix is None:
+            bucket.matrix = np.vstack([entry.embedding for entry in bucket.entries])
+        
+        similarities = bucket.matrix @ self._normalize(embedding)
+        for i, entry in enumerate(bucket.entries):
+            if entry.provider != provider:
+                similarities[i] = -np.inf
+        best = int(np.argmax(similarities))
+        
+        if similarities[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+        
+        entry = bucket.entries[best]
+        entry.last_used = now
+        self.hits += 1
+        return entry
+    
+    def store(
+        self,
+        kb_id: UUID,
+        generation: int,
+        embedding,
+        answer: str,
+        citations: List[dict],
+        provider: str,
+    ) -> None:
+        """Cache a completed answer generated for a provider at the given KB generation."""
+        bucket = self._bucket(kb_id, generation)
+        if bucket.generation > generation:
+            # Generated from content that has since changed
+            return
+        
+        now = time.monotonic()
+        bucket.entries.append(CachedAnswer(
+            answer=answer,
+            citations=citations,
+            provider=provider,
+            embedding=self._normalize(embedding),
+            expires_at=now + self.ttl_seconds,
+            last_used=now,
+        ))
+        
+        if len(bucket.entries) > self.max_entries_per_kb:
+            oldest = min(range(len(bucket.entries)), key=lambda i: bucket.entries[i].last_used)
+            bucket.entries.pop(oldest)
+        bucket.matrix = None
+    
+    def invalidate(self, kb_id: UUID) -> None:
+        """Drop every cached answer for a knowledge base."""
+        self._kbs.pop(kb_id, None)
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "knowledge_bases": len(self._kbs),
+            "entries": sum(len(bucket.entries) for bucket in self._kbs.values()),
+        }
+
+
+# Shared per-process instance
+answer_cache = AnswerCache(
+    similarity_threshold=settings.answer_cache_similarity_threshold,
+    max_entries_per_kb=settings.answer_cache_max_entries_per_kb,
+    ttl_seconds=settings.answer_cache_ttl,
+)
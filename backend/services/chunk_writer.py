@@ -0,0 +1,91 @@
+"""Bulk chunk insertion via PostgreSQL COPY."""
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.document import Chunk
+
+
+# Columns a chunk row may carry; id and created_at come from server defaults
+CHUNK_COPY_COLUMNS = (
+    "doc_id",
+    "kb_id",
+    "is_visible",
+    "content",
+    "content_hash",
+    "embedding",
+    "embedding_model",
+    "page_number",
+    "line_start",
+    "line_end",
+    "chunk_index",
+)
+
+
+def hash_text(text: str) -> str:
+    """Content hash of a chunk text (SHA-256 hex, matches the migration backfill)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def copy_chunks(
+    db: AsyncSession,
+    rows: Sequence[Dict],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Insert chunk rows with binary COPY inside the session's transaction.
+    
+    Rows are dicts keyed by CHUNK_COPY_COLUMNS (missing keys become NULL,
+    except is_visible which defaults to False and content_hash which is
+    computed from content). Embeddings are bound through
+    the registered binary pgvector codec, so float32 NumPy arrays are sent
+    as-is. Nothing is committed here.
+    
+    Args:
+        db: Session whose connection and transaction are used
+        rows: Chunk rows to insert
+        batch_size: Rows per COPY call (defaults to INGEST_INSERT_BATCH_SIZE)
+    
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+    
+    batch_size = max(1, batch_size or settings.ingest_insert_batch_size)
+    connection = await db.connection()
+    
+    # The asyncpg adapter issues BEGIN lazily on the first statement; run one
+    # so the COPY joins the session transaction instead of autocommitting
+    await connection.execute(text("SELECT 1"))
+    
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    
+    for start in range(0, len(rows), batch_size):
+        records: List[tuple] = [
+            (
+                row["doc_id"],
+                row["kb_id"],
+                row.get("is_visible", False),
+                row["content"],
+                row.get("content_hash") or hash_text(row["content"]),
+                row.get("embedding"),
+                row.get("embedding_model"),
+                row.get("page_number"),
+                row.get("line_start"),
+                row.get("line_end"),
+                row.get("chunk_index", 0),
+            )
+            for row in rows[start:start + batch_size]
+        ]
+        await driver_connection.copy_records_to_table(
+            Chunk.__tablename__,
+            records=records,
+            columns=CHUNK_COPY_COLUMNS,
+        )
+    
+    return len(rows)
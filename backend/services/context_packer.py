@@ -0,0 +1,231 @@
+"""Token-budgeted assembly of retrieved chunks into an LLM context."""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from models.document import Chunk, Document
+
+
+# Characters that tokenizers encode as roughly one token each (CJK
+# ideographs, kana, hangul, full-width forms); other text averages about
+# four characters per token.
+_CJK = re.compile(
+    "[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    "\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+CHARS_PER_TOKEN = 4
+
+# Shortest suffix/prefix match treated as chunker overlap rather than chance
+MIN_OVERLAP_CHARS = 8
+
+SOURCE_SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without a tokenizer.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Approximate number of tokens
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + -(-(len(text) - cjk) // CHARS_PER_TOKEN)
+
+
+def token_budget_for(provider_name: Optional[str]) -> int:
+    """
+    Context token budget for a chat provider.
+    
+    CONTEXT_TOKEN_BUDGETS overrides CONTEXT_TOKEN_BUDGET per provider, as
+    comma-separated name:tokens pairs (e.g. "deepseek:8000,zhipu:4000").
+    """
+    name = (provider_name or settings.default_chat_provider).strip().lower()
+    
+    for entry in settings.context_token_budgets.split(","):
+        key, _, value = entry.partition(":")
+        if key.strip().lower() == name and value.strip():
+            return int(value)
+    
+    return settings.context_token_budget
+
+
+@dataclass
+class PackedContext:
+    """Packed context text with the sources it cites and packing statistics."""
+    text: str = ""
+    # (chunk, document, score) per source, in "Source N" order; merged
+    # sources are transient Chunk objects spanning their members
+    results: List[Tuple[Chunk, Document, float]] = field(default_factory=list)
+    budget: int = 0
+    tokens_packed: int = 0
+    tokens_dropped: int = 0
+    chunks_packed: int = 0
+    chunks_merged: int = 0  # Chunks folded into a neighbouring chunk's source
+    chunks_dropped: int = 0
+    overlap_chars_removed: int = 0
+    truncated: bool = False  # The first source was cut to fit the budget
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "sources": len(self.results),
+            "tokens_packed": self.tokens_packed,
+            "tokens_dropped": self.tokens_dropped,
+            "chunks_packed": self.chunks_packed,
+            "chunks_merged": self.chunks_merged,
+            "chunks_dropped": self.chunks_dropped,
+            "overlap_chars_removed": self.overlap_chars_removed,
+            "truncated": self.truncated,
+        }
+
+
+@dataclass
+class _Source:
+    """Consecutive chunks of one document, merged into a single source."""
+    doc: Document
+    chunks: List[Chunk]
+    score: float
+    rank: int  # Best retrieval rank among the chunks
+    text: str = ""
+    overlap_removed: int = 0
+
+
+class ContextPacker:
+    """
+    Pack retrieved chunks into a context that fits a token budget.
+    
+    Chunks of the same document with consecutive chunk_index are merged
+    into one source, and text repeated by the chunker's overlap is removed
+    at the seams. Sources are then added best-ranked first while they fit
+    the budget; ones that don't fit are dropped (a smaller, lower-ranked
+    source may still fit). If even the best source exceeds the budget, it
+    is truncated so the context is never empty.
+    """
+    
+    def __init__(self, token_budget: int):
+        """
+        Initialize the packer.
+        
+        Args:
+            token_budget: Maximum estimated tokens of the context text
+        """
+        self.token_budget = token_budget
+    
+    def pack(self, chunks_with_scores: List[Tuple[Chunk, Document, float]]) -> PackedContext:
+        """
+        Merge, deduplicate and budget retrieved chunks.
+        
+        Args:
+            chunks_with_scores: Retrieval results, best first
+        
+        Returns:
+            PackedContext whose text numbers sources like its results
+        """
+        packed = PackedContext(budget=self.token_budget)
+        parts: List[str] = []
+        
+        for source in self._merge(chunks_with_scores):
+            body = self._body(len(parts) + 1, source)
+            cost = estimate_tokens(body) + (estimate_tokens(SOURCE_SEPARATOR) if parts else 0)
+            remaining = self.token_budget - packed.tokens_packed
+            
+            if cost > remaining:
+                if parts or remaining <= 0:
+                    packed.chunks_dropped += len(source.chunks)
+                    packed.tokens_dropped += cost
+                    continue
+                body = self._truncate(body, remaining)
+                packed.tokens_dropped += cost - estimate_tokens(body)
+                packed.truncated = True
+                cost = estimate_tokens(body)
+            
+            parts.append(body)
+            packed.results.append((self._source_chunk(source), source.doc, source.score))
+            packed.tokens_packed += cost
+            packed.chunks_packed += len(source.chunks)
+            packed.chunks_merged += len(source.chunks) - 1
+            packed.overlap_chars_removed += source.overlap_removed
+        
+        packed.text = SOURCE_SEPARATOR.join(parts)
+        return packed
+    
+    def _merge(self, chunks_with_scores: List[Tuple[Chunk, Document, float]]) -> List[_Source]:
+        """Group consecutive chunks of each document, ordered by best rank."""
+        by_doc: Dict[Any, List[Tuple[int, Chunk, Document, float]]] = {}
+        for rank, (chunk, doc, score) in enumerate(chunks_with_scores):
+            by_doc.setdefault(chunk.doc_id, []).append((rank, chunk, doc, score))
+        
+        sources: List[_Source] = []
+        for entries in by_doc.values():
+            entries.sort(key=lambda entry: entry[1].chunk_index)
+            current: Optional[_Source] = None
+            
+            for rank, chunk, doc, score in entries:
+                if current and chunk.chunk_index == current.chunks[-1].chunk_index + 1:
+                    overlap = self._overlap(current.text, chunk.content)
+                    current.text += chunk.content[overlap:] if overlap else "\n" + chunk.content
+                    current.overlap_removed += overlap
+                    current.chunks.append(chunk)
+                    current.score = max(current.score, score or 0.0)
+                    current.rank = min(current.rank, rank)
+                else:
+                    current = _Source(doc=doc, chunks=[chunk], score=score or 0.0, rank=rank, text=chunk.content)
+                    sources.append(current)
+        
+        sources.sort(key=lambda source: source.rank)
+        return sources
+    
+    @staticmethod
+    def _overlap(previous: str, following: str) -> int:
+        """Length of the longest suffix of previous that prefixes following."""
+        limit = min(len(previous), len(following))
+        for length in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+            if previous.endswith(following[:length]):
+                return length
+        return 0
+    
+    @staticmethod
+    def _body(number: int, source: _Source) -> str:
+        """Source header and text, as cited by the model ("Source N")."""
+        first, last = source.chunks[0], source.chunks[-1]
+        source_info = f"[{source.doc.filename}]"
+        
+        if first.page_number:
+            if last.page_number and last.page_number != first.page_number:
+                source_info += f" (Pages {first.page_number}-{last.page_number})"
+            else:
+                source_info += f" (Page {first.page_number})"
+        elif first.line_start:
+            source_info += f" (Lines {first.line_start}-{last.line_end or first.line_end})"
+        
+        return f"Source {number} {source_info}:\n{source.text}"
+    
+    @staticmethod
+    def _truncate(body: str, max_tokens: int) -> str:
+        """Cut text down to an estimated max_tokens."""
+        end = min(len(body), max_tokens * CHARS_PER_TOKEN)
+        while end > 0 and estimate_tokens(body[:end]) > max_tokens:
+            end = int(end * max_tokens / estimate_tokens(body[:end]))
+        return body[:end]
+    
+    @staticmethod
+    def _source_chunk(source: _Source) -> Chunk:
+        """The chunk to cite for a source (a transient merged chunk if needed)."""
+        if len(source.chunks) == 1:
+            return source.chunks[0]
+        
+        first, last = source.chunks[0], source.chunks[-1]
+        return Chunk(
+            id=first.id,
+            doc_id=first.doc_id,
+            content=source.text,
+            page_number=first.page_number,
+            line_start=first.line_start,
+            line_end=last.line_end if last.line_end is not None else first.line_end,
+            chunk_index=first.chunk_index,
+        )
@@ -1,18 +1,72 @@
 """Document processing service."""
 import os
 import asyncio
-from typing import List, Tuple, Optional
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple, Optional
 from uuid import UUID
 
-from sqlalchemy import select, update
+from sqlalchemy import exists, select, update, delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
+from database import engine
 from models.document import Document, Chunk, DocumentStatus
+from models.kb import KnowledgeBase
 from utils.pdf_parser import PDFParser
 from utils.text_parser import TextParser
 from utils.chunker import TextChunker
 from providers.factory import get_embedding_provider
+from vector_stores.factory import get_vector_store
+from services.ingestion_pipeline import IngestionPipeline
+
+
+logger = logging.getLogger(__name__)
+
+# Clone another document's chunks (text, metadata and embeddings)
+COPY_CHUNKS_SQL = text("""
+    INSERT INTO chunks (
+        doc_id, kb_id, is_visible, content, content_hash, embedding,
+        embedding_model, page_number, line_start, line_end, chunk_index
+    )
+    SELECT :doc_id, :kb_id, false, content, content_hash, embedding,
+           embedding_model, page_number, line_start, line_end, chunk_index
+    FROM chunks
+    WHERE doc_id = :source_id
+""")
+
+DELETE_CHUNKS_SQL = text("DELETE FROM chunks WHERE id = ANY(:ids)")
+
+# Per-document lock serializing replacements across processes; transaction
+# scoped, so it is released however the holder's connection ends
+REPLACE_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext('document:' || :doc_id))")
+REPLACE_TRY_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(hashtext('document:' || :doc_id))")
+
+# Chunk metadata that may change for an unchanged chunk text
+CHUNK_POSITION_FIELDS = ("page_number", "line_start", "line_end", "chunk_index")
+
+
+@asynccontextmanager
+async def replacement_lock(document_id: UUID) -> AsyncIterator[None]:
+    """Hold a document's replacement lock, waiting for the current holder."""
+    async with engine.connect() as connection:
+        # The lock lives as long as this otherwise idle transaction
+        await connection.execute(REPLACE_LOCK_SQL, {"doc_id": str(document_id)})
+        try:
+            yield
+        finally:
+            await connection.rollback()
+
+
+async def try_replacement_lock(db: AsyncSession, document_id: UUID) -> bool:
+    """
+    Take a document's replacement lock in the session's transaction.
+    
+    Returns:
+        False if a replacement of the document is running
+    """
+    result = await db.execute(REPLACE_TRY_LOCK_SQL, {"doc_id": str(document_id)})
+    return bool(result.scalar_one())
 
 
 class DocumentService:
@@ -37,46 +91,38 @@ class DocumentService:
             return
         
         try:
-            # Parse document based on type
-            if document.file_type == "pdf":
-                parsed_content = await self._parse_pdf(document.path)
-            else:  # md or txt
-                parsed_content = await self._parse_text(document.path)
+            # Clear chunks left behind by an interrupted earlier attempt
+            await self.db.execute(delete(Chunk).where(Chunk.doc_id == document_id))
             
-            # Chunk the content
-            chunks_data = self.chunker.chunk_content(
-                parsed_content,
-                document.file_type
-            )
-            
-            # Generate embeddings
-            embedding_provider = get_embedding_provider()
-            texts = [chunk["content"] for chunk in chunks_data]
-            embeddings = await embedding_provider.embed(texts)
-            
-            # Create chunk records
-            for i, (chunk_data, embedding) in enumerate(zip(chunks_data, embeddings)):
-                chunk = Chunk(
-                    doc_id=document.id,
-                    content=chunk_data["content"],
-                    embedding=embedding,
-                    page_number=chunk_data.get("page_number"),
-                    line_start=chunk_data.get("line_start"),
-                    line_end=chunk_data.get("line_end"),
-                    chunk_index=i,
+            # Identical file already ingested: copy its chunks, skip all work
+            if not await self._copy_duplicate_chunks(document):
+                # Parse, chunk, embed and insert as overlapped streaming stages
+                pipeline = IngestionPipeline(
+                    self.db,
+                    document,
+                    self._iter_parsed(document),
+                    get_embedding_provider(),
+                    self.chunker,
                 )
-                self.db.add(chunk)
+                await pipeline.run()
             
-            # Update document status to ready
+            # Update document status to ready and expose its chunks atomically
             await self.db.execute(
                 update(Document)
                 .where(Document.id == document_id)
                 .values(status=DocumentStatus.READY)
             )
+            await self.db.execute(
+                update(Chunk)
+                .where(Chunk.doc_id == document_id)
+                .values(is_visible=True)
+            )
             await self.db.commit()
             
         except Exception as e:
-            # Update document status to failed
+            await self.db.rollback()
+            # Drop partially inserted chunks and update document status to failed
+            await self.db.execute(delete(Chunk).where(Chunk.doc_id == document_id))
             await self.db.execute(
                 update(Document)
                 .where(Document.id == document_id)
@@ -87,16 +133,242 @@ class DocumentService:
             )
             await self.db.commit()
             raise
+        
+        await self._publish_kb_changes(document.kb_id)
     
-    async def _parse_pdf(self, path: str) -> List[dict]:
-        """Parse PDF and return list of {page_number, content}."""
-        parser = PDFParser()
-        return await asyncio.to_thread(parser.parse, path)
+    async def replace_document(self, document_id: UUID, new_file: Dict[str, Any]) -> None:
+        """
+        Re-index a ready document from a new version of its file.
+        
+        The new file is parsed and chunked, and its chunks are diffed by
+        content hash against the current version: unchanged chunks are kept
+        (only their position metadata is updated), new or changed chunks are
+        embedded and inserted invisible, and chunks that disappeared are
+        deleted. The swap is a single transaction, so searches see either
+        the old or the new version, never a mix. If anything fails, the
+        current version keeps serving.
+        
+        Replacements of one document run one at a time (they share its
+        invisible chunks); a second one waits and then applies its file on
+        top of the first.
+        
+        Args:
+            document_id: Document to update
+            new_file: Uploaded version (path, filename, file_type, size, content_hash)
+        """
+        async with replacement_lock(document_id):
+            await self._replace_document(document_id, new_file)
     
-    async def _parse_text(self, path: str) -> List[dict]:
-        """Parse text file and return list of {line_start, line_end, content}."""
-        parser = TextParser()
-        return await asyncio.to_thread(parser.parse, path)
+    async def _replace_document(self, document_id: UUID, new_file: Dict[str, Any]) -> None:
+        """Replace a document while holding its replacement lock."""
+        result = await self.db.execute(
+            select(Document).where(Document.id == document_id)
+        )
+        document = result.scalar_one_or_none()
+        
+        if not document:
+            return
+        
+        kb_id = document.kb_id
+        old_path = document.path
+        # Transient stand-in for the new version, used for parsing and chunking
+        new_version = Document(
+            id=document_id,
+            kb_id=kb_id,
+            filename=new_file["filename"],
+            path=new_file["path"],
+            file_type=new_file["file_type"],
+        )
+        
+        try:
+            # Clear chunks left behind by an interrupted earlier attempt
+            await self.db.execute(
+                delete(Chunk).where(Chunk.doc_id == document_id, Chunk.is_visible.is_(False))
+            )
+            await self.db.commit()
+            
+            embedding_provider = get_embedding_provider()
+            existing: Dict[str, List[Dict]] = {}
+            # Rows embedded by another model are replaced, never retained
+            stale: List[UUID] = []
+            rows = await self.db.execute(
+                select(
+                    Chunk.id,
+                    Chunk.content_hash,
+                    Chunk.embedding_model,
+                    Chunk.page_number,
+                    Chunk.line_start,
+                    Chunk.line_end,
+                    Chunk.chunk_index,
+                )
+                .where(Chunk.doc_id == document_id, Chunk.is_visible.is_(True))
+                .order_by(Chunk.chunk_index)
+            )
+            for row in rows.mappings():
+                if row["embedding_model"] != embedding_provider.model_name:
+                    stale.append(row["id"])
+                    continue
+                existing.setdefault(row["content_hash"], []).append(dict(row))
+            
+            pipeline = IngestionPipeline(
+                self.db,
+                new_version,
+                self._iter_parsed(new_version),
+                embedding_provider,
+                self.chunker,
+                existing_chunks=existing,
+            )
+            stats = await pipeline.run()
+            
+            # Rows of the current version not matched by any new chunk
+            removed = stale + [row["id"] for rows in existing.values() for row in rows]
+            moved = [
+                {"id": row["id"], **{f: chunk_data.get(f) for f in CHUNK_POSITION_FIELDS}}
+                for row, chunk_data in pipeline.retained
+                if any(row[f] != chunk_data.get(f) for f in CHUNK_POSITION_FIELDS)
+            ]
+            
+            # Swap versions atomically; the row lock serializes with deletion
+            locked = await self.db.execute(
+                select(Document.id).where(Document.id == document_id).with_for_update()
+            )
+            if locked.scalar_one_or_none() is None:
+                await self.db.rollback()
+                await asyncio.to_thread(_remove_file, new_file["path"])
+                return
+            
+            if removed:
+                await self.db.execute(DELETE_CHUNKS_SQL, {"ids": removed})
+            if moved:
+                await self.db.execute(update(Chunk), moved)
+            await self.db.execute(
+                update(Chunk)
+                .where(Chunk.doc_id == document_id, Chunk.is_visible.is_(False))
+                .values(is_visible=True)
+            )
+            await self.db.execute(
+                update(Document)
+                .where(Document.id == document_id)
+                .values(
+                    filename=new_file["filename"],
+                    path=new_file["path"],
+                    file_type=new_file["file_type"],
+                    size=new_file["size"],
+                    content_hash=new_file["content_hash"],
+                    status=DocumentStatus.READY,
+                    error_message=None,
+                )
+            )
+            await self.db.commit()
+            
+        except Exception as e:
+            await self.db.rollback()
+            # Drop the new version's chunks; the current version stays searchable
+            await self.db.execute(
+                delete(Chunk).where(Chunk.doc_id == document_id, Chunk.is_visible.is_(False))
+            )
+            await self.db.execute(
+                update(Document)
+                .where(Document.id == document_id)
+                .values(error_message=f"Replacement failed: {e}")
+            )
+            await self.db.commit()
+            raise
+        
+        logger.info(
+            f"Document {document_id} replaced: {stats.chunks_retained} chunks kept "
+            f"({len(moved)} moved), {stats.insert.items} added, {len(removed)} removed"
+        )
+        await self._publish_kb_changes(kb_id)
+        
+        if old_path != new_file["path"]:
+            await asyncio.to_thread(_remove_file, old_path)
+    
+    async def _copy_duplicate_chunks(self, document: Document) -> bool:
+        """
+        Reuse the parse and embedding results of an identical ready file.
+        
+        Looks for a READY document with the same content hash and file type
+        whose chunks were all embedded by the current embedding model,
+        preferring one in the same KB, and copies its chunk rows (invisible
+        until the caller marks this document ready).
+        
+        Returns:
+            True if chunks were copied
+        """
+        if not document.content_hash:
+            return False
+        
+        result = await self.db.execute(
+            select(Document.id)
+            .where(
+                Document.content_hash == document.content_hash,
+                Document.file_type == document.file_type,
+                Document.status == DocumentStatus.READY,
+                Document.id != document.id,
+                ~exists().where(
+                    Chunk.doc_id == Document.id,
+                    Chunk.embedding_model.is_distinct_from(get_embedding_provider().model_name),
+                ),
+            )
+            .order_by((Document.kb_id == document.kb_id).desc(), Document.created_at.desc())
+            .limit(1)
+        )
+        source_id = result.scalar_one_or_none()
+        
+        if source_id is None:
+            return False
+        
+        copied = await self.db.execute(
+            COPY_CHUNKS_SQL,
+            {"source_id": source_id, "doc_id": document.id, "kb_id": document.kb_id},
+        )
+        logger.info(
+            f"Document {document.id}: reused {copied.rowcount} chunks of "
+            f"identical document {source_id}"
+        )
+        return copied.rowcount > 0
+    
+    async def delete_document(self, document: Document) -> None:
+        """Delete a document with its chunks and stored file."""
+        await self.db.execute(delete(Document).where(Document.id == document.id))
+        await self.db.commit()
+        await self._publish_kb_changes(document.kb_id)
+        await asyncio.to_thread(_remove_file, document.path)
+    
+    async def _publish_kb_changes(self, kb_id: UUID) -> None:
+        """
+        Propagate a committed change to the KB's ready documents.
+        
+        Rebuilds derived vector indexes first, then bumps the KB generation
+        (invalidating cached answers) so answers are never cached against
+        an index that predates the change.
+        """
+        try:
+            await get_vector_store().refresh(self.db, kb_id)
+        finally:
+            await self.db.execute(
+                update(KnowledgeBase)
+                .where(KnowledgeBase.id == kb_id)
+                .values(generation=KnowledgeBase.generation + 1)
+            )
+            await self.db.commit()
+    
+    def _iter_parsed(self, document: Document) -> Iterator[dict]:
+        """
+        Incremental parser output for a document.
+        
+        PDFs yield {page_number, content} per page; text files yield
+        {line_start, line_end, content} per line group.
+        """
+        if document.file_type == "pdf":
+            parser = PDFParser(
+                workers=settings.pdf_parse_workers,
+                parallel_min_pages=settings.pdf_parallel_min_pages,
+                pages_per_task=settings.pdf_pages_per_task,
+            )
+            return parser.iter_pages(document.path)
+        return TextParser().iter_chunks(document.path)
     
     async def get_documents_by_kb(self, kb_id: UUID) -> List[Document]:
         """Get all documents for a knowledge base."""
@@ -106,3 +378,11 @@ class DocumentService:
             .order_by(Document.created_at.desc())
         )
         return list(result.scalars().all())
+
+
+def _remove_file(path: str) -> None:
+    """Remove a stored file if it still exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,182 @@
+"""Persistent (Postgres) embedding cache."""
+from typing import Dict, Mapping, Sequence
+
+import numpy as np
+
+from sqlalchemy import String, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import EmbeddingVector
+from models.embedding_cache import EmbeddingCacheEntry
+
+
+LOOKUP_SQL = text("""
+    SELECT text_hash, embedding
+    FROM embedding_cache
+    WHERE model = :model
+      AND dimension = :dimension
+      AND text_hash = ANY(:hashes)
+""").columns(text_hash=String, embedding=EmbeddingVector())
+
+# Refresh recency at most hourly per entry to avoid a write on every hit.
+# Rows are locked in key order and rows locked by another worker are
+# skipped (touching is best effort), so concurrent touches never deadlock.
+TOUCH_SQL = text("""
+    UPDATE embedding_cache e
+    SET last_used_at = timezone('utc', now())
+    FROM (
+        SELECT model, dimension, text_hash
+        FROM embedding_cache
+        WHERE model = :model
+          AND dimension = :dimension
+          AND text_hash = ANY(:hashes)
+          AND last_used_at < timezone('utc', now()) - interval '1 hour'
+        ORDER BY text_hash
+        FOR UPDATE SKIP LOCKED
+    ) stale
+    WHERE e.model = stale.model
+      AND e.dimension = stale.dimension
+      AND e.text_hash = stale.text_hash
+""")
+
+EVICT_EXPIRED_SQL = text("""
+    DELETE FROM embedding_cache
+    WHERE last_used_at < timezone('utc', now()) - make_interval(days => :ttl_days)
+""")
+
+# Least recently used rows beyond the size cap
+EVICT_OVERFLOW_SQL = text("""
+    DELETE FROM embedding_cache
+    WHERE ctid IN (
+        SELECT ctid
+        FROM embedding_cache
+        ORDER BY last_used_at
+        LIMIT GREATEST((SELECT count(*) FROM embedding_cache) - :max_rows, 0)
+    )
+""")
+
+
+class EmbeddingCache:
+    """
+    Embeddings of previously embedded texts, shared by all workers.
+    
+    Keyed by (model, dimension, SHA-256 of the text), so re-ingesting a
+    document after a chunker change, restoring a KB or overlapping uploads
+    only pay for texts never embedded before. Unused entries expire after
+    EMBEDDING_CACHE_TTL_DAYS and the table is capped at
+    EMBEDDING_CACHE_MAX_ROWS (see evict()).
+    """
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_many(
+        self,
+        db: AsyncSession,
+        model: str,
+        dimension: int,
+        hashes: Sequence[str],
+    ) -> Dict[str, np.ndarray]:
+        """
+        Look up embeddings in one query.
+        
+        Args:
+            db: Database session (committed here if entries are touched)
+            model: Embedding model name
+            dimension: Embedding dimension
+            hashes: Text hashes to look up
+        
+        Returns:
+            Mapping of text hash to embedding for the hits
+        """
+        if not hashes:
+            return {}
+        
+        params = {"model": model, "dimension": dimension, "hashes": sorted(hashes)}
+        rows = await db.execute(LOOKUP_SQL, params)
+        found = {text_hash: embedding for text_hash, embedding in rows}
+        
+        if found:
+            await db.execute(TOUCH_SQL, {**params, "hashes": sorted(found)})
+            await db.commit()
+        
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+    
+    async def put_many(
+        self,
+        db: AsyncSession,
+        model: str,
+        dimension: int,
+        embeddings: Mapping[str, np.ndarray],
+    ) -> None:
+        """
+        Store new embeddings (existing keys are left as they are) and commit.
+        
+        Rows are inserted in key order, so workers storing overlapping
+        texts wait on each other instead of deadlocking.
+        
+        Args:
+            db: Database session
+            model: Embedding model name
+            dimension: Embedding dimension
+            embeddings: Mapping of text hash to embedding
+        """
+        if not embeddings:
+            return
+        
+        statement = insert(EmbeddingCacheEntry).on_conflict_do_nothing()
+        await db.execute(
+            statement,
+            [
+                {
+                    "model": model,
+                    "dimension": dimension,
+                    "text_hash": text_hash,
+                    "embedding": embedding,
+                }
+                for text_hash, embedding in sorted(embeddings.items(), key=lambda item: item[0])
+            ],
+        )
+        await db.commit()
+    
+    async def evict(self, db: AsyncSession) -> int:
+        """
+        Apply the TTL and size cap.
+        
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        
+        if settings.embedding_cache_ttl_days > 0:
+            result = await db.execute(
+                EVICT_EXPIRED_SQL, {"ttl_days": settings.embedding_cache_ttl_days}
+            )
+            removed += result.rowcount
+        
+        if settings.embedding_cache_max_rows > 0:
+            result = await db.execute(
+                EVICT_OVERFLOW_SQL, {"max_rows": settings.embedding_cache_max_rows}
+            )
+            removed += result.rowcount
+        
+        await db.commit()
+        return removed
+    
+    def stats(self) -> dict:
+        """Return process-wide hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by ingestion in this process
+embedding_cache = EmbeddingCache()
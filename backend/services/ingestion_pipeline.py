@@ -0,0 +1,404 @@
+"""Streaming, stage-overlapped document ingestion pipeline."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sqlalchemy import String, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import async_session_maker, EmbeddingVector
+from models.document import Document
+from utils import metrics
+from utils.chunker import TextChunker
+from providers.base import EmbeddingProvider
+from services.chunk_writer import copy_chunks, hash_text
+from services.embedding_cache import embedding_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# Embeddings of chunks with identical text already stored in the KB by the
+# same embedding model
+REUSABLE_EMBEDDINGS_SQL = text("""
+    SELECT DISTINCT ON (content_hash) content_hash, embedding
+    FROM chunks
+    WHERE kb_id = :kb_id
+      AND content_hash = ANY(:hashes)
+      AND embedding_model = :model
+      AND embedding IS NOT NULL
+""").columns(
+    content_hash=String,
+    embedding=EmbeddingVector(settings.embedding_dimension),
+)
+
+
+@dataclass
+class StageStats:
+    """Counters for one pipeline stage."""
+    items: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0  # Time spent working, excluding queue waits
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "items_per_second": (
+                round(self.items / self.busy_seconds, 2) if self.busy_seconds else None
+            ),
+        }
+
+
+@dataclass
+class PipelineStats:
+    """Per-stage counters and wall time of one ingestion run."""
+    parse: StageStats = field(default_factory=StageStats)
+    chunk: StageStats = field(default_factory=StageStats)
+    embed: StageStats = field(default_factory=StageStats)
+    insert: StageStats = field(default_factory=StageStats)
+    chunks_retained: int = 0  # Unchanged chunks kept from the current version
+    embeddings_reused: int = 0  # Chunks whose text was already embedded
+    embedding_cache_hits: int = 0  # Distinct texts found in the embedding cache
+    embedding_cache_misses: int = 0
+    total_seconds: float = 0.0
+    
+    @property
+    def embedding_cache_hit_rate(self) -> Optional[float]:
+        lookups = self.embedding_cache_hits + self.embedding_cache_misses
+        return round(self.embedding_cache_hits / lookups, 4) if lookups else None
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "parse": self.parse.as_dict(),
+            "chunk": self.chunk.as_dict(),
+            "embed": self.embed.as_dict(),
+            "insert": self.insert.as_dict(),
+            "chunks_retained": self.chunks_retained,
+            "embeddings_reused": self.embeddings_reused,
+            "embedding_cache_hit_rate": self.embedding_cache_hit_rate,
+            "total_seconds": round(self.total_seconds, 4),
+        }
+
+
+class IngestionPipeline:
+    """
+    Ingest one document as four overlapped stages connected by bounded queues.
+    
+    parse -> chunk -> embed -> insert
+    
+    Each stage starts as soon as the previous one produces its first item,
+    so a long PDF is being embedded while later pages are still parsed.
+    A full queue suspends the producer, keeping memory bounded by the
+    queue sizes rather than the document size.
+    
+    Inserted chunks are committed in batches but stay invisible; the caller
+    flips them visible together with the READY status once run() returns.
+    
+    Chunks are content-addressed: a chunk whose text was already embedded
+    earlier in the document, or by the same model anywhere in the KB, reuses
+    that embedding instead of calling the provider.
+    
+    When re-indexing a new version of a document, chunks whose text matches
+    a row of the current version are not embedded or inserted at all; they
+    are collected in `retained` for the caller to keep.
+    """
+    
+    def __init__(
+        self,
+        db: AsyncSession,
+        document: Document,
+        parsed_items: Iterator[Dict],
+        embedding_provider: EmbeddingProvider,
+        chunker: TextChunker,
+        queue_size: int = None,
+        embed_batch_size: int = None,
+        insert_batch_size: int = None,
+        existing_chunks: Optional[Dict[str, List[Dict]]] = None,
+    ):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            db: Session used for chunk inserts
+            document: Document being ingested
+            parsed_items: Blocking iterator of parser output (pages / line groups)
+            embedding_provider: Provider used for chunk embeddings
+            chunker: Chunker applied to each parsed item
+            queue_size: Items buffered between stages (defaults from settings)
+            embed_batch_size: Max chunks per embedding request
+            insert_batch_size: Chunks written per commit
+            existing_chunks: Current version's chunk rows by content hash, in
+                document order; each matching new chunk consumes one row (only
+                rows embedded by this provider's model)
+        """
+        self.db = db
+        self.document = document
+        self.parsed_items = parsed_items
+        self.embedding_provider = embedding_provider
+        self.chunker = chunker
+        self.queue_size = max(1, queue_size or settings.ingest_queue_size)
+        self.embed_batch_size = max(1, embed_batch_size or settings.ingest_embed_batch_size)
+        self.insert_batch_size = max(1, insert_batch_size or settings.ingest_insert_batch_size)
+        self.stats = PipelineStats()
+        self.existing_chunks = existing_chunks or {}
+        # (existing row, new chunk data) pairs for unchanged chunk texts
+        self.retained: List[Tuple[Dict, Dict]] = []
+        # Recent embeddings of this document by content hash (bounded LRU)
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._recent_limit = max(0, settings.ingest_dedupe_cache_size)
+        self._model = embedding_provider.model_name
+    
+    async def run(self) -> PipelineStats:
+        """
+        Run all stages to completion.
+        
+        Returns:
+            Per-stage statistics
+        
+        Raises:
+            The first exception raised by any stage; the other stages are
+            cancelled before it propagates.
+        """
+        started = time.perf_counter()
+        parsed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        chunks: asyncio.Queue = asyncio.Queue(self.queue_size * self.embed_batch_size)
+        embedded: asyncio.Queue = asyncio.Queue(self.queue_size)
+        
+        tasks = [
+            asyncio.create_task(self._parse_stage(parsed)),
+            asyncio.create_task(self._chunk_stage(parsed, chunks)),
+            asyncio.create_task(self._embed_stage(chunks, embedded)),
+            asyncio.create_task(self._insert_stage(embedded)),
+        ]
+        
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats.total_seconds = time.perf_counter() - started
+            metrics.observe_ingestion(self.stats, succeeded=False)
+            raise
+        
+        self.stats.total_seconds = time.perf_counter() - started
+        metrics.observe_ingestion(self.stats, succeeded=True)
+        
+        logger.info(
+            "Ingested document %s: %s", self.document.id, self.stats.as_dict()
+        )
+        return self.stats
+    
+    async def _parse_stage(self, out: asyncio.Queue) -> None:
+        """Pull parser output one item at a time off the event loop."""
+        stats = self.stats.parse
+        
+        while True:
+            started = time.perf_counter()
+            item = await asyncio.to_thread(next, self.parsed_items, _DONE)
+            stats.busy_seconds += time.perf_counter() - started
+            
+            if item is _DONE:
+                break
+            
+            stats.items += 1
+            await out.put(item)
+        
+        await out.put(_DONE)
+    
+    async def _chunk_stage(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        """Split parsed items into chunks with a document-wide chunk_index."""
+        stats = self.stats.chunk
+        chunk_index = 0
+        
+        while (item := await inp.get()) is not _DONE:
+            started = time.perf_counter()
+            item_chunks = self.chunker.chunk_content([item], self.document.file_type)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            
+            for chunk_data in item_chunks:
+                chunk_data["content_hash"] = hash_text(chunk_data["content"])
+                chunk_data["chunk_index"] = chunk_index
+                chunk_index += 1
+                stats.items += 1
+                
+                existing = self.existing_chunks.get(chunk_data["content_hash"])
+                if existing:
+                    self.retained.append((existing.pop(0), chunk_data))
+                    self.stats.chunks_retained += 1
+                    continue
+                
+                await out.put(chunk_data)
+        
+        await out.put(_DONE)
+    
+    async def _embed_stage(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        """
+        Embed chunks in batches.
+        
+        A batch is whatever is already queued (up to embed_batch_size) once the
+        first chunk arrives, so embedding starts immediately instead of waiting
+        for a full batch.
+        """
+        stats = self.stats.embed
+        finished = False
+        
+        while not finished:
+            first = await inp.get()
+            if first is _DONE:
+                break
+            
+            batch = [first]
+            while len(batch) < self.embed_batch_size and not inp.empty():
+                chunk_data = inp.get_nowait()
+                if chunk_data is _DONE:
+                    finished = True
+                    break
+                batch.append(chunk_data)
+            
+            started = time.perf_counter()
+            embeddings = await self._embed_batch(batch)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += len(batch)
+            stats.batches += 1
+            
+            await out.put(list(zip(batch, embeddings)))
+        
+        await out.put(_DONE)
+    
+    async def _embed_batch(self, batch: Sequence[Dict]) -> List[np.ndarray]:
+        """
+        Embed a batch, reusing embeddings of already-seen chunk texts.
+        
+        Lookup order: this document's recent chunks, the KB's stored chunks,
+        then the persistent embedding cache; only the remaining distinct
+        texts go to the provider, and their embeddings are cached.
+        """
+        found: Dict[str, np.ndarray] = {}
+        for chunk_data in batch:
+            embedding = self._recent.get(chunk_data["content_hash"])
+            if embedding is not None:
+                found[chunk_data["content_hash"]] = embedding
+        
+        unseen = list({c["content_hash"] for c in batch} - found.keys())
+        if unseen:
+            # Own session: the insert stage is using self.db concurrently
+            async with async_session_maker() as db:
+                rows = await db.execute(
+                    REUSABLE_EMBEDDINGS_SQL,
+                    {"kb_id": self.document.kb_id, "hashes": unseen, "model": self._model},
+                )
+                for content_hash, embedding in rows:
+                    found[content_hash] = np.asarray(embedding, dtype=np.float32)
+                
+                unseen = [h for h in unseen if h not in found]
+                if unseen and settings.embedding_cache_enabled:
+                    # The cache is an optimization: on failure, embed everything
+                    try:
+                        cached = await embedding_cache.get_many(
+                            db, self._model, self.embedding_provider.dimension, unseen
+                        )
+                    except Exception as e:
+                        logger.warning(f"Embedding cache lookup failed, treating as misses: {e}")
+                        cached = {}
+                    self.stats.embedding_cache_hits += len(cached)
+                    self.stats.embedding_cache_misses += len(unseen) - len(cached)
+                    found.update(cached)
+        
+        # One provider call for the distinct texts still missing
+        missing: Dict[str, str] = {}
+        for chunk_data in batch:
+            if chunk_data["content_hash"] not in found:
+                missing.setdefault(chunk_data["content_hash"], chunk_data["content"])
+        
+        if missing:
+            # float32 matrix rows are bound as binary pgvector values
+            try:
+                vectors = np.asarray(
+                    await self.embedding_provider.embed(list(missing.values())),
+                    dtype=np.float32,
+                )
+            except Exception:
+                metrics.PROVIDER_ERRORS.labels(metrics.embedding_provider_label(), "embedding").inc()
+                raise
+            fresh = dict(zip(missing.keys(), vectors))
+            found.update(fresh)
+            
+            if settings.embedding_cache_enabled:
+                try:
+                    async with async_session_maker() as db:
+                        await embedding_cache.put_many(
+                            db, self._model, self.embedding_provider.dimension, fresh
+                        )
+                except Exception as e:
+                    logger.warning(f"Embedding cache store failed, skipping: {e}")
+        
+        self.stats.embeddings_reused += len(batch) - len(missing)
+        
+        for content_hash in found:
+            self._remember(content_hash, found[content_hash])
+        
+        return [found[c["content_hash"]] for c in batch]
+    
+    def _remember(self, content_hash: str, embedding: np.ndarray) -> None:
+        """Add an embedding to the per-document LRU."""
+        if self._recent_limit == 0:
+            return
+        self._recent[content_hash] = embedding
+        self._recent.move_to_end(content_hash)
+        while len(self._recent) > self._recent_limit:
+            self._recent.popitem(last=False)
+    
+    async def _insert_stage(self, inp: asyncio.Queue) -> None:
+        """Write embedded chunks, committing every insert_batch_size rows."""
+        pending: List[Tuple[Dict, np.ndarray]] = []
+        
+        while (batch := await inp.get()) is not _DONE:
+            pending.extend(batch)
+            if len(pending) >= self.insert_batch_size:
+                await self._write(pending)
+                pending = []
+        
+        if pending:
+            await self._write(pending)
+    
+    async def _write(self, rows: List[Tuple[Dict, np.ndarray]]) -> None:
+        """COPY one batch of invisible chunk rows and commit it."""
+        stats = self.stats.insert
+        started = time.perf_counter()
+        
+        await copy_chunks(
+            self.db,
+            [
+                {
+                    "doc_id": self.document.id,
+                    "kb_id": self.document.kb_id,
+                    "content": chunk_data["content"],
+                    "content_hash": chunk_data["content_hash"],
+                    "embedding": embedding,
+                    "embedding_model": self._model,
+                    "page_number": chunk_data.get("page_number"),
+                    "line_start": chunk_data.get("line_start"),
+                    "line_end": chunk_data.get("line_end"),
+                    "chunk_index": chunk_data["chunk_index"],
+                }
+                for chunk_data, embedding in rows
+            ],
+            batch_size=self.insert_batch_size,
+        )
+        await self.db.commit()
+        
+        stats.busy_seconds += time.perf_counter() - started
+        stats.items += len(rows)
+        stats.batches += 1
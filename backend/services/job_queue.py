@@ -0,0 +1,304 @@
+"""Postgres-backed ingestion job queue."""
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import Enum, Integer, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.job import IngestionJob, JobKind, JobStatus
+
+
+# Atomically move the next due job to RUNNING. SKIP LOCKED lets any number
+# of workers poll concurrently without blocking on each other's claims.
+CLAIM_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'RUNNING',
+        attempts = attempts + 1,
+        locked_by = :worker_id,
+        heartbeat_at = timezone('utc', now()),
+        updated_at = timezone('utc', now())
+    WHERE id = (
+        SELECT id
+        FROM ingestion_jobs
+        WHERE status = 'QUEUED'
+          AND run_at <= timezone('utc', now())
+        ORDER BY run_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, doc_id, kind, payload, attempts, max_attempts
+""").columns(
+    id=PGUUID(as_uuid=True),
+    doc_id=PGUUID(as_uuid=True),
+    kind=Enum(JobKind),
+    payload=JSONB,
+    attempts=Integer,
+    max_attempts=Integer,
+)
+
+HEARTBEAT_SQL = text("""
+    UPDATE ingestion_jobs
+    SET heartbeat_at = timezone('utc', now())
+    WHERE id = :job_id
+      AND status = 'RUNNING'
+      AND locked_by = :worker_id
+""")
+
+COMPLETE_SQL = text("""
+    UPDATE ingestion_jobs
+    SET status = 'SUCCEEDED',
+        locked_by = NULL,
+        last_error = NULL,
+        updated_at = timezone('utc', now())
+    WHERE id = :job_id
+      AND locked_by = :worker_id
+""")
+
+# Requeue with a delay, or give up once attempts are exhausted. A new
+# document stays PROCESSING while a retry is pending; a document being
+# replaced keeps serving its current version.
+FAIL_SQL = text("""
+    WITH job AS (
+        UPDATE ingestion_jobs
+        SET status = CASE WHEN attempts < max_attempts
+                          THEN 'QUEUED'::jobstatus ELSE 'FAILED'::jobstatus END,
+            run_at = timezone('utc', now()) + make_interval(secs => :delay),
+            locked_by = NULL,
+            last_error = :error,
+            updated_at = timezone('utc', now())
+        WHERE id = :job_id
+          AND locked_by = :worker_id
+        RETURNING doc_id, kind, status
+    ), document AS (
+        UPDATE documents d
+        SET status = 'PROCESSING'
+        FROM job
+        WHERE d.id = job.doc_id
+          AND job.kind = 'INGEST'
+          AND job.status = 'QUEUED'
+        RETURNING d.id
+    )
+    SELECT count(*) FROM job
+""")
+
+# Jobs whose worker stopped heartbeating (crash, OOM kill, lost node) are put
+# back in the queue, or failed together with their (new) document when out
+# of attempts.
+RECOVER_STALE_SQL = text("""
+    WITH stale AS (
+        UPDATE ingestion_jobs
+        SET status = CASE WHEN attempts < max_attempts
+                          THEN 'QUEUED'::jobstatus ELSE 'FAILED'::jobstatus END,
+            run_at = timezone('utc', now()),
+            locked_by = NULL,
+            last_error = 'Worker stopped responding',
+            updated_at = timezone('utc', now())
+        WHERE status = 'RUNNING'
+          AND heartbeat_at < timezone('utc', now()) - make_interval(secs => :timeout)
+        RETURNING doc_id, kind, status
+    ), failed AS (
+        UPDATE documents d
+        SET status = 'FAILED',
+            error_message = 'Ingestion worker stopped responding'
+        FROM stale
+        WHERE d.id = stale.doc_id
+          AND stale.kind = 'INGEST'
+          AND stale.status = 'FAILED'
+    )
+    SELECT count(*) FROM stale
+""")
+
+# Documents left PROCESSING without a live job (e.g. uploaded while the
+# in-process background mode was active and the server restarted)
+ENQUEUE_ORPHANS_SQL = text("""
+    INSERT INTO ingestion_jobs (
+        id, doc_id, status, attempts, max_attempts, run_at, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), d.id, 'QUEUED', 0, :max_attempts,
+           timezone('utc', now()), timezone('utc', now()), timezone('utc', now())
+    FROM documents d
+    WHERE d.status = 'PROCESSING'
+      AND d.created_at < timezone('utc', now()) - make_interval(secs => :timeout)
+      AND NOT EXISTS (
+          SELECT 1 FROM ingestion_jobs j
+          WHERE j.doc_id = d.id
+            AND j.status IN ('QUEUED', 'RUNNING')
+      )
+""")
+
+
+# Jobs waiting or running, for the queue depth metric
+QUEUE_DEPTH_SQL = text("""
+    SELECT status, count(*) AS jobs
+    FROM ingestion_jobs
+    WHERE status IN ('QUEUED', 'RUNNING')
+    GROUP BY status
+""")
+
+
+class JobLostError(RuntimeError):
+    """Raised when a worker finishes a job that was recovered as stale and is no longer its own."""
+
+
+@dataclass
+class ClaimedJob:
+    """A job claimed by a worker."""
+    id: UUID
+    doc_id: UUID
+    kind: JobKind
+    payload: Optional[Dict[str, Any]]
+    attempts: int
+    max_attempts: int
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter for the next retry.
+    
+    Args:
+        attempts: Attempts made so far (1 after the first failure)
+    
+    Returns:
+        Delay in seconds
+    """
+    delay = settings.job_retry_backoff * (2 ** max(0, attempts - 1))
+    delay = min(delay, settings.job_retry_backoff_max)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def enqueue_ingestion(
+    db: AsyncSession,
+    doc_id: UUID,
+    kind: JobKind = JobKind.INGEST,
+    payload: Optional[Dict[str, Any]] = None,
+) -> IngestionJob:
+    """
+    Add an ingestion job for a document.
+    
+    The job is added to the session only; it becomes visible to workers when
+    the caller commits, together with the document row.
+    
+    Args:
+        db: Database session
+        doc_id: Document to process
+        kind: INGEST for a new document, REPLACE for a new file version
+        payload: Kind-specific arguments (the new file for REPLACE)
+    """
+    job = IngestionJob(
+        doc_id=doc_id,
+        kind=kind,
+        payload=payload,
+        status=JobStatus.QUEUED,
+        max_attempts=settings.job_max_attempts,
+    )
+    db.add(job)
+    return job
+
+
+async def claim_job(db: AsyncSession, worker_id: str) -> Optional[ClaimedJob]:
+    """Claim the next due job, or return None if the queue is empty."""
+    row = (await db.execute(CLAIM_SQL, {"worker_id": worker_id})).first()
+    await db.commit()
+    
+    if row is None:
+        return None
+    return ClaimedJob(
+        id=row.id,
+        doc_id=row.doc_id,
+        kind=row.kind,
+        payload=row.payload,
+        attempts=row.attempts,
+        max_attempts=row.max_attempts,
+    )
+
+
+async def heartbeat(db: AsyncSession, job_id: UUID, worker_id: str) -> bool:
+    """
+    Record that a running job is still alive.
+    
+    Returns:
+        False if the job is no longer held by this worker
+    """
+    result = await db.execute(HEARTBEAT_SQL, {"job_id": job_id, "worker_id": worker_id})
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def complete_job(db: AsyncSession, job_id: UUID, worker_id: str) -> None:
+    """
+    Mark a job as succeeded.
+    
+    Raises:
+        JobLostError: If the job is no longer held by this worker
+    """
+    result = await db.execute(COMPLETE_SQL, {"job_id": job_id, "worker_id": worker_id})
+    await db.commit()
+    if result.rowcount == 0:
+        raise JobLostError(f"Job {job_id} is no longer held by {worker_id}")
+
+
+async def fail_job(
+    db: AsyncSession,
+    job: ClaimedJob,
+    worker_id: str,
+    error: str,
+) -> bool:
+    """
+    Record a failed attempt, scheduling a retry if attempts remain.
+    
+    Returns:
+        True if the job will be retried
+    
+    Raises:
+        JobLostError: If the job is no longer held by this worker
+    """
+    will_retry = job.attempts < job.max_attempts
+    result = await db.execute(
+        FAIL_SQL,
+        {
+            "job_id": job.id,
+            "worker_id": worker_id,
+            "error": error,
+            "delay": retry_delay(job.attempts) if will_retry else 0.0,
+        },
+    )
+    owned = result.scalar_one() > 0
+    await db.commit()
+    if not owned:
+        raise JobLostError(f"Job {job.id} is no longer held by {worker_id}")
+    return will_retry
+
+
+async def recover_stale_jobs(db: AsyncSession) -> int:
+    """
+    Requeue (or fail) running jobs that missed their heartbeats, and enqueue
+    documents stuck in PROCESSING without a job.
+    
+    Returns:
+        Number of stale jobs recovered
+    """
+    params = {"timeout": float(settings.job_stale_timeout)}
+    recovered = (await db.execute(RECOVER_STALE_SQL, params)).scalar_one()
+    await db.execute(
+        ENQUEUE_ORPHANS_SQL,
+        {**params, "max_attempts": settings.job_max_attempts},
+    )
+    await db.commit()
+    return recovered
+
+
+async def queue_depth(db: AsyncSession) -> Dict[str, int]:
+    """
+    Count queued (including those waiting for a retry) and running jobs.
+    
+    Returns:
+        Dict of {"queued": n, "running": n}
+    """
+    depth = {"queued": 0, "running": 0}
+    for status, jobs in await db.execute(QUEUE_DEPTH_SQL):
+        depth[status.lower()] = jobs
+    return depth
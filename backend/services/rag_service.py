@@ -1,15 +1,56 @@
 """RAG service for retrieval and answer generation."""
-from typing import List, Optional, AsyncGenerator, Tuple
+import asyncio
+import logging
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
 from uuid import UUID
 
+import numpy as np
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
+from database import async_session_maker
 from models.document import Document, Chunk
 from models.kb import KnowledgeBase
 from schemas.chat import Citation
-from providers.factory import get_embedding_provider, get_chat_provider
+from providers.factory import get_query_embedding_provider, get_hedged_chat_provider
+from providers.hedged import HedgedChatProvider
+from services.context_packer import ContextPacker, PackedContext, token_budget_for
+from utils import metrics
+from vector_stores.base import row_to_result
+from vector_stores.factory import get_vector_store
+
+
+logger = logging.getLogger(__name__)
+
+# Trigram word similarity; `<%` is served by the GIN index on content
+LEXICAL_SQL = text("""
+    WITH candidates AS MATERIALIZED (
+        SELECT 
+            c.id as chunk_id,
+            c.doc_id,
+            c.content,
+            c.page_number,
+            c.line_start,
+            c.line_end,
+            c.chunk_index,
+            word_similarity(:query, c.content) as score
+        FROM chunks c
+        WHERE c.kb_id = :kb_id
+          AND c.is_visible
+          AND :query <% c.content
+        ORDER BY score DESC
+        LIMIT :limit
+    )
+    SELECT candidates.*, d.filename
+    FROM candidates
+    JOIN documents d ON candidates.doc_id = d.id
+    ORDER BY candidates.score DESC
+""")
+
+LEXICAL_SETTINGS_SQL = text(
+    "SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"
+)
 
 
 class RAGService:
@@ -18,90 +59,177 @@ class RAGService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.top_k = 5  # Number of chunks to retrieve
+        self.vector_store = get_vector_store()
+    
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Embed a user query (cached across requests)."""
+        embedding_provider = get_query_embedding_provider()
+        try:
+            query_embeddings = await embedding_provider.embed([query])
+        except Exception:
+            metrics.PROVIDER_ERRORS.labels(metrics.embedding_provider_label(), "embedding").inc()
+            raise
+        # Sent as a binary pgvector value via the asyncpg codec
+        return np.asarray(query_embeddings[0], dtype=np.float32)
     
     async def retrieve_relevant_chunks(
         self, 
         kb_id: UUID, 
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        vector_weight: Optional[float] = None,
+        lexical_weight: Optional[float] = None,
     ) -> List[Tuple[Chunk, Document, float]]:
         """
-        Retrieve most relevant chunks for a query using vector similarity.
+        Retrieve most relevant chunks for a query.
         Returns list of (chunk, document, score) tuples.
+        
+        Vector and lexical candidates are fetched concurrently and merged with
+        weighted reciprocal rank fusion; the score is then the fused score.
+        With a lexical weight of 0 this is a plain vector search and the
+        score is cosine similarity.
+        
+        Args:
+            ef_search: HNSW candidate list size for this query (pgvector store)
+            probes: IVFFlat lists to probe for this query (pgvector store)
+            query_embedding: Precomputed embedding of the query, if available
+            vector_weight: Fusion weight of vector results (default from settings)
+            lexical_weight: Fusion weight of lexical results (default from settings)
+        """
+        if vector_weight is None:
+            vector_weight = settings.hybrid_vector_weight
+        if lexical_weight is None:
+            lexical_weight = settings.hybrid_lexical_weight
+        
+        if query_embedding is None and vector_weight > 0:
+            query_embedding = await self.embed_query(query)
+        
+        if lexical_weight <= 0:
+            return await self.vector_store.search(
+                self.db,
+                kb_id,
+                query_embedding,
+                top_k=top_k,
+                ef_search=ef_search,
+                probes=probes,
+            )
+        
+        candidates = max(top_k, settings.hybrid_candidates)
+        retrievers = [self._lexical_search(kb_id, query, candidates)]
+        weights = [lexical_weight]
+        
+        if vector_weight > 0:
+            retrievers.append(self.vector_store.search(
+                self.db,
+                kb_id,
+                query_embedding,
+                top_k=candidates,
+                ef_search=ef_search,
+                probes=probes,
+            ))
+            weights.append(vector_weight)
+        
+        rankings = await asyncio.gather(*retrievers)
+        
+        return self.fuse_rankings(list(zip(rankings, weights)), top_k)
+    
+    async def retrieve_many(
+        self,
+        kb_id: UUID,
+        queries: List[str],
+        top_k: int = 5,
+    ) -> List[List[Tuple[Chunk, Document, float]]]:
         """
-        # Get query embedding
-        embedding_provider = get_embedding_provider()
-        query_embeddings = await embedding_provider.embed([query])
-        query_embedding = query_embeddings[0]
-        
-        # Vector similarity search using pgvector
-        # Use cosine distance: 1 - cosine_similarity
-        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
-        
-        sql = text("""
-            SELECT 
-                c.id as chunk_id,
-                c.doc_id,
-                c.content,
-                c.page_number,
-                c.line_start,
-                c.line_end,
-                c.chunk_index,
-                d.filename,
-                1 - (c.embedding <=> :embedding::vector) as score
-            FROM chunks c
-            JOIN documents d ON c.doc_id = d.id
-            WHERE d.kb_id = :kb_id 
-              AND d.status = 'ready'
-              AND c.embedding IS NOT NULL
-            ORDER BY c.embedding <=> :embedding::vector
-            LIMIT :limit
-        """)
-        
-        result = await self.db.execute(
-            sql,
-            {
-                "kb_id": str(kb_id),
-                "embedding": embedding_str,
-                "limit": top_k
-            }
+        Retrieve chunks for many queries by vector similarity.
+        
+        All queries are embedded in one provider call (cached queries are
+        skipped) and searched in one vector store round trip.
+        Returns one list of (chunk, document, score) tuples per query.
+        """
+        embedding_provider = get_query_embedding_provider()
+        query_embeddings = np.asarray(
+            await embedding_provider.embed(queries), dtype=np.float32
         )
         
-        rows = result.fetchall()
-        chunks_with_scores = []
-        
-        for row in rows:
-            chunk = Chunk(
-                id=row.chunk_id,
-                doc_id=row.doc_id,
-                content=row.content,
-                page_number=row.page_number,
-                line_start=row.line_start,
-                line_end=row.line_end,
-                chunk_index=row.chunk_index,
+        return await self.vector_store.search_many(
+            self.db,
+            kb_id,
+            query_embeddings,
+            top_k=top_k,
+        )
+    
+    async def _lexical_search(
+        self,
+        kb_id: UUID,
+        query: str,
+        limit: int,
+    ) -> List[Tuple[Chunk, Document, float]]:
+        """Trigram search over chunk text, on its own connection so it can run concurrently."""
+        async with async_session_maker() as session:
+            await session.execute(
+                LEXICAL_SETTINGS_SQL,
+                {"threshold": str(settings.lexical_similarity_threshold)}
             )
-            # Create a minimal document for citation
-            doc = Document(
-                id=row.doc_id,
-                filename=row.filename,
+            result = await session.execute(
+                LEXICAL_SQL,
+                {"kb_id": str(kb_id), "query": query, "limit": limit}
             )
-            chunks_with_scores.append((chunk, doc, row.score))
+            return [row_to_result(row, row.score) for row in result.fetchall()]
+    
+    @staticmethod
+    def fuse_rankings(
+        rankings: List[Tuple[List[Tuple[Chunk, Document, float]], float]],
+        top_k: int,
+    ) -> List[Tuple[Chunk, Document, float]]:
+        """
+        Merge ranked result lists with weighted reciprocal rank fusion.
+        
+        Each list contributes weight / (k + rank) for every chunk it contains.
+        
+        Args:
+            rankings: (results, weight) pairs, results best first
+            top_k: Number of fused results to return
+        """
+        fused: Dict[UUID, list] = {}
         
-        return chunks_with_scores
+        for results, weight in rankings:
+            for rank, (chunk, doc, _) in enumerate(results, start=1):
+                entry = fused.setdefault(chunk.id, [chunk, doc, 0.0])
+                entry[2] += weight / (settings.hybrid_rrf_k + rank)
+        
+        ranked = sorted(fused.values(), key=lambda entry: entry[2], reverse=True)
+        return [tuple(entry) for entry in ranked[:top_k]]
     
-    def build_context(self, chunks_with_scores: List[Tuple[Chunk, Document, float]]) -> str:
-        """Build context string from retrieved chunks."""
-        context_parts = []
-        for i, (chunk, doc, score) in enumerate(chunks_with_scores):
-            source_info = f"[{doc.filename}]"
-            if chunk.page_number:
-                source_info += f" (Page {chunk.page_number})"
-            elif chunk.line_start:
-                source_info += f" (Lines {chunk.line_start}-{chunk.line_end})"
-            
-            context_parts.append(f"Source {i+1} {source_info}:\n{chunk.content}")
+    def pack_context(
+        self,
+        chunks_with_scores: List[Tuple[Chunk, Document, float]],
+        chat_provider: Optional[str] = None,
+    ) -> PackedContext:
+        """
+        Pack retrieved chunks into a context within the provider's token budget.
         
-        return "\n\n".join(context_parts)
+        Adjacent chunks of a document are merged without their overlapping
+        text. Citations should be created from the packed results, which
+        match the "Source N" numbering of the context text.
+        
+        Args:
+            chunks_with_scores: Retrieval results, best first
+            chat_provider: Provider the context is for (default provider if None)
+        """
+        packed = ContextPacker(token_budget_for(chat_provider)).pack(chunks_with_scores)
+        logger.info(f"Packed context: {packed.as_dict()}")
+        return packed
+    
+    def build_context(
+        self,
+        chunks_with_scores: List[Tuple[Chunk, Document, float]],
+        chat_provider: Optional[str] = None,
+    ) -> str:
+        """Build context string from retrieved chunks (see pack_context)."""
+        return self.pack_context(chunks_with_scores, chat_provider).text
     
     def create_citations(
         self, 
@@ -155,8 +283,13 @@ Please answer the question based on the context above. Cite your sources using [
             {"role": "user", "content": user_prompt},
         ]
         
-        # Get chat provider and stream response
-        provider = get_chat_provider(chat_provider)
+        # Get chat provider (hedged across the chain if enabled) and stream response
+        provider = get_hedged_chat_provider(chat_provider)
         
-        async for token in provider.stream_chat(messages):
-            yield token
+        try:
+            async for token in provider.stream_chat(messages):
+                yield token
+        except Exception:
+            if not isinstance(provider, HedgedChatProvider):  # Counts per provider itself
+                metrics.PROVIDER_ERRORS.labels(provider.name, "chat").inc()
+            raise
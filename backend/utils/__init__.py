@@ -2,9 +2,12 @@
 from utils.pdf_parser import PDFParser
 from utils.text_parser import TextParser
 from utils.chunker import TextChunker
+from utils.upload import save_upload, UploadTooLargeError
 
 __all__ = [
     "PDFParser",
     "TextParser",
     "TextChunker",
+    "save_upload",
+    "UploadTooLargeError",
 ]
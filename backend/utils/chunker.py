@@ -1,12 +1,34 @@
 """Text chunking utilities for RAG."""
-from typing import List, Dict
+import re
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Tuple
+
+
+# Blank line(s) between paragraphs
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+
+# Longest prefix ending in a sentence terminator (closing quotes included).
+# Matched against a window of at most chunk_size characters, the greedy
+# prefix backtracks from the window end, so one match call finds the last
+# sentence end that fits. Latin terminators need whitespace after them (so
+# "3.14" doesn't split); CJK full-width punctuation does not, since CJK
+# text has no spaces between sentences.
+_LAST_SENTENCE_END = re.compile(
+    r"(?s).*"
+    r"(?:[.!?][\"'”’)\]]*(?=\s)"
+    r"|[。！？；…]+[」』”’）)\"']*)"
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+_NEWLINE = re.compile("\n")
 
 
 class TextChunker:
     """Chunk text documents for embedding and retrieval."""
     
     def __init__(
-        self, 
+        self,
         chunk_size: int = 500,
         chunk_overlap: int = 50,
     ):
@@ -21,17 +43,21 @@ class TextChunker:
         self.chunk_overlap = chunk_overlap
     
     def chunk_content(
-        self, 
+        self,
         parsed_content: List[Dict],
         file_type: str
     ) -> List[Dict]:
         """
         Chunk parsed content into smaller pieces for embedding.
         
+        Each chunk is an exact slice of its parsed item's content:
+        char_start/char_end are offsets into that content, and for text
+        files line_start/line_end are the lines the slice itself spans.
+        
         Args:
             parsed_content: Output from PDFParser or TextParser
             file_type: 'pdf', 'md', or 'txt'
-            
+        
         Returns:
             List of chunk dicts with content and metadata
         """
@@ -43,105 +69,129 @@ class TextChunker:
             if not content:
                 continue
             
-            # For short content, keep as is
-            if len(content) <= self.chunk_size:
-                chunk = {
-                    "content": content,
-                }
-                # Preserve metadata
-                if file_type == "pdf":
-                    chunk["page_number"] = item.get("page_number")
-                else:
-                    chunk["line_start"] = item.get("line_start")
-                    chunk["line_end"] = item.get("line_end")
-                
-                chunks.append(chunk)
+            spans = self.split_spans(content)
+            
+            if file_type == "pdf":
+                for start, end in spans:
+                    chunks.append({
+                        "content": content[start:end],
+                        "char_start": start,
+                        "char_end": end,
+                        "page_number": item.get("page_number"),
+                    })
                 continue
             
-            # Split longer content into chunks
-            text_chunks = self._split_text(content)
+            line_start = item.get("line_start")
+            newlines = [m.start() for m in _NEWLINE.finditer(content)] if line_start else []
             
-            for text_chunk in text_chunks:
+            for start, end in spans:
                 chunk = {
-                    "content": text_chunk,
+                    "content": content[start:end],
+                    "char_start": start,
+                    "char_end": end,
+                    "line_start": item.get("line_start"),
+                    "line_end": item.get("line_end"),
                 }
-                # Preserve metadata (same page/line range for all sub-chunks)
-                if file_type == "pdf":
-                    chunk["page_number"] = item.get("page_number")
-                else:
-                    chunk["line_start"] = item.get("line_start")
-                    chunk["line_end"] = item.get("line_end")
+                if line_start:
+                    # Lines before the slice's first and last character
+                    chunk["line_start"] = line_start + bisect_left(newlines, start)
+                    chunk["line_end"] = line_start + bisect_left(newlines, end - 1)
                 
                 chunks.append(chunk)
         
         return chunks
     
-    def _split_text(self, text: str) -> List[str]:
-        """
-        Split text into chunks with overlap.
-        Tries to split on sentence boundaries when possible.
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
         """
-        chunks = []
+        Split text into (start, end) offsets of chunks, in a single pass.
         
-        # Try to split on paragraphs first
-        paragraphs = text.split("\n\n")
+        Paragraphs are packed greedily up to chunk_size. A paragraph that
+        doesn't fit is cut at the last sentence end within chunk_size
+        (hard-cut if a single sentence is longer), and its remainder starts
+        the next chunk. Each chunk after the first is then extended
+        backwards by up to chunk_overlap characters, starting on a word
+        boundary when there is one.
+        """
+        if len(text) <= self.chunk_size:
+            return [(0, len(text))]
         
-        current_chunk = ""
+        spans: List[Tuple[int, int]] = []
+        # Current chunk is text[chunk_start:chunk_end]; empty when equal
+        chunk_start = chunk_end = 0
         
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
+        for start, end in self._iter_paragraphs(text):
+            if chunk_end == chunk_start:
+                chunk_start = start
+            elif end - chunk_start > self.chunk_size and end - start <= self.chunk_size:
+                # Paragraph fits a chunk of its own
+                spans.append((chunk_start, chunk_end))
+                chunk_start = start
             
-            # If adding this paragraph exceeds chunk size
-            if len(current_chunk) + len(para) + 2 > self.chunk_size:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
-                # Handle long paragraphs
-                if len(para) > self.chunk_size:
-                    # Split on sentences
-                    sentences = self._split_sentences(para)
-                    for sentence in sentences:
-                        if len(current_chunk) + len(sentence) + 1 > self.chunk_size:
-                            if current_chunk:
-                                chunks.append(current_chunk.strip())
-                            current_chunk = sentence
-                        else:
-                            current_chunk = current_chunk + " " + sentence if current_chunk else sentence
+            pos = start
+            while end - chunk_start > self.chunk_size:
+                limit = chunk_start + self.chunk_size
+                match = _LAST_SENTENCE_END.match(text, pos, limit)
+                if match:
+                    cut = match.end()
+                elif chunk_end > chunk_start:
+                    # Nothing of this paragraph fits: close the chunk first
+                    spans.append((chunk_start, chunk_end))
+                    chunk_start = chunk_end = pos
+                    continue
                 else:
-                    current_chunk = para
-            else:
-                current_chunk = current_chunk + "\n\n" + para if current_chunk else para
+                    cut = limit
+                
+                spans.append((chunk_start, cut))
+                pos = self._skip_whitespace(text, cut, end)
+                chunk_start = chunk_end = pos
+            
+            chunk_end = end
         
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        if chunk_end > chunk_start:
+            spans.append((chunk_start, chunk_end))
         
-        # Apply overlap
-        if self.chunk_overlap > 0 and len(chunks) > 1:
-            chunks = self._apply_overlap(chunks)
+        if self.chunk_overlap > 0 and len(spans) > 1:
+            spans = [spans[0]] + [
+                (self._overlap_start(text, spans[i - 1][0], spans[i][0]), spans[i][1])
+                for i in range(1, len(spans))
+            ]
         
-        return chunks
+        return spans
     
-    def _split_sentences(self, text: str) -> List[str]:
-        """Split text into sentences."""
-        # Simple sentence splitting on period, question mark, exclamation
-        import re
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return [s.strip() for s in sentences if s.strip()]
-    
-    def _apply_overlap(self, chunks: List[str]) -> List[str]:
-        """Apply overlap to chunks."""
-        overlapped = [chunks[0]]
+    def _iter_paragraphs(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, end) of non-blank paragraphs, surrounding whitespace trimmed."""
+        pos = 0
+        length = len(text)
         
-        for i in range(1, len(chunks)):
-            prev_chunk = chunks[i - 1]
-            curr_chunk = chunks[i]
+        while pos < length:
+            match = _PARAGRAPH_BREAK.search(text, pos)
+            para_end = match.start() if match else length
+            next_pos = match.end() if match else length
+            
+            pos = self._skip_whitespace(text, pos, para_end)
+            while para_end > pos and text[para_end - 1].isspace():
+                para_end -= 1
             
-            # Get overlap from end of previous chunk
-            overlap_text = prev_chunk[-self.chunk_overlap:] if len(prev_chunk) > self.chunk_overlap else prev_chunk
+            if para_end > pos:
+                yield pos, para_end
             
-            # Prepend overlap to current chunk
-            overlapped.append(overlap_text + " " + curr_chunk)
+            pos = next_pos
+    
+    @staticmethod
+    def _skip_whitespace(text: str, pos: int, end: int) -> int:
+        """First non-whitespace offset in text[pos:end] (or end)."""
+        while pos < end and text[pos].isspace():
+            pos += 1
+        return pos
+    
+    def _overlap_start(self, text: str, prev_start: int, start: int) -> int:
+        """Start offset of a chunk extended back into the previous chunk."""
+        overlap_start = max(prev_start, start - self.chunk_overlap)
+        
+        # Don't begin mid-word: skip to the first whitespace in the window
+        if overlap_start > prev_start and not text[overlap_start - 1].isspace():
+            match = _WHITESPACE.search(text, overlap_start, start)
+            if match:
+                overlap_start = match.end()
         
-        return overlapped
+        return overlap_start
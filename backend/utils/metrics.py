@@ -0,0 +1,204 @@
+"""
+Prometheus metrics for chat, ingestion and providers.
+
+The API serves them at /metrics; ingestion workers serve them on
+WORKER_METRICS_PORT. Chat metrics are labelled by the chat provider that
+served the request, ingestion metrics by the embedding provider.
+
+Hot loops only take timestamps; observations are recorded once per
+request or document.
+"""
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from config import settings
+
+if TYPE_CHECKING:
+    from services.ingestion_pipeline import PipelineStats
+
+
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Chat requests
+CHAT_REQUESTS = Counter(
+    "rag_chat_requests_total",
+    "Chat requests by outcome (answered, cached, no_context, error)",
+    ["provider", "outcome"],
+)
+CHAT_EMBED_SECONDS = Histogram(
+    "rag_chat_embed_seconds",
+    "Time to embed the chat question",
+    ["provider"],
+    buckets=_STAGE_BUCKETS,
+)
+CHAT_RETRIEVAL_SECONDS = Histogram(
+    "rag_chat_retrieval_seconds",
+    "Time to retrieve chunks for the chat question (SQL)",
+    ["provider"],
+    buckets=_STAGE_BUCKETS,
+)
+CHAT_TTFT_SECONDS = Histogram(
+    "rag_chat_ttft_seconds",
+    "Time from calling the chat provider to its first token",
+    ["provider"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0),
+)
+CHAT_TOKENS_PER_SECOND = Histogram(
+    "rag_chat_tokens_per_second",
+    "Token rate of a streamed answer after its first token",
+    ["provider"],
+    buckets=(1, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500),
+)
+CHAT_STREAM_SECONDS = Histogram(
+    "rag_chat_stream_seconds",
+    "Total duration of an answered chat stream",
+    ["provider"],
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+
+# Providers
+PROVIDER_ERRORS = Counter(
+    "rag_provider_errors_total",
+    "Failed provider calls",
+    ["provider", "kind"],  # kind: chat or embedding
+)
+PROVIDER_FALLBACKS = Counter(
+    "rag_provider_fallbacks_total",
+    "Chat requests served by a fallback instead of the requested provider",
+    ["provider", "fallback"],
+)
+CHAT_HEDGES = Counter(
+    "rag_chat_hedges_total",
+    "Hedged chat requests, by primary provider and the provider that won",
+    ["provider", "winner"],
+)
+
+# Query embedding cache (in-process LRU in front of the embedding provider)
+QUERY_EMBEDDING_CACHE_HITS = Counter(
+    "rag_query_embedding_cache_hits_total",
+    "Query texts served from the query embedding cache",
+    ["provider"],
+)
+QUERY_EMBEDDING_CACHE_MISSES = Counter(
+    "rag_query_embedding_cache_misses_total",
+    "Query texts embedded by the provider on a cache miss",
+    ["provider"],
+)
+QUERY_EMBEDDING_CACHE_SIZE = Gauge(
+    "rag_query_embedding_cache_entries",
+    "Embeddings held in the query embedding cache",
+    ["provider"],
+    multiprocess_mode="livesum",
+)
+
+# Ingestion
+INGESTION_DOCUMENTS = Counter(
+    "rag_ingestion_documents_total",
+    "Documents run through the ingestion pipeline, by outcome (ready, failed)",
+    ["provider", "outcome"],
+)
+INGESTION_STAGE_SECONDS = Histogram(
+    "rag_ingestion_stage_seconds",
+    "Busy time of an ingestion stage (parse, chunk, embed, insert) per document",
+    ["provider", "stage"],
+    buckets=(0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+INGESTION_CHUNKS = Counter(
+    "rag_ingestion_chunks_total",
+    "Chunks written by the ingestion pipeline",
+    ["provider"],
+)
+INGESTION_CHUNKS_PER_SECOND = Histogram(
+    "rag_ingestion_chunks_per_second",
+    "Chunks written per second of pipeline wall time, per document",
+    ["provider"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "rag_ingestion_queue_depth",
+    "Ingestion jobs by state (queued, running), sampled by workers",
+    ["provider", "state"],
+    multiprocess_mode="max",
+)
+
+
+def embedding_provider_label() -> str:
+    """Label value for metrics of the configured embedding provider."""
+    return settings.embedding_provider.lower().strip()
+
+
+def observe_chat_stream(
+    provider: str,
+    provider_started: float,
+    first_token_at: Optional[float],
+    finished: float,
+    tokens: int,
+    request_started: float,
+) -> None:
+    """
+    Record the provider timings of one streamed answer.
+    
+    Args:
+        provider: Chat provider name
+        provider_started: perf_counter() when the provider was called
+        first_token_at: perf_counter() at the first token (None if none came)
+        finished: perf_counter() after the last token
+        tokens: Number of tokens streamed
+        request_started: perf_counter() when the request started
+    """
+    if first_token_at is not None:
+        CHAT_TTFT_SECONDS.labels(provider).observe(first_token_at - provider_started)
+        if tokens > 1 and finished > first_token_at:
+            CHAT_TOKENS_PER_SECOND.labels(provider).observe((tokens - 1) / (finished - first_token_at))
+    CHAT_STREAM_SECONDS.labels(provider).observe(finished - request_started)
+
+
+def observe_ingestion(stats: "PipelineStats", succeeded: bool) -> None:
+    """
+    Record one ingestion pipeline run.
+    
+    Args:
+        stats: PipelineStats of the run
+        succeeded: Whether every stage completed (failed runs only count)
+    """
+    provider = embedding_provider_label()
+    INGESTION_DOCUMENTS.labels(provider, "ready" if succeeded else "failed").inc()
+    if not succeeded:
+        # Partial stage times and rolled-back chunks would skew the rest
+        return
+    
+    for stage in ("parse", "chunk", "embed", "insert"):
+        INGESTION_STAGE_SECONDS.labels(provider, stage).observe(getattr(stats, stage).busy_seconds)
+    
+    written = stats.insert.items
+    INGESTION_CHUNKS.labels(provider).inc(written)
+    if written and stats.total_seconds > 0:
+        INGESTION_CHUNKS_PER_SECOND.labels(provider).observe(written / stats.total_seconds)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format.
+    
+    With PROMETHEUS_MULTIPROC_DIR set (several server processes), the
+    values of all processes are aggregated.
+    
+    Returns:
+        Tuple of (body, content type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
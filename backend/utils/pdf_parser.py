@@ -1,11 +1,97 @@
 """PDF document parser."""
-from typing import List, Dict
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional
 from pypdf import PdfReader
 
 
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[Dict]:
+    """
+    Extract text from pages start..end (1-based, inclusive).
+    
+    Opens the file independently, so it can run in a worker process.
+    
+    Args:
+        file_path: Path to the PDF file
+        start: First page number
+        end: Last page number
+        
+    Returns:
+        Ordered list of dicts with 'page_number' and 'content' keys
+        (empty pages skipped)
+    """
+    try:
+        reader = PdfReader(file_path)
+        pages = []
+        
+        for page_num in range(start, min(end, len(reader.pages)) + 1):
+            text = reader.pages[page_num - 1].extract_text()
+            if text and text.strip():
+                pages.append({
+                    "page_number": page_num,
+                    "content": text.strip(),
+                })
+        
+        return pages
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {e}")
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Return the shared page-extraction process pool."""
+    global _executor, _executor_workers
+    
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the page-extraction process pool, if it was started."""
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
 class PDFParser:
     """Parser for PDF documents, extracts text by page."""
     
+    def __init__(
+        self,
+        workers: int = 0,
+        parallel_min_pages: int = 64,
+        pages_per_task: int = 32,
+    ):
+        """
+        Initialize parser.
+        
+        Args:
+            workers: Process pool size for large PDFs (0 or 1 = single process)
+            parallel_min_pages: Page count from which the pool is used
+            pages_per_task: Pages extracted per pool task
+        """
+        self.workers = workers
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = max(1, pages_per_task)
+    
     def parse(self, file_path: str) -> List[Dict]:
         """
         Parse a PDF file and extract text by page.
@@ -16,24 +102,94 @@ class PDFParser:
         Returns:
             List of dicts with 'page_number' and 'content' keys
         """
-        pages = []
+        return list(self.iter_pages(file_path))
+    
+    def parse_range(self, file_path: str, start: int, end: int) -> List[Dict]:
+        """
+        Extract text from a page range (1-based, inclusive) in this process.
         
-        try:
-            reader = PdfReader(file_path)
+        Args:
+            file_path: Path to the PDF file
+            start: First page number
+            end: Last page number
             
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
-                
-                if text and text.strip():
-                    pages.append({
-                        "page_number": page_num,
-                        "content": text.strip(),
-                    })
+        Returns:
+            List of dicts with 'page_number' and 'content' keys
+        """
+        return extract_page_range(file_path, start, end)
+    
+    def iter_pages(self, file_path: str) -> Iterator[Dict]:
+        """
+        Extract text page by page, yielding each page as soon as it's ready.
+        
+        PDFs with at least parallel_min_pages pages are split into page
+        ranges extracted concurrently by the process pool; pages are still
+        yielded in order, each range as soon as it and its predecessors are
+        done.
         
+        Args:
+            file_path: Path to the PDF file
+            
+        Yields:
+            Dicts with 'page_number' and 'content' keys (empty pages skipped)
+        """
+        # One reader gives the page count and, below the pool threshold,
+        # the pages themselves; pool workers reopen the file
+        try:
+            reader = PdfReader(file_path)
+            total_pages = len(reader.pages)
         except Exception as e:
             raise ValueError(f"Failed to parse PDF: {e}")
         
-        if not pages:
+        if self.workers > 1 and total_pages >= self.parallel_min_pages:
+            pages = self._iter_pages_parallel(file_path, total_pages)
+        else:
+            pages = self._iter_pages_sequential(reader)
+        
+        found_text = False
+        
+        for page in pages:
+            found_text = True
+            yield page
+        
+        if not found_text:
             raise ValueError("PDF contains no extractable text")
+    
+    def _iter_pages_sequential(self, reader: PdfReader) -> Iterator[Dict]:
+        """Extract pages one at a time in this process."""
+        for page_num, page in enumerate(reader.pages, start=1):
+            try:
+                text = page.extract_text()
+            except Exception as e:
+                raise ValueError(f"Failed to parse PDF: {e}")
+            
+            if text and text.strip():
+                yield {
+                    "page_number": page_num,
+                    "content": text.strip(),
+                }
+    
+    def _iter_pages_parallel(self, file_path: str, total_pages: int) -> Iterator[Dict]:
+        """Extract page ranges in the process pool, yielding them in order."""
+        executor = _get_executor(self.workers)
+        futures: List[Future] = [
+            executor.submit(
+                extract_page_range,
+                file_path,
+                start,
+                min(start + self.pages_per_task - 1, total_pages),
+            )
+            for start in range(1, total_pages + 1, self.pages_per_task)
+        ]
         
-        return pages
+        try:
+            for future in futures:
+                yield from future.result()
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM); start a fresh pool for the next document
+            shutdown_pdf_pool()
+            raise ValueError(f"Failed to parse PDF: {e}")
+        finally:
+            # Abandoned (failed or cancelled ingestion): drop queued ranges
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,146 @@
+"""
+Per-request context: a request ID carried into logs and the X-Request-ID
+response header, and monotonic stage marks for timing breakdowns.
+"""
+import logging
+import re
+import time
+import uuid
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, Dict, Optional
+
+
+# Stages of a chat request, in order; see RequestContext.timing()
+CHAT_STAGES = (
+    "auth",
+    "embedding",
+    "retrieval",
+    "context",
+    "provider_connect",
+    "first_token",
+    "last_token",
+)
+
+# Client-supplied IDs are echoed into logs, so only accept plain tokens
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,64}")
+
+
+class RequestContext:
+    """ID and perf_counter() stage marks of one HTTP request."""
+    
+    def __init__(self, request_id: str, started: Optional[float] = None):
+        self.request_id = request_id
+        self.started = time.perf_counter() if started is None else started
+        self.marks: Dict[str, float] = {}
+        self.provider: Optional[str] = None  # Chat provider that served the answer
+    
+    def fork(self) -> "RequestContext":
+        """Context for one of several concurrent attempts: same ID and start, own marks."""
+        return RequestContext(self.request_id, self.started)
+    
+    def mark(self, stage: str, at: Optional[float] = None) -> float:
+        """Record the time a stage finished (now unless given)."""
+        at = time.perf_counter() if at is None else at
+        self.marks[stage] = at
+        return at
+    
+    def timing(self, stages=CHAT_STAGES) -> Dict[str, Any]:
+        """
+        Timing breakdown of the stages reached so far.
+        
+        Returns:
+            Dict with the request ID, serving provider, each stage's
+            offset from the start of the request (timestamps_ms), its
+            duration since the previous stage reached (durations_ms), and
+            the total so far
+        """
+        timestamps = {}
+        durations = {}
+        previous = self.started
+        
+        for stage in stages:
+            at = self.marks.get(stage)
+            if at is None:
+                continue
+            timestamps[stage] = round((at - self.started) * 1000, 2)
+            durations[stage] = round((at - previous) * 1000, 2)
+            previous = at
+        
+        return {
+            "request_id": self.request_id,
+            "provider": self.provider,
+            "timestamps_ms": timestamps,
+            "durations_ms": durations,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+        }
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    """Context of the request being handled, None outside requests."""
+    return _current.get()
+
+
+def context_with(request: Optional[RequestContext]) -> Context:
+    """Copy of the current contextvars context with `request` as the current request."""
+    context = copy_context()
+    context.run(_current.set, request)
+    return context
+
+
+def mark(stage: str) -> None:
+    """Mark a stage of the current request (no-op outside requests)."""
+    context = _current.get()
+    if context is not None:
+        context.mark(stage)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving every HTTP request a RequestContext.
+    
+    The ID is taken from the client's X-Request-ID header when it is a
+    plain token, otherwise generated, and returned in X-Request-ID. The
+    context stays current while a streaming response is being sent.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        token = _current.set(RequestContext(request_id))
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _current.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds `request_id` (or '-') to log records for use in formats."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _current.get()
+        record.request_id = context.request_id if context is not None else "-"
+        return True
@@ -1,5 +1,5 @@
 """Text and Markdown document parser."""
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 
 class TextParser:
@@ -24,8 +24,18 @@ class TextParser:
         Returns:
             List of dicts with 'line_start', 'line_end', and 'content' keys
         """
-        chunks = []
+        return list(self.iter_chunks(file_path))
+    
+    def iter_chunks(self, file_path: str) -> Iterator[Dict]:
+        """
+        Yield line groups of a text/markdown file one at a time.
         
+        Args:
+            file_path: Path to the text file
+            
+        Yields:
+            Dicts with 'line_start', 'line_end', and 'content' keys
+        """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
@@ -38,27 +48,25 @@ class TextParser:
             raise ValueError("File is empty")
         
         # Group lines into chunks
-        current_chunk = []
-        chunk_start = 1
+        found_content = False
         
-        for line_num, line in enumerate(lines, start=1):
-            current_chunk.append(line)
+        for chunk_start in range(1, len(lines) + 1, self.lines_per_chunk):
+            chunk_end = min(chunk_start + self.lines_per_chunk - 1, len(lines))
             
-            # Create chunk when reaching limit or end of file
-            if len(current_chunk) >= self.lines_per_chunk or line_num == len(lines):
-                content = "".join(current_chunk).strip()
-                
-                if content:  # Only add non-empty chunks
-                    chunks.append({
-                        "line_start": chunk_start,
-                        "line_end": line_num,
-                        "content": content,
-                    })
-                
-                current_chunk = []
-                chunk_start = line_num + 1
+            # Narrow the range to the non-blank lines, so it matches the
+            # stripped content exactly
+            while chunk_start <= chunk_end and not lines[chunk_start - 1].strip():
+                chunk_start += 1
+            while chunk_end >= chunk_start and not lines[chunk_end - 1].strip():
+                chunk_end -= 1
+            
+            if chunk_start <= chunk_end:  # Only add non-empty chunks
+                found_content = True
+                yield {
+                    "line_start": chunk_start,
+                    "line_end": chunk_end,
+                    "content": "".join(lines[chunk_start - 1:chunk_end]).strip(),
+                }
         
-        if not chunks:
+        if not found_content:
             raise ValueError("File contains no content")
-        
-        return chunks
@@ -0,0 +1,78 @@
+"""Streaming upload storage."""
+import asyncio
+import hashlib
+import os
+from typing import Tuple
+
+from fastapi import UploadFile
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+async def save_upload(
+    file: UploadFile,
+    path: str,
+    max_size: int,
+    chunk_size: int = 1024 * 1024,
+) -> Tuple[int, str]:
+    """
+    Stream an upload to disk in fixed-size chunks, hashing it on the way.
+    
+    File writes and hashing run in a worker thread, so the event loop never
+    blocks on disk I/O and at most one chunk is held in memory. The size
+    limit is checked as bytes arrive; on any error the partial file is
+    removed.
+    
+    Args:
+        file: Uploaded file
+        path: Destination path
+        max_size: Maximum size in bytes
+        chunk_size: Bytes read and written per step
+        
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest)
+        
+    Raises:
+        UploadTooLargeError: If the file exceeds max_size
+    """
+    digest = hashlib.sha256()
+    size = 0
+    
+    def write_chunk(out, chunk: bytes) -> None:
+        digest.update(chunk)
+        out.write(chunk)
+    
+    out = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(
+                    f"File {file.filename} exceeds maximum size of {format_size(max_size)}"
+                )
+            await asyncio.to_thread(write_chunk, out, chunk)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(_remove_quietly, path)
+        raise
+    
+    await asyncio.to_thread(out.close)
+    return size, digest.hexdigest()
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for messages, e.g. 104857600 -> '100MB'."""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):g}MB"
+    if size >= 1024:
+        return f"{size / 1024:g}KB"
+    return f"{size}B"
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,12 @@
+"""Vector store backends package."""
+from vector_stores.base import VectorStore
+from vector_stores.postgres import PgVectorStore
+from vector_stores.numpy_mmap import MmapVectorStore
+from vector_stores.factory import get_vector_store
+
+__all__ = [
+    "VectorStore",
+    "PgVectorStore",
+    "MmapVectorStore",
+    "get_vector_store",
+]
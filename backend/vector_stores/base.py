@@ -0,0 +1,86 @@
+"""Base class for vector stores."""
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.document import Document, Chunk
+
+
+class VectorStore(ABC):
+    """Abstract base class for chunk embedding search backends."""
+    
+    @abstractmethod
+    async def search(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        **kwargs
+    ) -> List[Tuple[Chunk, Document, float]]:
+        """
+        Find the chunks most similar to a query embedding.
+        
+        Args:
+            db: Database session
+            kb_id: Knowledge base to search (ready documents only)
+            query_embedding: Query vector
+            top_k: Number of results
+            
+        Returns:
+            List of (chunk, document, score) tuples, best first,
+            where score is cosine similarity
+        """
+        pass
+    
+    async def search_many(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        **kwargs
+    ) -> List[List[Tuple[Chunk, Document, float]]]:
+        """
+        Search for several queries at once.
+        
+        Backends should override this with a batched implementation;
+        the default runs one search per query.
+        
+        Returns:
+            One result list per query, in input order
+        """
+        return [
+            await self.search(db, kb_id, query_embedding, top_k, **kwargs)
+            for query_embedding in query_embeddings
+        ]
+    
+    async def refresh(self, db: AsyncSession, kb_id: UUID) -> None:
+        """Rebuild any derived index after a KB's ready documents change."""
+        pass
+    
+    async def drop(self, kb_id: UUID) -> None:
+        """Remove any derived index for a deleted KB."""
+        pass
+
+
+def row_to_result(row, score: float) -> Tuple[Chunk, Document, float]:
+    """Build a (chunk, document, score) tuple from a retrieval row."""
+    chunk = Chunk(
+        id=row.chunk_id,
+        doc_id=row.doc_id,
+        content=row.content,
+        page_number=row.page_number,
+        line_start=row.line_start,
+        line_end=row.line_end,
+        chunk_index=row.chunk_index,
+    )
+    # Create a minimal document for citation
+    doc = Document(
+        id=row.doc_id,
+        filename=row.filename,
+    )
+    return chunk, doc, score
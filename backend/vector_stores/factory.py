@@ -0,0 +1,40 @@
+"""Vector store factory."""
+from typing import Optional
+
+from config import settings
+from vector_stores.base import VectorStore
+from vector_stores.numpy_mmap import MmapVectorStore
+from vector_stores.postgres import PgVectorStore
+
+
+# Singleton instance cache
+_vector_store: Optional[VectorStore] = None
+
+
+def get_vector_store() -> VectorStore:
+    """
+    Get the configured vector store backend.
+    
+    Returns:
+        VectorStore instance (singleton)
+        
+    Raises:
+        ValueError: If VECTOR_STORE names an unknown backend
+    """
+    global _vector_store
+    
+    if _vector_store is None:
+        name = settings.vector_store.lower().strip()
+        
+        if name == "pgvector":
+            _vector_store = PgVectorStore()
+        elif name == "mmap":
+            _vector_store = MmapVectorStore(
+                root_dir=settings.vector_store_dir,
+                dtype=settings.vector_store_dtype,
+                block_rows=settings.vector_store_block_rows,
+            )
+        else:
+            raise ValueError(f"Unknown vector store: {name}")
+    
+    return _vector_store
@@ -0,0 +1,327 @@
+"""In-process vector store over memory-mapped NumPy matrices."""
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.document import Document, Chunk
+from vector_stores.base import VectorStore, row_to_result
+
+
+GENERATION_SQL = text("""
+    SELECT generation FROM knowledge_bases WHERE id = :kb_id
+""")
+
+EMBEDDINGS_SQL = text("""
+    SELECT c.id, c.embedding
+    FROM chunks c
+    WHERE c.kb_id = :kb_id
+      AND c.is_visible
+      AND c.embedding IS NOT NULL
+""")
+
+HYDRATE_SQL = text("""
+    SELECT 
+        c.id as chunk_id,
+        c.doc_id,
+        c.content,
+        c.page_number,
+        c.line_start,
+        c.line_end,
+        c.chunk_index,
+        d.filename
+    FROM chunks c
+    JOIN documents d ON c.doc_id = d.id
+    WHERE c.id = ANY(:chunk_ids)
+      AND c.is_visible
+""")
+
+
+@dataclass
+class _MappedIndex:
+    """A KB's embedding matrix and chunk ids, mapped read-only."""
+    version: str  # Published version named by the manifest
+    vectors: np.ndarray  # (n, dim), L2-normalized rows
+    ids: np.ndarray  # (n, 16) uint8 chunk UUID bytes
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Exact cosine search over per-KB embedding matrices in memory-mapped files.
+    
+    Each KB's ready chunk embeddings are L2-normalized and written to an .npy
+    file under VECTOR_STORE_DIR, then mapped read-only by every worker, so the
+    OS page cache holds a single copy shared across uvicorn processes. Search
+    is a blocked matrix-vector product with argpartition top-k; only the final
+    top-k chunks are loaded from the database, by primary key.
+    
+    Files are versioned and published by atomically replacing a small
+    manifest, so readers never see a partially written matrix. Refreshes of
+    a KB are serialized across processes by a lock file in its directory,
+    and the manifest records the KB generation the matrix was built at, so
+    an older build never replaces a newer one.
+    """
+    
+    def __init__(
+        self,
+        root_dir: str,
+        dtype: str = "float32",
+        block_rows: int = 8192,
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            root_dir: Directory holding one sub-directory per KB
+            dtype: On-disk element type, float32 or float16 (half the memory,
+                slower to score since blocks are widened to float32)
+            block_rows: Rows scored per block (bounds float32 scratch memory)
+        """
+        self.root_dir = root_dir
+        self.dtype = np.dtype(dtype)
+        self.block_rows = block_rows
+        self._indexes: Dict[UUID, _MappedIndex] = {}
+    
+    def _kb_dir(self, kb_id: UUID) -> str:
+        return os.path.join(self.root_dir, str(kb_id))
+    
+    def _manifest_path(self, kb_id: UUID) -> str:
+        return os.path.join(self._kb_dir(kb_id), "manifest.json")
+    
+    async def _lock(self, kb_id: UUID):
+        """Acquire the KB's exclusive refresh lock; closing the returned file releases it."""
+        kb_dir = self._kb_dir(kb_id)
+        os.makedirs(kb_dir, exist_ok=True)
+        lock_file = open(os.path.join(kb_dir, "refresh.lock"), "a")
+        try:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return lock_file
+                except BlockingIOError:
+                    # Poll rather than block a thread, so waiting stays cancellable
+                    await asyncio.sleep(0.05)
+        except BaseException:
+            lock_file.close()
+            raise
+    
+    async def search(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        **kwargs
+    ) -> List[Tuple[Chunk, Document, float]]:
+        """Search the KB's mapped matrix, building it on first use."""
+        results = await self.search_many(db, kb_id, np.asarray(query_embedding)[None, :], top_k)
+        return results[0]
+    
+    async def search_many(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        **kwargs
+    ) -> List[List[Tuple[Chunk, Document, float]]]:
+        """Score all queries against each block with one matrix product."""
+        # Mapping and scoring touch the whole matrix, so keep them off the event loop
+        index = await asyncio.to_thread(self._load, kb_id)
+        if index is None:
+            await self.refresh(db, kb_id)
+            index = await asyncio.to_thread(self._load, kb_id)
+        if index is None or len(index.ids) == 0:
+            return [[] for _ in range(len(query_embeddings))]
+        
+        positions, scores = await asyncio.to_thread(self._top_k, index.vectors, query_embeddings, top_k)
+        return await self._hydrate(db, index, positions, scores)
+    
+    def _load(self, kb_id: UUID) -> Optional[_MappedIndex]:
+        """Return the current mapping for a KB, remapping if it was republished."""
+        # A concurrent publish may delete the version named by the manifest
+        # between reading it and mapping the files; re-read and retry.
+        for attempt in range(3):
+            try:
+                with open(self._manifest_path(kb_id), "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                self._indexes.pop(kb_id, None)
+                return None
+            
+            # Compared by version rather than manifest mtime: publishes within
+            # one timestamp tick (coarse or network filesystems) share an mtime
+            version = manifest["version"]
+            index = self._indexes.get(kb_id)
+            if index is not None and index.version == version:
+                return index
+            
+            kb_dir = self._kb_dir(kb_id)
+            try:
+                index = _MappedIndex(
+                    version=version,
+                    vectors=np.load(os.path.join(kb_dir, f"{version}.vectors.npy"), mmap_mode="r"),
+                    ids=np.load(os.path.join(kb_dir, f"{version}.ids.npy"), mmap_mode="r"),
+                )
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+        
+        self._indexes[kb_id] = index
+        return index
+    
+    def _top_k(
+        self,
+        vectors: np.ndarray,
+        query_embeddings: np.ndarray,
+        top_k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (queries, k) positions and cosine scores of the best rows, best first."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+        
+        best_positions = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        
+        for start in range(0, len(vectors), self.block_rows):
+            block = np.asarray(vectors[start:start + self.block_rows], dtype=np.float32)
+            scores = queries @ block.T
+            
+            k = min(top_k, scores.shape[1])
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            
+            best_positions = np.concatenate([best_positions, candidates + start], axis=1)
+            best_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1
+            )
+            
+            if best_scores.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_positions = np.take_along_axis(best_positions, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best_positions, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+    
+    async def _hydrate(
+        self,
+        db: AsyncSession,
+        index: _MappedIndex,
+        positions: np.ndarray,
+        scores: np.ndarray,
+    ) -> List[List[Tuple[Chunk, Document, float]]]:
+        """Load chunk rows for every query's winners in one query, preserving rank order."""
+        chunk_ids = [
+            [UUID(bytes=index.ids[position].tobytes()) for position in query_positions]
+            for query_positions in positions
+        ]
+        unique_ids = list({chunk_id for query_ids in chunk_ids for chunk_id in query_ids})
+        
+        result = await db.execute(HYDRATE_SQL, {"chunk_ids": unique_ids})
+        rows = {row.chunk_id: row for row in result.fetchall()}
+        
+        # Chunks of documents deleted since the last refresh are skipped
+        return [
+            [
+                row_to_result(rows[chunk_id], float(score))
+                for chunk_id, score in zip(query_ids, query_scores)
+                if chunk_id in rows
+            ]
+            for query_ids, query_scores in zip(chunk_ids, scores)
+        ]
+    
+    async def refresh(self, db: AsyncSession, kb_id: UUID) -> None:
+        """
+        Rebuild and publish the KB's matrix from its ready chunks.
+        
+        Rows are read while holding the KB's refresh lock, so concurrent
+        refreshes (from API processes and workers) publish in the order
+        they read, and the last publish is always the newest content.
+        """
+        lock_file = await self._lock(kb_id)
+        try:
+            generation = (
+                await db.execute(GENERATION_SQL, {"kb_id": str(kb_id)})
+            ).scalar_one_or_none()
+            if generation is None:
+                return  # KB deleted
+            
+            result = await db.execute(EMBEDDINGS_SQL, {"kb_id": str(kb_id)})
+            rows = result.fetchall()
+            
+            await asyncio.to_thread(self._publish, kb_id, generation, rows)
+        finally:
+            lock_file.close()
+    
+    def _publish(self, kb_id: UUID, generation: int, rows: list) -> None:
+        """
+        Write a new matrix version and atomically switch the manifest to it.
+        
+        Must be called with the KB's refresh lock held. Skipped if the
+        published matrix was built at a newer KB generation.
+        """
+        try:
+            with open(self._manifest_path(kb_id), "r", encoding="utf-8") as f:
+                if json.load(f).get("generation", -1) > generation:
+                    return
+        except FileNotFoundError:
+            pass
+        
+        dimension = settings.embedding_dimension
+        vectors = np.empty((len(rows), dimension), dtype=np.float32)
+        ids = np.empty((len(rows), 16), dtype=np.uint8)
+        
+        for i, row in enumerate(rows):
+            embedding = row.embedding
+            vectors[i] = embedding.to_numpy() if hasattr(embedding, "to_numpy") else embedding
+            ids[i] = np.frombuffer(row.id.bytes, dtype=np.uint8)
+        
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        
+        kb_dir = self._kb_dir(kb_id)
+        os.makedirs(kb_dir, exist_ok=True)
+        
+        version = uuid.uuid4().hex
+        np.save(os.path.join(kb_dir, f"{version}.vectors.npy"), vectors.astype(self.dtype))
+        np.save(os.path.join(kb_dir, f"{version}.ids.npy"), ids)
+        
+        manifest_tmp = os.path.join(kb_dir, f"{version}.manifest.tmp")
+        with open(manifest_tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "generation": generation,
+                "count": len(rows),
+                "dtype": self.dtype.name,
+            }, f)
+        os.replace(manifest_tmp, self._manifest_path(kb_id))
+        
+        # Workers still mapping older versions keep them alive until they remap
+        for name in os.listdir(kb_dir):
+            if name.endswith(".npy") and not name.startswith(version):
+                try:
+                    os.remove(os.path.join(kb_dir, name))
+                except FileNotFoundError:
+                    pass
+    
+    async def drop(self, kb_id: UUID) -> None:
+        """Delete the KB's files."""
+        self._indexes.pop(kb_id, None)
+        await asyncio.to_thread(shutil.rmtree, self._kb_dir(kb_id), True)
@@ -0,0 +1,194 @@
+"""Postgres/pgvector vector store."""
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.document import Document, Chunk
+from vector_stores.base import VectorStore, row_to_result
+
+
+# Relaxed-order iterative scans may return rows slightly out of order,
+# so candidates are materialized and re-sorted by exact distance.
+# Only chunks is scanned; filenames are joined for the final top-k.
+RETRIEVAL_SQL = text("""
+    WITH candidates AS MATERIALIZED (
+        SELECT 
+            c.id as chunk_id,
+            c.doc_id,
+            c.content,
+            c.page_number,
+            c.line_start,
+            c.line_end,
+            c.chunk_index,
+            c.embedding <=> :embedding as distance
+        FROM chunks c
+        WHERE c.kb_id = :kb_id 
+          AND c.is_visible
+          AND c.embedding IS NOT NULL
+        ORDER BY c.embedding <=> :embedding
+        LIMIT :limit
+    )
+    SELECT candidates.*, d.filename, 1 - candidates.distance as score
+    FROM candidates
+    JOIN documents d ON candidates.doc_id = d.id
+    ORDER BY candidates.distance
+""")
+
+# Top-k for many queries in one statement: one index scan per query vector.
+# Queries arrive as one flat real[] (binary float4 array) sliced per query,
+# since asyncpg can't encode arrays of the custom vector type.
+BATCH_RETRIEVAL_SQL = text("""
+    SELECT q.ord as query_index, r.*, d.filename
+    FROM generate_series(1, :query_count) AS q(ord)
+    CROSS JOIN LATERAL (
+        SELECT CAST(
+            (CAST(:embeddings AS real[]))[(q.ord - 1) * :dimension + 1 : q.ord * :dimension]
+            AS vector
+        ) as embedding
+    ) qe
+    CROSS JOIN LATERAL (
+        SELECT 
+            c.id as chunk_id,
+            c.doc_id,
+            c.content,
+            c.page_number,
+            c.line_start,
+            c.line_end,
+            c.chunk_index,
+            1 - (c.embedding <=> qe.embedding) as score
+        FROM chunks c
+        WHERE c.kb_id = :kb_id
+          AND c.is_visible
+          AND c.embedding IS NOT NULL
+        ORDER BY c.embedding <=> qe.embedding
+        LIMIT :limit
+    ) r
+    JOIN documents d ON r.doc_id = d.id
+    ORDER BY q.ord, r.score DESC
+""")
+
+# Transaction-scoped ANN search parameters, applied in one round trip
+SEARCH_SETTINGS_SQL = text("""
+    SELECT set_config(:candidates_name, :candidates_value, true),
+           set_config(:iterative_scan_name, :iterative_scan_value, true)
+""")
+
+# Same, for pgvector < 0.8 or with iterative scans turned off
+SEARCH_CANDIDATES_SQL = text(
+    "SELECT set_config(:candidates_name, :candidates_value, true)"
+)
+
+
+class PgVectorStore(VectorStore):
+    """Searches chunk embeddings in Postgres through the pgvector ANN index."""
+    
+    async def search(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        **kwargs
+    ) -> List[Tuple[Chunk, Document, float]]:
+        """
+        Search with cosine distance: score = 1 - cosine_distance.
+        
+        Args:
+            ef_search: HNSW candidate list size for this query (default from settings)
+            probes: IVFFlat lists to probe for this query (default from settings)
+        """
+        await self._configure_search(db, top_k, ef_search, probes)
+        
+        result = await db.execute(
+            RETRIEVAL_SQL,
+            {
+                "kb_id": str(kb_id),
+                "embedding": query_embedding,
+                "limit": top_k
+            }
+        )
+        
+        return [row_to_result(row, row.score) for row in result.fetchall()]
+    
+    async def search_many(
+        self,
+        db: AsyncSession,
+        kb_id: UUID,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        **kwargs
+    ) -> List[List[Tuple[Chunk, Document, float]]]:
+        """Search for every query in a single round trip via a LATERAL join."""
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        
+        await self._configure_search(db, top_k, ef_search, probes)
+        
+        result = await db.execute(
+            BATCH_RETRIEVAL_SQL,
+            {
+                "kb_id": str(kb_id),
+                "embeddings": query_embeddings.ravel(),
+                "query_count": len(query_embeddings),
+                "dimension": query_embeddings.shape[1],
+                "limit": top_k,
+            }
+        )
+        
+        results = [[] for _ in range(len(query_embeddings))]
+        for row in result.fetchall():
+            results[row.query_index - 1].append(row_to_result(row, row.score))
+        return results
+    
+    async def _configure_search(
+        self,
+        db: AsyncSession,
+        top_k: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> None:
+        """
+        Apply per-query ANN search parameters for the current transaction.
+        
+        Enables pgvector iterative index scans so the kb_id/status filter
+        applied after the index scan can't silently return fewer than top_k rows.
+        """
+        iterative_scan = settings.vector_iterative_scan
+        
+        if settings.vector_index_type == "ivfflat":
+            # ivfflat only supports relaxed ordering
+            if iterative_scan != "off":
+                iterative_scan = "relaxed_order"
+            candidates_name = "ivfflat.probes"
+            candidates_value = probes or settings.ivfflat_probes
+        else:
+            # ef_search below top_k caps the number of rows the index returns
+            candidates_name = "hnsw.ef_search"
+            candidates_value = max(ef_search or settings.hnsw_ef_search, top_k)
+        
+        if iterative_scan == "off":
+            await db.execute(
+                SEARCH_CANDIDATES_SQL,
+                {
+                    "candidates_name": candidates_name,
+                    "candidates_value": str(candidates_value),
+                }
+            )
+            return
+        
+        await db.execute(
+            SEARCH_SETTINGS_SQL,
+            {
+                "candidates_name": candidates_name,
+                "candidates_value": str(candidates_value),
+                "iterative_scan_name": f"{settings.vector_index_type}.iterative_scan",
+                "iterative_scan_value": iterative_scan,
+            }
+        )
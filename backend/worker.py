@@ -0,0 +1,253 @@
+"""
+Ingestion worker entry point.
+Claims document ingestion jobs from the database queue and processes them,
+independently of the API process.
+
+Usage:
+    python worker.py --concurrency 4 --metrics-port 9101
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Optional
+
+from prometheus_client import start_http_server
+
+from config import settings
+from database import init_db, async_session_maker, engine
+from providers.factory import close_providers
+from services.document_service import DocumentService
+from services.embedding_cache import embedding_cache
+from utils.pdf_parser import shutdown_pdf_pool
+from services.job_queue import (
+    ClaimedJob,
+    JobLostError,
+    claim_job,
+    complete_job,
+    fail_job,
+    heartbeat,
+    queue_depth,
+    recover_stale_jobs,
+)
+from utils import metrics
+
+# Import models to register them with SQLAlchemy Base.metadata
+from models import User, KnowledgeBase, Document, Chunk, Conversation, Message, IngestionJob
+from models.job import JobKind
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("worker")
+
+
+class IngestionWorker:
+    """Runs up to `concurrency` ingestion jobs at a time until stopped."""
+    
+    def __init__(self, concurrency: int, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = asyncio.Event()
+    
+    def stop(self) -> None:
+        """Stop claiming new jobs; running jobs are finished first."""
+        if not self._stopping.is_set():
+            logger.info("Shutting down after running jobs finish")
+            self._stopping.set()
+    
+    async def run(self) -> None:
+        """Run the slot loops and periodic stale-job recovery."""
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        
+        maintenance = asyncio.create_task(self._maintenance_loop())
+        try:
+            await asyncio.gather(*(self._slot_loop() for _ in range(self.concurrency)))
+        finally:
+            maintenance.cancel()
+            await asyncio.gather(maintenance, return_exceptions=True)
+    
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, waking early on shutdown."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _slot_loop(self) -> None:
+        """Claim and process jobs one at a time."""
+        while not self._stopping.is_set():
+            try:
+                async with async_session_maker() as db:
+                    job = await claim_job(db, self.worker_id)
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}")
+                await self._sleep(settings.job_poll_interval)
+                continue
+            
+            if job is None:
+                await self._sleep(settings.job_poll_interval)
+                continue
+            
+            await self._process(job)
+    
+    async def _process(self, job: ClaimedJob) -> None:
+        """
+        Process one claimed job, heartbeating while it runs.
+        
+        If the job is recovered as stale and may be claimed by another
+        worker, processing is cancelled so the two runs never write the
+        document's chunks at the same time.
+        """
+        logger.info(
+            f"Processing document {job.doc_id} ({job.kind.value} job {job.id}, "
+            f"attempt {job.attempts}/{job.max_attempts})"
+        )
+        lost = asyncio.Event()
+        work = asyncio.create_task(self._run_job(job))
+        beat = asyncio.create_task(self._heartbeat_loop(job, work, lost))
+        
+        try:
+            await work
+        except asyncio.CancelledError:
+            if not lost.is_set():
+                raise
+            logger.warning(f"Abandoned document {job.doc_id}: job {job.id} was recovered by another worker")
+        except Exception as e:
+            try:
+                async with async_session_maker() as db:
+                    will_retry = await fail_job(db, job, self.worker_id, str(e))
+            except JobLostError:
+                # The current owner retries it and still needs any replacement upload
+                logger.warning(f"Document {job.doc_id} failed after job {job.id} was recovered: {e}")
+                return
+            logger.warning(
+                f"Document {job.doc_id} failed: {e}"
+                + (" (will retry)" if will_retry else " (giving up)")
+            )
+            if job.kind == JobKind.REPLACE and not will_retry:
+                # The current version stays; drop the rejected upload
+                try:
+                    os.remove(job.payload["path"])
+                except FileNotFoundError:
+                    pass
+        else:
+            try:
+                async with async_session_maker() as db:
+                    await complete_job(db, job.id, self.worker_id)
+            except JobLostError:
+                logger.warning(f"Document {job.doc_id} processed after job {job.id} was recovered")
+                return
+            logger.info(f"Document {job.doc_id} ready")
+        finally:
+            work.cancel()
+            beat.cancel()
+            await asyncio.gather(work, beat, return_exceptions=True)
+    
+    async def _run_job(self, job: ClaimedJob) -> None:
+        """Run the document service for a job."""
+        async with async_session_maker() as db:
+            if job.kind == JobKind.REPLACE:
+                await DocumentService(db).replace_document(job.doc_id, job.payload)
+            else:
+                await DocumentService(db).process_document(job.doc_id)
+    
+    async def _heartbeat_loop(self, job: ClaimedJob, work: asyncio.Task, lost: asyncio.Event) -> None:
+        """Keep the job's heartbeat fresh so it isn't recovered as stale; cancel `work` once it is."""
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_interval)
+            try:
+                async with async_session_maker() as db:
+                    if not await heartbeat(db, job.id, self.worker_id):
+                        logger.warning(f"Lost ownership of job {job.id}; cancelling it")
+                        lost.set()
+                        work.cancel()
+                        return
+            except Exception as e:
+                logger.error(f"Heartbeat for job {job.id} failed: {e}")
+    
+    async def _maintenance_loop(self) -> None:
+        """Periodically recover abandoned jobs, sample the queue depth and trim caches."""
+        last_eviction = float("-inf")
+        
+        while True:
+            try:
+                async with async_session_maker() as db:
+                    recovered = await recover_stale_jobs(db)
+                if recovered:
+                    logger.warning(f"Recovered {recovered} stale job(s)")
+            except Exception as e:
+                logger.error(f"Stale job recovery failed: {e}")
+            
+            try:
+                async with async_session_maker() as db:
+                    depth = await queue_depth(db)
+                provider = metrics.embedding_provider_label()
+                for state, jobs in depth.items():
+                    metrics.INGESTION_QUEUE_DEPTH.labels(provider, state).set(jobs)
+            except Exception as e:
+                logger.error(f"Queue depth sampling failed: {e}")
+            
+            now = time.monotonic()
+            if (
+                settings.embedding_cache_enabled
+                and now - last_eviction >= settings.embedding_cache_eviction_interval
+            ):
+                last_eviction = now
+                try:
+                    async with async_session_maker() as db:
+                        removed = await embedding_cache.evict(db)
+                    logger.info(
+                        f"Embedding cache: evicted {removed} entries, "
+                        f"stats {embedding_cache.stats()}"
+                    )
+                except Exception as e:
+                    logger.error(f"Embedding cache eviction failed: {e}")
+            
+            await asyncio.sleep(settings.job_heartbeat_interval)
+
+
+async def main(concurrency: int, metrics_port: int = 0) -> None:
+    """Run a worker until SIGINT/SIGTERM."""
+    await init_db()
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    
+    if metrics_port:
+        start_http_server(metrics_port)
+        logger.info(f"Serving metrics on port {metrics_port}")
+    
+    worker = IngestionWorker(concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    
+    try:
+        await worker.run()
+    finally:
+        await close_providers()
+        shutdown_pdf_pool()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Document ingestion worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.worker_concurrency,
+        help="Number of documents processed at once",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.worker_metrics_port,
+        help="Port serving Prometheus metrics (0 = disabled)",
+    )
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.concurrency, args.metrics_port))